@@ -12,12 +12,24 @@
 # =============================================================================
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from contextlib import contextmanager
-from typing import Any, Dict, Optional
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from system.db.query import QuerySpec, DriverCapabilities
 
 
+def iter_chunks(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Deli bilo koji iterable (i generator) na liste od najviše size elemenata, bez kopije celog ulaza."""
+    it = iter(records)
+    size = max(1, int(size))
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 class BaseDBDriver(ABC):
     """Svi drajveri moraju implementirati isti API."""
 
@@ -65,3 +77,33 @@ class BaseDBDriver(ABC):
     @abstractmethod
     def read_spec(self, spec: QuerySpec):
         """Napredniji upit kroz QuerySpec (where/order/select/limit/offset/first)."""
+
+    # --- Bulk upis u blokovima (zajednički za drajvere) ---
+    def _insert_chunked(
+        self,
+        records: Iterable[Dict[str, Any]],
+        insert_chunk: Callable[[List[Dict[str, Any]]], List[Any]],
+        chunk_size: int,
+        commit_every_chunk: bool = False,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> List[Any]:
+        """
+        Ulaz (lista ili generator) ide kroz insert_chunk blok po blok — od ulaza je u memoriji
+        samo tekući blok, a vraćaju se samo id-jevi.
+          - commit_every_chunk=False: sve u jednoj transakciji (sve ili ništa); ništa nije
+            trajno dok se cela transakcija ne potvrdi, a drajver do tada drži njeno stanje
+            (JSON: op-ovi i undo log za sve redove, SQLite: nepotvrđene stranice u WAL-u)
+          - commit_every_chunk=True: svaki blok je svoja transakcija i trajan je odmah posle
+            svog bloka (greška čuva prethodne blokove); unutar spoljne transakcije pozivaoca
+            blokovi se i dalje spajaju u nju
+          - progress(ukupno_upisano) se zove posle svakog bloka i broji redove upisane u
+            transakciju — trajni su tek uz commit_every_chunk=True
+        """
+        ids: List[Any] = []
+        with nullcontext() if commit_every_chunk else self.transaction():
+            for chunk in iter_chunks(records, chunk_size):
+                with self.transaction() if commit_every_chunk else nullcontext():
+                    ids.extend(insert_chunk(chunk))
+                if progress is not None:
+                    progress(len(ids))
+        return ids
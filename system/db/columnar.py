@@ -0,0 +1,157 @@
+# =============================================================================
+# File:        system/db/columnar.py
+# Purpose:     Kompaktan binarni / kolonski kodek tabele za JSONDriver (.col)
+# =============================================================================
+"""
+Raspored fajla:
+    MAGIC
+    blokovi kolona, redom iz zaglavlja; svaki blok:
+        [state: n bajtova ako "state"] 0 = ključ ne postoji, 1 = None, 2 = vrednost
+        podaci:
+          i64  -> array('q') za sve redove (0 na mestu bez vrednosti)
+          f64  -> array('d')
+          bool -> n bajtova (0/1)
+          json -> JSON niz samo postojećih vrednosti (stringovi, mešani tipovi, objekti)
+    zaglavlje (JSON): {"rows": n, "columns": [{"name", "type", "state", "bytes"}, ...]}
+    uint32 (LE) dužina zaglavlja
+
+Zaglavlje ide na kraj (čita se od kraja fajla), pa upis može da strimuje blok
+po blok — u memoriji je samo kolona koja se trenutno kodira.
+
+Ključevi se pamte jednom po tabeli, kolone su uzastopne, brojevi binarno.
+Redosled ključeva u redu posle učitavanja = redosled kolona (prvo pojavljivanje).
+"""
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Tuple
+
+MAGIC = b"MACCOL2\n"
+EXT = ".col"
+
+_MISSING = object()
+_I64_MIN, _I64_MAX = -(2 ** 63), 2 ** 63 - 1
+_LE = sys.byteorder == "little"
+
+
+def _column_type(values: List[Any]) -> str:
+    kinds = set()
+    for v in values:
+        if v is _MISSING or v is None:
+            continue
+        t = type(v)
+        if t is int:
+            if not (_I64_MIN <= v <= _I64_MAX):
+                return "json"
+        elif t not in (float, bool):
+            return "json"
+        kinds.add(t)
+        if len(kinds) > 1:
+            return "json"
+    if kinds == {int}:
+        return "i64"
+    if kinds == {float}:
+        return "f64"
+    if kinds == {bool}:
+        return "bool"
+    return "json"
+
+
+def _packed(typecode: str, values: List[Any]) -> bytes:
+    arr = array(typecode, values)
+    if not _LE:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _unpacked(typecode: str, raw: bytes) -> List[Any]:
+    arr = array(typecode)
+    arr.frombytes(raw)
+    if not _LE:
+        arr.byteswap()
+    return arr.tolist()
+
+
+def _encode_column(values: List[Any]) -> Tuple[Dict[str, Any], bytes]:
+    ctype = _column_type(values)
+    state = None
+    if any(v is _MISSING or v is None for v in values):
+        state = bytes(0 if v is _MISSING else 1 if v is None else 2 for v in values)
+    if ctype == "json":
+        present = values if state is None else [v for v, s in zip(values, state) if s == 2]
+        data = json.dumps(present, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    else:
+        if state is not None:
+            zero = False if ctype == "bool" else 0
+            values = [zero if s != 2 else v for v, s in zip(values, state)]
+        if ctype == "i64":
+            data = _packed("q", values)
+        elif ctype == "f64":
+            data = _packed("d", values)
+        else:
+            data = bytes(values)
+    block = (state or b"") + data
+    return {"type": ctype, "state": state is not None, "bytes": len(block)}, block
+
+
+def iter_encode(rows: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """Kodiraj redove kolonu po kolonu kao niz bajt delova (blokovi, pa zaglavlje)."""
+    names: Dict[str, None] = {}
+    for r in rows:
+        for k in r:
+            if k not in names:
+                names[k] = None
+    yield MAGIC
+    columns = []
+    for name in names:
+        meta, block = _encode_column([r.get(name, _MISSING) for r in rows])
+        meta["name"] = name
+        columns.append(meta)
+        yield block
+    header = json.dumps({"rows": len(rows), "columns": columns}, ensure_ascii=False).encode("utf-8")
+    yield header + struct.pack("<I", len(header))
+
+
+def decode(raw: bytes) -> List[Dict[str, Any]]:
+    if not raw.startswith(MAGIC) or len(raw) < len(MAGIC) + 4:
+        raise ValueError("Nije kolonski (.col) fajl")
+    (hlen,) = struct.unpack_from("<I", raw, len(raw) - 4)
+    header = json.loads(raw[len(raw) - 4 - hlen:len(raw) - 4])
+    pos = len(MAGIC)
+    n = header["rows"]
+    names = []
+    cols = []
+    sparse = False
+    for col in header["columns"]:
+        block = raw[pos:pos + col["bytes"]]
+        pos += col["bytes"]
+        state = None
+        if col["state"]:
+            state, block = block[:n], block[n:]
+        ctype = col["type"]
+        if ctype == "json":
+            values = json.loads(block)
+            if state is not None:
+                it = iter(values)
+                values = [next(it) if s == 2 else (None if s == 1 else _MISSING) for s in state]
+        else:
+            if ctype == "i64":
+                values = _unpacked("q", block)
+            elif ctype == "f64":
+                values = _unpacked("d", block)
+            else:
+                values = [b == 1 for b in block]
+            if state is not None:
+                values = [v if s == 2 else (None if s == 1 else _MISSING) for v, s in zip(values, state)]
+        if state is not None and 0 in state:
+            sparse = True
+        names.append(col["name"])
+        cols.append(values)
+    if not cols:
+        return [{} for _ in range(n)]
+    if not sparse:
+        return [dict(zip(names, vals)) for vals in zip(*cols)]
+    return [{k: v for k, v in zip(names, vals) if v is not _MISSING} for vals in zip(*cols)]
@@ -3,16 +3,25 @@
 # Purpose:    Brži i bezbedniji JSON drajver (atomski upis, mini-indeksi, batch)
 #             Kompatibilan sa starim i novim pozivima (dict i list where stil)
 #             read_spec prihvata QuerySpec ili (table, spec_dict)
+#             Žurnal, indeksi, lock po tabeli, trajnost i rasporedi na disku:
+#             docs/MAC_FULL_DOCUMENTATION.md (5.2 JSONDriver)
 # Author:     Aleksandar Popovic
 # Updated:    2025-08-13
 # ========================================================================
 
 from __future__ import annotations
-import os, json, threading, tempfile
-from typing import Any, Dict, List, Optional, Tuple, Union
-from contextlib import contextmanager
+import os, sys, json, threading, tempfile, time, atexit, weakref
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from contextlib import ExitStack, contextmanager
 
+from system.config.env import EnvLoader
+from system.db import columnar, json_stream, jsonl_store, ordering
 from system.db.base_driver import BaseDBDriver
+from system.db.locks import FileLock, LockTimeout, RWLock, file_lock, table_lock
+from system.db.predicates import OP_COST, OP_SELECTIVITY, compile_where
+from system.db.sorted_index import SortedIndex
 
 # --- atomic write helpers ----------------------------------------------------
 
@@ -27,21 +36,153 @@ def _fsync_dir(path: str) -> None:
     except Exception:
         pass
 
-def _atomic_write(path: str, text: str) -> None:
-    folder = os.path.dirname(path) or "."
-    os.makedirs(folder, exist_ok=True)
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=folder, encoding="utf-8") as tf:
-        tmp = tf.name
-        tf.write(text)
-        tf.flush()
-        os.fsync(tf.fileno())
-    os.replace(tmp, path)
-    _fsync_dir(path)
+def _atomic_write(path: str, text: str, sync: bool = True) -> None:
+    _atomic_write_many({path: text}, sync)
 
-_LOCK = threading.RLock()
+def _atomic_write_many(items: Dict[str, Union[str, Iterable[str]]], sync: bool = True,
+                       sizes: Optional[Dict[str, int]] = None) -> None:
+    """
+    Atomski zameni više fajlova jednim "commit" krugom: prvo se svi temp fajlovi
+    upišu i fsync-uju, pa tek onda idu os.replace i po jedan fsync svakog foldera.
+    Sadržaj je string ili iterabla delova str/bytes (strimuje se, bez spajanja u
+    memoriji); fajlovi se pišu redom, pa generator kasnijeg fajla vidi `sizes` ranijih.
+    sync=False preskače fsync-ove (rename ostaje atomski, ali ne i trajan).
+    """
+    staged = []
+    try:
+        for path, content in items.items():
+            folder = os.path.dirname(path) or "."
+            os.makedirs(folder, exist_ok=True)
+            with tempfile.NamedTemporaryFile("wb", delete=False, dir=folder) as tf:
+                staged.append((tf.name, path))
+                if isinstance(content, str):
+                    content = (content,)
+                for chunk in content:
+                    tf.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                tf.flush()
+                if sync:
+                    os.fsync(tf.fileno())
+                if sizes is not None:
+                    sizes[path] = os.fstat(tf.fileno()).st_size
+    except Exception:
+        for tmp, _ in staged:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        raise
+    for tmp, path in staged:
+        os.replace(tmp, path)
+    if not sync:
+        return
+    for folder in {os.path.dirname(os.path.abspath(p)) for _, p in staged}:
+        _fsync_dir(os.path.join(folder, "."))
+
+def _append_many(batch: Dict[str, List[str]], sync: bool = True) -> Dict[str, int]:
+    """
+    Dopiši linije u više fajlova: svi upisi, pa svi fsync-ovi, pa jedan fsync
+    foldera za novonastale fajlove. Vraća broj upisanih bajtova po putanji.
+    """
+    written: Dict[str, int] = {}
+    new_dirs = set()
+    handles = []
+    try:
+        for path, lines in batch.items():
+            folder = os.path.dirname(path) or "."
+            os.makedirs(folder, exist_ok=True)
+            if not os.path.exists(path):
+                new_dirs.add(os.path.abspath(folder))
+            payload = "".join(lines).encode("utf-8")
+            f = open(path, "ab")
+            handles.append(f)
+            f.write(payload)
+            f.flush()
+            written[path] = len(payload)
+        if sync:
+            for f in handles:
+                os.fsync(f.fileno())
+    finally:
+        for f in handles:
+            f.close()
+    if not sync:
+        return written
+    for folder in new_dirs:
+        _fsync_dir(os.path.join(folder, "."))
+    return written
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(EnvLoader.get(key, default) or default)
+    except (TypeError, ValueError):
+        return default
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(EnvLoader.get(key, default) or default)
+    except (TypeError, ValueError):
+        return default
+
+DURABILITY_MODES = ("full", "batched", "none")
+TABLE_FORMATS = ("json", "jsonl", "columnar")
+
+def _flush_at_exit(ref) -> None:
+    drv = ref()
+    if drv is not None:
+        drv.close()
+
+class _FlushSignal:
+    """Stanje koje deli pozadinska nit i drajver (pod _batch_cond), bez reference na drajver."""
+    __slots__ = ("pending", "closing")
+
+    def __init__(self):
+        self.pending = False
+        self.closing = False
+
+def _flusher_loop(ref, cond: threading.Condition, signal: _FlushSignal) -> None:
+    """
+    Pozadinski flush (batched). Dok čeka drži samo weakref na drajver, pa drajver bez drugih
+    referenci može da se pokupi (__del__ -> close -> flush), a nit se tada gasi.
+    """
+    while True:
+        with cond:
+            while not signal.pending and not signal.closing:
+                cond.wait()
+            if signal.closing:
+                return
+            signal.pending = False
+        drv = ref()
+        if drv is None:
+            return
+        with cond:
+            while drv._batch_ops < drv._batch_max_ops and not signal.closing:
+                remaining = drv._batch_since + drv._batch_max_delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                cond.wait(remaining)
+        try:
+            drv.flush()
+        except Exception:
+            time.sleep(drv._batch_max_delay)  # npr. LockTimeout — pokušaj u sledećem krugu
+            with cond:
+                signal.pending = True
+        drv = None  # van cond-a: poslednja referenca sme da pokrene __del__ -> close()
 
 # ---------------------------------------------------------------------------
 
+class _TxState:
+    """Stanje transakcije jedne niti: dubina, baferovani op-ovi, zaključane tabele, undo log."""
+    __slots__ = ("depth", "pending", "locked", "undo", "last_ids")
+
+    def __init__(self):
+        self.depth = 0
+        self.pending: Dict[str, List[Dict[str, Any]]] = {}
+        self.locked: List[str] = []  # tabele za koje transakcija drži write lock (do kraja)
+        # undo log: (table, "ins", row, None) | (table, "upd", row, stara_kopija)
+        #           | (table, "del", None, [(pozicija, row), ...] rastuće)
+        self.undo: List[Tuple[str, str, Any, Any]] = []
+        self.last_ids: Dict[str, int] = {}  # table -> _last_id pre prvog upisa
+
+
 class JSONDriver(BaseDBDriver):
     """
     Uniformni konstruktor: __init__(**params)  -> očekuje 'root' (default: system/data/db)
@@ -49,11 +190,15 @@ class JSONDriver(BaseDBDriver):
       - capabilities(), transaction()
       - create(table, record) -> int
       - read(table, query_dict) -> List[dict]
-      - update(table, spec_dict, patch) -> int
-      - delete(table, spec_dict) -> int
+      - update(table, spec_dict | id, patch) -> int (za id: bool)
+      - delete(table, spec_dict | id) -> int (za id: bool)
+      - find_by_pk(table, id) -> Optional[dict]  (O(1) preko pk mape)
+      - count(table, where) -> int, exists(table, where) -> bool  (iz indeksa kad mogu)
       - get_last_id(table) -> Optional[int]
       - read_spec(QuerySpec | (table, spec_dict)) -> List[dict]
+      - iter(table, query_dict) -> Iterator[dict]  (strim, rani izlaz na limit)
       - bulk_insert, bulk_update
+      - create_index/drop_index/list_indexes, set_format, flush/close, memory_usage
     """
     def __init__(self, **params):
         root = params.get("root") or os.path.join("system", "data", "db")
@@ -61,10 +206,72 @@ class JSONDriver(BaseDBDriver):
         os.makedirs(self.root, exist_ok=True)
         self._cache: Dict[str, List[Dict[str, Any]]] = {}
         self._last_id: Dict[str, int] = {}
-        self._indexes: Dict[str, Dict[str, Dict[Any, set]]] = {}  # table -> field -> value -> set(ids)
-        self._tx_depth = 0
-        self._snapshot = None
-        self._snapshot_last = None
+        self._pk: Dict[str, Dict[Any, int]] = {}  # table -> id -> pozicija u _cache[table]
+        self._tombs: Dict[str, int] = {}  # table -> broj None pozicija (obrisani, još nesažeti)
+        self._tomb_min = int(params.get("tombstone_min") or _env_int("JSON_TOMBSTONE_MIN", 1024))
+        self._tomb_ratio = float(params.get("tombstone_ratio") or _env_float("JSON_TOMBSTONE_RATIO", 0.25))
+        self._bulk_chunk = int(params.get("bulk_chunk") or _env_int("JSON_BULK_CHUNK", 5000))
+        self._indexes: Dict[str, Dict[str, Dict[Any, Dict[Any, Dict[str, Any]]]]] = {}  # table -> field -> value -> {id: row}
+        self._sorted: Dict[str, Dict[str, SortedIndex]] = {}  # table -> field -> SortedIndex
+        self._meta: Dict[str, Dict[str, Any]] = {}  # table -> {"indexes": [...], "sorted_indexes": [...]}
+        self._local = threading.local()  # .tx -> _TxState tekuće niti
+        self._load_lock = threading.RLock()
+        self._lock_timeout = float(params.get("lock_timeout") or _env_float("JSON_LOCK_TIMEOUT", 30.0))
+
+        # --- žurnal ---
+        journal = params.get("journal")
+        self._journal_enabled = EnvLoader.get_bool("JSON_JOURNAL", True) if journal is None else bool(journal)
+        self._journal_max_bytes = int(params.get("journal_max_bytes") or _env_int("JSON_JOURNAL_MAX_BYTES", 4 * 1024 * 1024))
+        self._journal_ratio = float(params.get("journal_ratio") or _env_float("JSON_JOURNAL_RATIO", 0.5))
+        self._journal_bytes: Dict[str, int] = {}   # table -> veličina žurnala (bajtovi)
+        self._base_bytes: Dict[str, int] = {}      # table -> veličina baznog .json fajla
+        self._dirty: Dict[str, int] = {}           # table -> broj izmenjenih redova koji još nisu na disku
+
+        # --- segmenti ---
+        self._segment_size = int(params.get("segment_size") or _env_int("JSON_SEGMENT_SIZE", 0))
+        self._manifests: Dict[str, Optional[Dict[str, Any]]] = {}  # table -> manifest (None = jedan fajl)
+        self._seg_dirty: Dict[str, set] = {}    # table -> segmenti sa izmenama (nema ključa = svi)
+        self._partial: Dict[str, Dict[Any, Any]] = {}  # table -> {"segs"/"jsonl", "journal"} pre punog učitavanja
+
+        # --- format jednog fajla ---
+        fmt = str(params.get("format") or EnvLoader.get("JSON_FORMAT", "json") or "json").strip().lower()
+        self._format = fmt if fmt in TABLE_FORMATS else "json"
+        self._chunk_rows = int(params.get("chunk_rows") or _env_int("JSON_CHUNK_ROWS", json_stream.CHUNK_ROWS))
+
+        # --- memorijski budžet ---
+        self._cache_max_bytes = int(params.get("cache_max_bytes") or _env_int("JSON_CACHE_MAX_BYTES", 0))
+        self._lru: "OrderedDict[str, None]" = OrderedDict()  # najdavnije korišćena tabela je prva
+
+        # --- više procesa ---
+        multiprocess = params.get("multiprocess")
+        self._multiprocess = (
+            EnvLoader.get_bool("JSON_MULTIPROCESS", False) if multiprocess is None else bool(multiprocess)
+        )
+        self._seen_gen: Dict[str, int] = {}    # table -> generacija koju odražava naše stanje
+        self._disk_sig: Dict[str, Tuple] = {}  # table -> potpis baze + meta fajla pri učitavanju/upisu
+
+        # --- trajnost ---
+        durability = (params.get("durability") or EnvLoader.get("JSON_DURABILITY", "full") or "full")
+        durability = str(durability).strip().lower()
+        self._durability = durability if durability in DURABILITY_MODES else "full"
+        self._sync = self._durability != "none"
+        self._batch_max_delay = float(
+            params.get("batch_max_delay_ms") or _env_float("JSON_BATCH_MAX_DELAY_MS", 50.0)
+        ) / 1000.0
+        self._batch_max_ops = int(params.get("batch_max_ops") or _env_int("JSON_BATCH_MAX_OPS", 1000))
+        self._batch: Dict[str, List[Dict[str, Any]]] = {}  # table -> op-ovi čekaju pozadinski flush
+        self._batch_ops = 0
+        self._batch_since = 0.0
+        self._batch_cond = threading.Condition(threading.Lock())
+        self._flush_lock = threading.Lock()  # čuva redosled grupnih upisa
+        self._signal = _FlushSignal()
+        self._flusher: Optional[threading.Thread] = None
+        if self._durability == "batched" and not self._multiprocess:
+            self._flusher = threading.Thread(
+                target=_flusher_loop, args=(weakref.ref(self), self._batch_cond, self._signal), name="json-flusher", daemon=True
+            )
+            self._flusher.start()
+            atexit.register(_flush_at_exit, weakref.ref(self))
 
     # -------- capabilities ---------------------------------------------------
     def capabilities(self) -> Dict[str, Any]:
@@ -80,83 +287,1055 @@ class JSONDriver(BaseDBDriver):
     def _get_table_path(self, table: str) -> str:
         return os.path.join(self.root, f"{table}.json")
 
+    def _get_journal_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}.journal")
+
+    def _get_meta_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}.meta.json")
+
+    def _get_jsonl_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}.jsonl")
+
+    def _get_jsonl_idx_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}.jsonl.idx")
+
+    def _get_columnar_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}{columnar.EXT}")
+
+    def _base_paths(self, table: str) -> Dict[str, str]:
+        return {
+            "json": self._get_table_path(table),
+            "jsonl": self._get_jsonl_path(table),
+            "columnar": self._get_columnar_path(table),
+        }
+
+    def _base_format(self, table: str) -> Optional[str]:
+        """Format postojećeg baznog fajla, ili None. Ako ih ima više (pad usred prelaza), noviji."""
+        found = [(os.path.getmtime(p), fmt) for fmt, p in self._base_paths(table).items() if os.path.exists(p)]
+        return max(found)[1] if found else None
+
+    def _table_format(self, table: str) -> str:
+        """Format za upis: iz <table>.meta.json ako je zadat, inače JSON_FORMAT."""
+        return self._load_meta(table).get("format") or self._format
+
+    def _get_manifest_path(self, table: str) -> str:
+        return os.path.join(self.root, f"{table}.manifest.json")
+
+    def _get_segment_path(self, table: str, name: str) -> str:
+        return os.path.join(self.root, f"{table}.segments", name)
+
+    def _load_meta(self, table: str) -> Dict[str, Any]:
+        if table not in self._meta:
+            path = self._get_meta_path(table)
+            meta: Dict[str, Any] = {}
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            meta.setdefault("indexes", [])
+            meta.setdefault("sorted_indexes", [])
+            self._meta[table] = meta
+        return self._meta[table]
+
+    def _save_meta(self, table: str) -> None:
+        _atomic_write(self._get_meta_path(table), json.dumps(self._meta[table], ensure_ascii=False))
+        self._bump(table)
+
     def _load_table(self, table: str) -> List[Dict[str, Any]]:
-        path = self._get_table_path(table)
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
+        manifest = self._load_manifest(table)
+        if manifest is not None:
+            partial = self._partial.pop(table, None) or {"segs": {}}
             data = []
+            for key in sorted(manifest["segments"], key=self._seg_order):
+                seg = partial["segs"].get(key)
+                data.extend(seg[0] if seg is not None else self._read_segment(table, manifest, key))
+            self._base_bytes[table] = sum(e.get("bytes", 0) for e in manifest["segments"].values())
+            self._seg_dirty[table] = set()
+            touched: Optional[set] = set()
+        else:
+            fmt = self._base_format(table)
+            if fmt == "jsonl":
+                partial = self._partial.pop(table, None) or {}
+                lazy = partial.get("jsonl") or jsonl_store.LazyTable(
+                    self._get_jsonl_path(table), self._get_jsonl_idx_path(table)
+                )
+                data = lazy.load_all()
+                self._base_bytes[table] = lazy.size
+                lazy.close()  # tabela je sad u kešu, mmap više ne treba
+            elif fmt == "columnar":
+                path = self._get_columnar_path(table)
+                with open(path, "rb") as f:
+                    data = columnar.decode(f.read())
+                self._base_bytes[table] = os.path.getsize(path)
+            elif fmt == "json":
+                path = self._get_table_path(table)
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._base_bytes[table] = os.path.getsize(path)
+            else:
+                data = []
+                self._base_bytes[table] = 0
+                self._seg_dirty[table] = set()  # nova tabela: nema šta da se prevodi
+            touched = None
+        data, torn = self._replay_journal(table, data, touched)
+        if touched:
+            # op-ovi iz žurnala još nisu u segmentima -> ti segmenti su dirty
+            size = int(manifest["segment_size"])
+            self._seg_dirty[table].update(self._seg_key(rid, size) for rid in touched)
         self._cache[table] = data
+        self._tombs.pop(table, None)  # sveže učitana lista nema None pozicija
         last = 0
         for r in data:
             rid = r.get("id")
             if isinstance(rid, int) and rid > last:
                 last = rid
         self._last_id[table] = last
-        self._indexes[table] = {}
+        self._rebuild_indexes(table)
+        if self._multiprocess:
+            self._disk_sig[table] = self._disk_signature(table)
+        if torn and (not self._multiprocess or self._file_lock(table).exclusive_held()):
+            # nepotpuna poslednja linija (pad usred upisa) -> odmah kompaktuj
+            # (više procesa: samo pod exclusive lock-om, inače pri sledećem upisu)
+            self._compact(table)
         return data
 
     def _ensure_loaded(self, table: str) -> List[Dict[str, Any]]:
-        if table not in self._cache:
-            return self._load_table(table)
-        return self._cache[table]
+        rows = self._cache.get(table)
+        if rows is None:
+            with self._load_lock:
+                rows = self._cache.get(table)
+                if rows is None:
+                    rows = self._load_table(table)
+                    if self._cache_max_bytes:
+                        self._lru[table] = None
+                        self._evict_over_budget(keep=table)
+        elif self._cache_max_bytes:
+            try:
+                self._lru.move_to_end(table)
+            except KeyError:
+                self._lru[table] = None
+        return rows
+
+    # -------- memorija (LRU) -------------------------------------------------
+    def _estimate_table(self, table: str) -> Dict[str, int]:
+        """Približna memorija tabele: uzorak redova * broj redova + strukture indeksa."""
+        rows = self._cache.get(table) or []
+        n = len(rows) - self._tombs.get(table, 0)
+        row_bytes = sys.getsizeof(rows)
+        sample = [r for r in rows[::max(1, len(rows) // 64)][:64] if r is not None]
+        if n and sample:
+            per_row = sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values()) for r in sample)
+            row_bytes += int(per_row / len(sample) * n)
+        idx_bytes = sys.getsizeof(self._pk.get(table, {}))
+        for buckets in self._indexes.get(table, {}).values():
+            idx_bytes += sys.getsizeof(buckets)
+            if buckets:
+                sample = list(islice(buckets.values(), 32))
+                idx_bytes += int(sum(sys.getsizeof(b) for b in sample) / len(sample) * len(buckets))
+        for si in self._sorted.get(table, {}).values():
+            idx_bytes += (sys.getsizeof(si.keys) + sys.getsizeof(si.ids) + sys.getsizeof(si.rows)
+                          + sys.getsizeof(si.nulls))
+        return {"rows": row_bytes, "indexes": idx_bytes, "total": row_bytes + idx_bytes}
+
+    def memory_usage(self) -> Dict[str, Dict[str, int]]:
+        """Približna memorija po učitanoj tabeli (bajtovi): {table: {"rows", "indexes", "total"}}."""
+        return {t: self._estimate_table(t) for t in list(self._cache)}
+
+    def _evict_over_budget(self, keep: Optional[str] = None) -> None:
+        usage = {t: self._estimate_table(t)["total"] for t in list(self._cache)}
+        total = sum(usage.values())
+        if total <= self._cache_max_bytes:
+            return
+        for table in list(self._lru):
+            if total <= self._cache_max_bytes:
+                break
+            if table == keep or table not in self._cache:
+                continue
+            lock = self._lock_for(table)
+            if lock.used_by_me() or not lock.acquire_write(timeout=0):
+                continue  # tabelu neko koristi (ili je u našoj transakciji) -> preskoči
+            try:
+                if self._dirty.get(table):
+                    try:
+                        self.flush()  # batched bafer; van transakcije drugih dirty tabela nema
+                    except Exception:
+                        pass  # npr. LockTimeout druge tabele — ne obara nepovezano čitanje
+                if self._dirty.get(table):
+                    continue  # izmene nisu na disku -> tabela ostaje u kešu
+                self._evict(table)
+                total -= usage.get(table, 0)
+            finally:
+                lock.release_write()
+
+    def _evict(self, table: str) -> None:
+        for state in (self._cache, self._pk, self._indexes, self._sorted, self._last_id, self._tombs):
+            state.pop(table, None)
+        self._lru.pop(table, None)
+        self._drop_partial(table)
+
+    def _drop_partial(self, table: str) -> None:
+        partial = self._partial.pop(table, None)
+        if partial is not None and partial.get("jsonl") is not None:
+            partial["jsonl"].close()
+
+    # -------- lock-ovi -------------------------------------------------------
+    def _lock_for(self, table: str) -> RWLock:
+        return table_lock(self.root, table)
+
+    def _file_lock(self, table: str) -> FileLock:
+        return file_lock(self.root, table)
+
+    # -------- više procesa (fcntl + generacija) ------------------------------
+    def _disk_signature(self, table: str) -> Tuple:
+        """(inode, mtime_ns, veličina) baznih fajlova i meta-e; žurnal se prati po bajtovima."""
+        sig = []
+        for path in (self._get_manifest_path(table), *self._base_paths(table).values(), self._get_meta_path(table)):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _stale(self, table: str) -> bool:
+        return self._seen_gen.get(table) != self._file_lock(table).generation()
+
+    def _bump(self, table: str) -> None:
+        """Posle upisa tabele na disk (pod exclusive lock-om): nova generacija za druge procese."""
+        if self._multiprocess:
+            self._seen_gen[table] = self._file_lock(table).bump()
+            self._disk_sig[table] = self._disk_signature(table)
+
+    @contextmanager
+    def _fresh(self, table: str, exclusive: bool = False):
+        """Fajl lock tabele za vreme bloka + osvežavanje keša ako ju je menjao drugi proces."""
+        if not self._multiprocess:
+            yield
+            return
+        fl = self._file_lock(table)
+        fl.acquire(exclusive, self._lock_timeout)
+        try:
+            self._check_fresh(table, fl)
+            yield
+        finally:
+            fl.release(exclusive)
+
+    def _check_fresh(self, table: str, fl: FileLock) -> None:
+        gen = fl.generation()
+        seen = self._seen_gen.get(table)
+        if seen == gen:
+            return
+        with self._load_lock:
+            # rep žurnala se primenjuje u mestu -> samo pod write lock-om (nema čitalaca)
+            if not (seen is not None and table in self._cache and self._lock_for(table).held_by_me()
+                    and self._apply_journal_tail(table)):
+                self._forget(table)
+            self._seen_gen[table] = gen
+
+    def _forget(self, table: str) -> None:
+        """Odbaci sve što znamo o tabeli; sledeći pristup čita disk iz početka."""
+        self._evict(table)
+        for state in (self._meta, self._manifests, self._seg_dirty, self._journal_bytes,
+                      self._base_bytes, self._disk_sig):
+            state.pop(table, None)
+
+    def _apply_journal_tail(self, table: str) -> bool:
+        """
+        Primeni samo linije žurnala koje je u međuvremenu dopisao drugi proces.
+        False ako se baza/meta promenila (kompakcija, novi indeks...) -> potrebno puno učitavanje.
+        """
+        if self._disk_sig.get(table) != self._disk_signature(table):
+            return False
+        start = self._journal_bytes.get(table, 0)
+        jpath = self._get_journal_path(table)
+        try:
+            size = os.path.getsize(jpath)
+        except OSError:
+            return start == 0
+        if size < start:
+            return False
+        ops = []
+        consumed = start
+        with open(jpath, "rb") as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # nepotpuna linija — upis u toku ili pad; pročitaće se sledeći put
+                try:
+                    ops.append(json.loads(raw))
+                except ValueError:
+                    break
+                consumed += len(raw)
+        data = self._cache[table]
+        pk = self._pk.setdefault(table, {})
+        for entry in ops:
+            if entry.get("op") == "put":
+                row = entry["row"]
+                rid = row.get("id")
+                old = self._pk_get(table, rid)
+                if old is not None:
+                    self._drop_from_index(table, old)
+                    data[pk[rid]] = row
+                else:
+                    pk[rid] = len(data)
+                    data.append(row)
+                self._add_to_index(table, row)
+                if isinstance(rid, int) and rid > self._last_id.get(table, 0):
+                    self._last_id[table] = rid
+            elif entry.get("op") == "del":
+                old = self._pk_get(table, entry.get("id"))
+                if old is not None:
+                    self._drop_from_index(table, old)
+                    self._tombstone(table, [pk[old.get("id")]])
+        self._mark_segments(table, ops)  # op-ovi još nisu u segmentima
+        self._journal_bytes[table] = consumed
+        return True
+
+    def _tx(self) -> Optional[_TxState]:
+        tx = getattr(self._local, "tx", None)
+        return tx if tx is not None and tx.depth > 0 else None
+
+    @contextmanager
+    def _reading(self, table: str, load: bool = True):
+        """Read lock tabele za vreme bloka; vraća keširane redove (load=False -> None, bira pozivalac)."""
+        lock = self._lock_for(table)
+        if self._multiprocess and not lock.used_by_me() and self._stale(table):
+            # drugi proces je menjao tabelu: osveži pod write lock-om (rep žurnala u mestu)
+            with lock.write_locked(self._lock_timeout, table), self._fresh(table):
+                pass
+        with lock.read_locked(self._lock_timeout, table), self._fresh(table):
+            yield self._ensure_loaded(table) if load else None
+
+    @contextmanager
+    def _writing(self, table: str):
+        """
+        Write lock tabele. Van transakcije samo za vreme bloka; u transakciji se uzima
+        pri prvom upisu i drži do kraja transakcije (redovi idu u undo log pozivaoca).
+        """
+        lock = self._lock_for(table)
+        tx = self._tx()
+        if tx is None:
+            with lock.write_locked(self._lock_timeout, table), self._fresh(table, exclusive=True):
+                yield self._ensure_loaded(table)
+                self._maybe_compact_rows(table)
+            return
+        if table not in tx.locked:
+            if not lock.acquire_write(self._lock_timeout):
+                raise LockTimeout(f"Write lock timeout: {table}")
+            if self._multiprocess:
+                fl = self._file_lock(table)
+                try:
+                    fl.acquire(True, self._lock_timeout)
+                except Exception:
+                    lock.release_write()
+                    raise
+                try:
+                    self._check_fresh(table, fl)
+                except Exception:
+                    fl.release(True)
+                    lock.release_write()
+                    raise
+            tx.locked.append(table)
+        rows = self._ensure_loaded(table)
+        tx.last_ids.setdefault(table, self._last_id.get(table, 0))
+        yield rows
 
     def _save_table(self, table: str) -> None:
-        path = self._get_table_path(table)
-        _atomic_write(path, json.dumps(self._cache[table], ensure_ascii=False))
+        stage = self._stage_table(table)
+        try:
+            _atomic_write_many(stage["files"], self._sync, stage["sizes"])
+        except Exception:
+            self._seg_dirty.pop(table, None)  # nepoznato šta je upisano -> sledeći put svi segmenti
+            raise
+        self._finish_stage(table, stage)
+        self._dirty.pop(table, None)
+
+    def _stage_table(self, table: str, sizes: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Pripremi fajlove baze za atomski upis: {"files": {putanja: tekst ili delovi},
+        "obsolete": [...], "data": putanje podataka (veličina baze), "sizes": {} koji
+        popunjava _atomic_write_many, "manifest": novi manifest ili None}.
+        Sadržaj se generiše lenjo, tek pri upisu — nema celog teksta tabele u memoriji.
+        """
+        size = self._segment_size_for(table)
+        if not size:
+            fmt = self._table_format(table)
+            paths = self._base_paths(table)
+            main = paths.pop(fmt)
+            obsolete = list(paths.values())
+            rows = self._live_rows(table)
+            if fmt == "jsonl":
+                data, idx = jsonl_store.render(rows, self._chunk_rows)
+                files = {main: data, self._get_jsonl_idx_path(table): idx}  # idx posle podataka
+            else:
+                obsolete.append(self._get_jsonl_idx_path(table))
+                if fmt == "columnar":
+                    files = {main: columnar.iter_encode(rows)}
+                else:
+                    files = {main: json_stream.iter_array(rows, self._chunk_rows)}
+            return {"files": files, "obsolete": [p for p in obsolete if os.path.exists(p)],
+                    "data": [main], "sizes": {} if sizes is None else sizes, "manifest": None}
+
+        old = self._manifests.get(table) or {"segment_size": size, "generation": 0, "segments": {}}
+        gen = old["generation"] + 1
+        dirty = self._seg_dirty.pop(table, None)  # None -> svi segmenti (prevođenje/greška)
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for r in self._live_rows(table):
+            key = self._seg_key(r.get("id"), size)
+            if dirty is None or key in dirty:
+                groups.setdefault(key, []).append(r)
+        segments = dict(old["segments"])
+        files: Dict[str, Union[str, Iterable[str]]] = {}
+        obsolete: List[str] = []
+        written: Dict[str, str] = {}  # putanja novog segmenta -> ključ
+        for key in (set(segments) | set(groups)) if dirty is None else dirty:
+            prev = segments.pop(key, None)
+            if prev is not None:
+                obsolete.append(self._get_segment_path(table, prev["file"]))
+            rows = groups.get(key)
+            if rows:
+                name = f"{key}.{gen}.json"
+                path = self._get_segment_path(table, name)
+                files[path] = json_stream.iter_array(rows, self._chunk_rows)
+                written[path] = key
+                segments[key] = {"file": name, "rows": len(rows), "bytes": 0}
+        manifest = {"segment_size": size, "generation": gen, "segments": segments}
+        sizes = {} if sizes is None else sizes
+
+        def manifest_text():
+            # generiše se posle segmenata, kada su njihove veličine poznate
+            for path, key in written.items():
+                segments[key]["bytes"] = sizes[path]
+            yield json_stream.encode(manifest)
+
+        # manifest ide poslednji: rename tek kada su svi segmenti upisani
+        files[self._get_manifest_path(table)] = manifest_text()
+        for path in [*self._base_paths(table).values(), self._get_jsonl_idx_path(table)]:
+            if os.path.exists(path):
+                obsolete.append(path)  # prevođenje iz jednog fajla
+        return {"files": files, "obsolete": obsolete, "manifest": manifest, "data": None, "sizes": sizes}
+
+    def _finish_stage(self, table: str, stage: Dict[str, Any]) -> None:
+        for path in stage["obsolete"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if stage["manifest"] is not None:
+            self._manifests[table] = stage["manifest"]
+            self._seg_dirty.setdefault(table, set())
+            self._base_bytes[table] = sum(e["bytes"] for e in stage["manifest"]["segments"].values())
+        else:
+            self._base_bytes[table] = sum(stage["sizes"][p] for p in stage["data"])
+        # baza sada sadrži sve promene -> žurnal više nije potreban
+        jpath = self._get_journal_path(table)
+        if os.path.exists(jpath):
+            os.remove(jpath)
+        self._journal_bytes[table] = 0
+        self._bump(table)
+
+    # -------- segmenti -------------------------------------------------------
+    @staticmethod
+    def _seg_key(id_value: Any, size: int) -> str:
+        if isinstance(id_value, int) and not isinstance(id_value, bool):
+            return str(id_value // size)
+        return "x"  # ne-celobrojni id-jevi idu u zaseban segment
+
+    @staticmethod
+    def _seg_order(key: str):
+        return (1, 0) if key == "x" else (0, int(key))
+
+    def _load_manifest(self, table: str) -> Optional[Dict[str, Any]]:
+        if table not in self._manifests:
+            path = self._get_manifest_path(table)
+            manifest = None
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            self._manifests[table] = manifest
+        return self._manifests[table]
+
+    def _segment_size_for(self, table: str) -> int:
+        manifest = self._load_manifest(table)
+        return int(manifest["segment_size"]) if manifest is not None else self._segment_size
+
+    def _read_segment(self, table: str, manifest: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+        entry = manifest["segments"].get(key)
+        if entry is None:
+            return []
+        with open(self._get_segment_path(table, entry["file"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _mark_segments(self, table: str, ops: List[Dict[str, Any]]) -> None:
+        dirty = self._seg_dirty.get(table)
+        size = self._segment_size_for(table)
+        if dirty is None or not size:
+            return
+        for op in ops:
+            rid = op["row"].get("id") if op["op"] == "put" else op.get("id")
+            dirty.add(self._seg_key(rid, size))
+
+    def _lazy_capable(self, table: str) -> bool:
+        """Neučitana tabela čiji se redovi mogu čitati pojedinačno (segmenti ili jsonl)."""
+        if table in self._cache:
+            return False
+        return self._load_manifest(table) is not None or self._base_format(table) == "jsonl"
+
+    def _partial_for(self, table: str) -> Dict[str, Any]:
+        partial = self._partial.get(table)
+        if partial is None:
+            partial = {"journal": self._journal_view(table)}
+            if self._load_manifest(table) is not None:
+                partial["segs"] = {}
+            else:
+                partial["jsonl"] = jsonl_store.LazyTable(
+                    self._get_jsonl_path(table), self._get_jsonl_idx_path(table)
+                )
+            self._partial[table] = partial
+        return partial
+
+    def _lazy_rows(self, table: str) -> Iterator[Dict[str, Any]]:
+        """Redovi neučitane jsonl tabele redom kao posle replay-a, dekodirani jedan po jedan."""
+        with self._load_lock:
+            partial = self._partial_for(table)
+        view = partial["journal"]
+        lazy = partial["jsonl"]
+        for rid, row in lazy.iter_rows():
+            if rid in view:
+                row = view[rid]
+                if row is None:
+                    continue
+            yield row
+        for rid, row in view.items():
+            if row is not None and not lazy.has(rid):
+                yield row
+
+    def _peek_pk(self, table: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        """Red po id-u iz neučitane tabele: jedan segment ili jedna jsonl linija + pogled na žurnal."""
+        with self._load_lock:
+            partial = self._partial_for(table)
+            try:
+                if id_value in partial["journal"]:
+                    return partial["journal"][id_value]
+            except TypeError:
+                return None
+            if "jsonl" in partial:
+                return partial["jsonl"].get(id_value)
+            manifest = self._load_manifest(table)
+            key = self._seg_key(id_value, int(manifest["segment_size"]))
+            seg = partial["segs"].get(key)
+            if seg is None:
+                rows = self._read_segment(table, manifest, key)
+                seg = partial["segs"][key] = (rows, {r.get("id"): r for r in rows})
+            return seg[1].get(id_value)
+
+    def _journal_view(self, table: str) -> Dict[Any, Optional[Dict[str, Any]]]:
+        """id -> poslednje stanje iz žurnala (None = obrisan)."""
+        view: Dict[Any, Optional[Dict[str, Any]]] = {}
+        jpath = self._get_journal_path(table)
+        if not os.path.exists(jpath):
+            return view
+        with open(jpath, "rb") as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                if entry.get("op") == "put":
+                    view[entry["row"].get("id")] = entry["row"]
+                elif entry.get("op") == "del":
+                    view[entry.get("id")] = None
+        return view
+
+    # -------- žurnal ---------------------------------------------------------
+    def _replay_journal(self, table: str, data: List[Dict[str, Any]],
+                        touched: Optional[set] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Primeni <table>.journal preko baznih redova.
+        Op-ovi: {"op": "put", "row": {...}} (insert ili zamena po id) i {"op": "del", "id": X}.
+        Vraća (redovi, torn) — torn=True ako je poslednja linija nepotpuna.
+        Ako je dat `touched`, u njega idu id-jevi koje žurnal menja.
+        """
+        jpath = self._get_journal_path(table)
+        self._journal_bytes[table] = 0
+        if not os.path.exists(jpath):
+            return data, False
+
+        pos = {r.get("id"): i for i, r in enumerate(data)}
+        slots: List[Optional[Dict[str, Any]]] = list(data)
+        torn = False
+        with open(jpath, "rb") as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    torn = True
+                    break
+                op = entry.get("op")
+                if touched is not None:
+                    touched.add(entry["row"].get("id") if op == "put" else entry.get("id"))
+                if op == "put":
+                    row = entry["row"]
+                    i = pos.get(row.get("id"))
+                    if i is None:
+                        pos[row.get("id")] = len(slots)
+                        slots.append(row)
+                    else:
+                        slots[i] = row
+                elif op == "del":
+                    i = pos.pop(entry.get("id"), None)
+                    if i is not None:
+                        slots[i] = None
+        self._journal_bytes[table] = os.path.getsize(jpath)
+        return [r for r in slots if r is not None], torn
+
+    def _journal(self, table: str, ops: List[Dict[str, Any]]) -> None:
+        """Zabeleži op-ove: u transakciji se baferuju do commit-a, inače odmah idu na disk."""
+        if not ops:
+            return
+        self._dirty[table] = self._dirty.get(table, 0) + len(ops)
+        self._mark_segments(table, ops)
+        tx = self._tx()
+        if tx is not None:
+            tx.pending.setdefault(table, []).extend(ops)
+            return
+        self._emit({table: ops})
+
+    def _emit(self, batch: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Završen (auto)commit: odmah na disk, ili u bafer za pozadinski flush (batched)."""
+        if self._durability != "batched" or self._flusher is None:
+            self._flush_group(batch)
+            return
+        with self._batch_cond:
+            for t, ops in batch.items():
+                if not ops:
+                    continue
+                if not self._batch_ops:
+                    self._batch_since = time.monotonic()
+                self._batch.setdefault(t, []).extend(ops)
+                self._batch_ops += len(ops)
+            self._signal.pending = True
+            self._batch_cond.notify()
+
+    def _flush_group(self, batch: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Upiši op-ove više tabela odjednom (grupni commit).
+        Sa žurnalom: linije u sve žurnale, pa fsync-ovi; bez žurnala: atomska
+        zamena svih baznih fajlova u jednom krugu. Serijalizacija ide pod read
+        lock-om tabele (pozadinski flush ne drži write lock).
+        """
+        batch = {t: ops for t, ops in batch.items() if ops}
+        if not batch:
+            return
+        if not self._journal_enabled:
+            stages = {}
+            files: Dict[str, Union[str, Iterable[str]]] = {}
+            sizes: Dict[str, int] = {}
+            # redovi se enkodiraju tek pri upisu -> read lock-ovi do kraja upisa
+            with ExitStack() as held:
+                for t in batch:
+                    held.enter_context(self._lock_for(t).read_locked(self._lock_timeout, t))
+                    stages[t] = self._stage_table(t, sizes)
+                    files.update(stages[t]["files"])
+                try:
+                    _atomic_write_many(files, self._sync, sizes)
+                except Exception:
+                    for t in stages:
+                        self._seg_dirty.pop(t, None)
+                    raise
+            for t, st in stages.items():
+                self._finish_stage(t, st)
+                self._clean(t, len(batch[t]))
+            return
+        paths = {t: self._get_journal_path(t) for t in batch}
+        lines: Dict[str, List[str]] = {}
+        for t, ops in batch.items():
+            with self._lock_for(t).read_locked(self._lock_timeout, t):
+                lines[paths[t]] = [json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n" for op in ops]
+        written = _append_many(lines, self._sync)
+        for t in batch:
+            self._journal_bytes[t] = self._journal_bytes.get(t, 0) + written[paths[t]]
+            self._bump(t)
+            self._clean(t, len(batch[t]))
+            with self._lock_for(t).read_locked(self._lock_timeout, t):
+                self._maybe_compact(t)
+
+    def _clean(self, table: str, n: int) -> None:
+        left = self._dirty.get(table, 0) - n
+        if left > 0:
+            self._dirty[table] = left
+        else:
+            self._dirty.pop(table, None)
+
+    # -------- trajnost (batched) ----------------------------------------------
+    def flush(self) -> None:
+        """
+        Upiši sve baferovane (batched) izmene na disk, sa fsync-om.
+        Pozvan iz transakcije preskače tabele koje ona drži za pisanje: kompakcija (ili upis
+        bez žurnala) serijalizuje tabelu iz memorije, zajedno sa nepotvrđenim redovima koje
+        rollback više ne bi mogao da skine. Te tabele idu na disk posle commit-a.
+        """
+        tx = self._tx()
+        held = set(tx.locked) if tx is not None else set()
+        with self._flush_lock:
+            with self._batch_cond:
+                batch = {t: ops for t, ops in self._batch.items() if t not in held}
+                self._batch = {t: ops for t, ops in self._batch.items() if t in held}
+                self._batch_ops = sum(len(o) for o in self._batch.values())
+            if not batch:
+                return
+            try:
+                self._flush_group(batch)
+            except Exception:
+                # vrati u bafer (ispred novijih op-ova); ponovljeni put/del su idempotentni
+                with self._batch_cond:
+                    for t, ops in batch.items():
+                        self._batch[t] = ops + self._batch.get(t, [])
+                    self._batch_ops += sum(len(o) for o in batch.values())
+                raise
+
+    def close(self) -> None:
+        """Zaustavi pozadinski flush i upiši sve što je ostalo u baferu."""
+        if self._flusher is not None:
+            with self._batch_cond:
+                self._signal.closing = True
+                self._batch_cond.notify_all()
+            if self._flusher is not threading.current_thread():
+                self._flusher.join()
+            self._flusher = None
+        self.flush()
+        with self._load_lock:
+            for table in list(self._partial):
+                self._drop_partial(table)
+
+    def __del__(self):
+        try:
+            if self._flusher is not None:
+                self.close()  # drajver pokupljen bez close() -> ne gubi baferovane izmene
+        except Exception:
+            pass
+
+    def dirty_tables(self) -> Dict[str, int]:
+        """Tabele sa izmenama koje još nisu trajno upisane -> broj izmenjenih redova."""
+        return dict(self._dirty)
+
+    def _maybe_compact(self, table: str) -> None:
+        jb = self._journal_bytes.get(table, 0)
+        if jb <= 0:
+            return
+        # mali fajlovi: ne kompaktuj na svaki upis zbog ratio praga
+        base = max(self._base_bytes.get(table, 0), 64 * 1024)
+        if jb >= self._journal_max_bytes or jb >= self._journal_ratio * base:
+            self._compact(table)
+
+    def _compact(self, table: str) -> None:
+        """Prepiši bazni .json iz keša i obriši žurnal."""
+        if table in self._cache:
+            self._save_table(table)
+
+    @staticmethod
+    def _op_put(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {"op": "put", "row": row}
+
+    @staticmethod
+    def _op_del(id_value: Any) -> Dict[str, Any]:
+        return {"op": "del", "id": id_value}
 
     def _generate_id(self, table: str) -> int:
         last = self._last_id.get(table, 0) + 1
         self._last_id[table] = last
         return last
 
-    def _add_to_index(self, table: str, record: Dict[str, Any], fields: List[str]):
+    def _index_fields(self, table: str) -> List[str]:
+        return list(self._load_meta(table)["indexes"])
+
+    # -------- pk mapa (id -> pozicija) ---------------------------------------
+    def _rebuild_pk(self, table: str) -> None:
+        self._pk[table] = {r.get("id"): i for i, r in enumerate(self._cache.get(table, [])) if r is not None}
+
+    def _pk_get(self, table: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        try:
+            pos = self._pk.get(table, {}).get(id_value)
+        except TypeError:
+            return None
+        return None if pos is None else self._cache[table][pos]
+
+    # -------- tombstone-i (None na mestu obrisanog reda) ------------------------
+    def _scan(self, table: str, rows: List[Optional[Dict[str, Any]]]) -> Iterable[Dict[str, Any]]:
+        """Živi redovi za sken (C filter preskače None; red uvek ima bar "id", pa nije prazan)."""
+        return filter(None, rows) if self._tombs.get(table) else rows
+
+    def _live_rows(self, table: str) -> List[Dict[str, Any]]:
+        """
+        Lista živih redova za upis baze: sažimanje u mestu kada ga smemo uraditi
+        (držimo write lock, a undo log ne pamti pozicije), inače kopija bez None.
+        """
+        data = self._cache[table]
+        if not self._tombs.get(table):
+            return data
+        tx = self._tx()
+        if self._lock_for(table).held_by_me() and not (tx is not None and tx.undo):
+            self._compact_rows(table)
+            return data
+        return [r for r in data if r is not None]
+
+    def _tombstone(self, table: str, positions: List[int]) -> None:
+        """Obriši redove sa pozicija u O(1) po redu: None na mesto reda (poslednji se skida)."""
+        data = self._cache[table]
+        pk = self._pk[table]
+        n = 0
+        for pos in sorted(positions, reverse=True):
+            pk.pop(data[pos].get("id"), None)
+            if pos == len(data) - 1:
+                data.pop()
+            else:
+                data[pos] = None
+                n += 1
+        if n:
+            self._tombs[table] = self._tombs.get(table, 0) + n
+
+    def _pk_restore(self, table: str, removed: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Vrati obrisane redove na stare pozicije (rastuće) — inverz _tombstone."""
+        data = self._cache[table]
+        pk = self._pk[table]
+        for pos, row in removed:
+            if pos < len(data):
+                data[pos] = row  # tombstone; pozicije se u transakciji ne pomeraju
+                self._tombs[table] -= 1
+            else:
+                data.append(row)  # red je bio poslednji i skinut je
+            pk[row.get("id")] = pos
+            self._add_to_index(table, row)
+        if not self._tombs.get(table):
+            self._tombs.pop(table, None)
+
+    def _compact_rows(self, table: str) -> None:
+        data = self._cache[table]
+        data[:] = [r for r in data if r is not None]  # u mestu: pozivaoci drže referencu
+        self._tombs.pop(table, None)
+        self._rebuild_pk(table)
+
+    def _maybe_compact_rows(self, table: str) -> None:
+        n = self._tombs.get(table, 0)
+        if n and n >= max(self._tomb_min, self._tomb_ratio * len(self._cache.get(table, ()))):
+            self._compact_rows(table)
+
+    def _rebuild_indexes(self, table: str) -> None:
+        self._rebuild_pk(table)
+        fields = self._index_fields(table)
+        self._indexes[table] = {f: {} for f in fields}
+        rows = self._cache.get(table, [])
+        for rec in self._scan(table, rows):
+            self._add_to_index(table, rec, fields, sorted_too=False)
+        self._sorted[table] = {}
+        for f in self._load_meta(table)["sorted_indexes"]:
+            si = SortedIndex(f)
+            si.build(self._scan(table, rows))
+            self._sorted[table][f] = si
+
+    def _add_to_index(self, table: str, record: Dict[str, Any], fields: Optional[List[str]] = None,
+                      sorted_too: bool = True):
+        if sorted_too:
+            for si in self._sorted.get(table, {}).values():
+                si.add(record)
         idx_tbl = self._indexes.setdefault(table, {})
-        for f in fields:
+        for f in (fields if fields is not None else self._index_fields(table)):
+            idx = idx_tbl.setdefault(f, {})
             val = record.get(f)
             if val is None:
                 continue
-            idx = idx_tbl.setdefault(f, {})
-            s = idx.setdefault(val, set())
-            s.add(record["id"])
+            try:
+                bucket = idx.setdefault(val, {})
+            except TypeError:
+                continue  # nehešabilna vrednost (list/dict) — ne može biti jednaka hešabilnom upitu
+            bucket[record.get("id")] = record
 
-    def _drop_from_index(self, table: str, record: Dict[str, Any]):
+    def _drop_from_index(self, table: str, record: Dict[str, Any], fields: Optional[List[str]] = None,
+                         sorted_too: bool = True):
+        if sorted_too:
+            for si in self._sorted.get(table, {}).values():
+                si.remove(record)
         idx_tbl = self._indexes.get(table, {})
-        for f, buckets in idx_tbl.items():
+        for f in (fields if fields is not None else list(idx_tbl)):
+            buckets = idx_tbl.get(f)
+            if buckets is None:
+                continue
             val = record.get(f)
-            if val in buckets:
-                buckets[val].discard(record["id"])
-                if not buckets[val]:
+            try:
+                bucket = buckets.get(val)
+            except TypeError:
+                continue
+            if bucket is not None:
+                bucket.pop(record.get("id"), None)
+                if not bucket:
                     buckets.pop(val, None)
 
+    def _patch_row(self, table: str, record: Dict[str, Any], patch: Dict[str, Any]) -> None:
+        """
+        record.update(patch) uz održavanje samo onih indeksa (hash i sorted) čije se polje
+        stvarno promenilo — update nepovezanog polja ne dira nijedan indeks.
+        """
+        changed = [f for f, v in patch.items() if record.get(f) != v]
+        if "id" in changed:  # promena ključa: svi ulazi su vezani za id, pk mapa se seli na novi id
+            pk = self._pk[table]
+            self._drop_from_index(table, record)
+            pos = pk.pop(record.get("id"))
+            record.update(patch)
+            rid = record["id"]
+            pk[rid] = pos
+            self._add_to_index(table, record)
+            if isinstance(rid, int) and rid > self._last_id.get(table, 0):
+                self._last_id[table] = rid
+            return
+        sorted_tbl = self._sorted.get(table, {})
+        touched = [sorted_tbl[f] for f in changed if f in sorted_tbl]
+        hashed = [f for f in changed if f in self._indexes.get(table, {})]
+        for si in touched:
+            si.remove(record)
+        if hashed:
+            self._drop_from_index(table, record, hashed, sorted_too=False)
+        record.update(patch)
+        for si in touched:
+            si.add(record)
+        if hashed:
+            self._add_to_index(table, record, hashed, sorted_too=False)
+
+    # -------- sekundarni indeksi (javni API) ----------------------------------
+    def create_index(self, table: str, field: str, kind: str = "hash") -> bool:
+        """
+        Deklariši i izgradi indeks nad poljem. Vraća True ako je indeks nov.
+        kind: "hash" ('==', 'in') ili "sorted" (range operatori i ORDER BY).
+        """
+        if kind not in ("hash", "sorted"):
+            raise ValueError(f"Nepoznat tip indeksa: {kind}")
+        with self._writing(table) as rows:
+            meta = self._load_meta(table)
+            key = "indexes" if kind == "hash" else "sorted_indexes"
+            if (kind == "hash" and field == "id") or field in meta[key]:
+                return False
+            meta[key].append(field)
+            self._save_meta(table)
+            if kind == "hash":
+                self._indexes.setdefault(table, {})[field] = {}
+                for rec in self._scan(table, rows):
+                    self._add_to_index(table, rec, [field], sorted_too=False)
+            else:
+                si = SortedIndex(field)
+                si.build(self._scan(table, rows))
+                self._sorted.setdefault(table, {})[field] = si
+            return True
+
+    def drop_index(self, table: str, field: str, kind: str = "hash") -> bool:
+        with self._writing(table):
+            meta = self._load_meta(table)
+            key = "indexes" if kind == "hash" else "sorted_indexes"
+            if field not in meta.get(key, []):
+                return False
+            meta[key].remove(field)
+            self._save_meta(table)
+            if kind == "hash":
+                self._indexes.get(table, {}).pop(field, None)
+            else:
+                self._sorted.get(table, {}).pop(field, None)
+            return True
+
+    def set_format(self, table: str, fmt: Optional[str]) -> None:
+        """
+        Format baznog fajla tabele ("json" | "jsonl" | "columnar"; None = po .env).
+        Pamti se u <table>.meta.json; tabela se odmah prepisuje u novom formatu.
+        Nije dozvoljeno u transakciji: prepis bi upisao nepotvrđene redove koje rollback
+        više ne može da vrati (RuntimeError).
+        """
+        if fmt is not None and fmt not in TABLE_FORMATS:
+            raise ValueError(f"Nepoznat format tabele: {fmt}")
+        if self._tx() is not None:
+            raise RuntimeError("set_format() nije dozvoljen unutar transakcije")
+        with self._writing(table):
+            meta = self._load_meta(table)
+            if fmt is None:
+                meta.pop("format", None)
+            else:
+                meta["format"] = fmt
+            self._save_meta(table)
+            self._save_table(table)
+
+    def list_indexes(self, table: str, kind: str = "hash") -> List[str]:
+        meta = self._load_meta(table)
+        return list(meta["indexes"] if kind == "hash" else meta["sorted_indexes"])
+
     # -------- transactions ---------------------------------------------------
     @contextmanager
     def transaction(self):
-        with _LOCK:
-            self._tx_depth += 1
-            if self._tx_depth == 1:
-                self._snapshot = {t: [r.copy() for r in data] for t, data in self._cache.items()}
-                self._snapshot_last = self._last_id.copy()
-            try:
-                yield
-                self._tx_depth -= 1
-                if self._tx_depth == 0:
-                    for t in list(self._cache.keys()):
-                        self._save_table(t)
-                    self._snapshot = None
-                    self._snapshot_last = None
-            except Exception:
-                self._tx_depth -= 1
-                self._cache = {t: [r.copy() for r in data] for t, data in self._snapshot.items()}
-                self._last_id = self._snapshot_last.copy()
-                self._indexes = {}
-                for t, data in self._cache.items():
-                    for rec in data:
-                        self._add_to_index(t, rec, ["id"])
-                self._snapshot = None
-                self._snapshot_last = None
-                raise
+        """
+        Transakcija tekuće niti (ugnježdene se spajaju u spoljnu).
+        Commit upisuje samo tabele koje je transakcija zaključala za pisanje;
+        izuzetak odmotava undo log i prosleđuje grešku dalje.
+        """
+        tx = getattr(self._local, "tx", None)
+        if tx is None:
+            tx = self._local.tx = _TxState()
+        tx.depth += 1
+        try:
+            yield
+            if tx.depth == 1:
+                self._commit(tx)
+        except Exception:
+            self._rollback(tx)
+            raise
+        finally:
+            tx.depth -= 1
+            if tx.depth == 0:
+                self._release(tx)
+                if self._cache_max_bytes:
+                    with self._load_lock:
+                        self._evict_over_budget()
+
+    def _commit(self, tx: _TxState) -> None:
+        pending, tx.pending = tx.pending, {}
+        # samo dirty tabele; čitane ili zaključane bez izmena se ne diraju
+        self._emit({t: pending[t] for t in tx.locked if pending.get(t)})
+        tx.undo = []
+        tx.last_ids = {}
+
+    def _rollback(self, tx: _TxState) -> None:
+        """Odmotaj undo log unazad; indeksi se održavaju red po red (bez rebuild-a)."""
+        undo, tx.undo = tx.undo, []
+        for table, kind, row, extra in reversed(undo):
+            if kind == "ins":
+                self._drop_from_index(table, row)
+                self._tombstone(table, [self._pk[table][row.get("id")]])
+            elif kind == "upd":
+                self._drop_from_index(table, row)
+                if row.get("id") != extra.get("id"):  # update je menjao id -> vrati pk ulaz
+                    pk = self._pk[table]
+                    pk[extra.get("id")] = pk.pop(row.get("id"))
+                row.clear()
+                row.update(extra)
+                self._add_to_index(table, row)
+            elif kind == "del":
+                self._pk_restore(table, extra)
+        for t, last in tx.last_ids.items():
+            self._last_id[t] = last
+        # skini samo op-ove ove transakcije; ranije batched izmene i dalje čekaju flush
+        with self._batch_cond:
+            for t, ops in tx.pending.items():
+                self._clean(t, len(ops))
+                queued = len(self._batch.get(t) or ())
+                if queued and self._dirty.get(t, 0) < queued:
+                    self._dirty[t] = queued
+        tx.last_ids = {}
+        tx.pending = {}
+
+    def _release(self, tx: _TxState) -> None:
+        locked, tx.locked = tx.locked, []
+        tx.pending = {}
+        tx.undo = []
+        tx.last_ids = {}
+        for t in reversed(locked):
+            if t in self._cache:
+                self._maybe_compact_rows(t)  # undo log je prazan -> pozicije smeju da se pomere
+            if self._multiprocess:
+                self._file_lock(t).release(True)
+            self._lock_for(t).release_write()
 
     # -------- where normalization -------------------------------------------
     @staticmethod
@@ -198,126 +1377,314 @@ class JSONDriver(BaseDBDriver):
         return []
 
     # -------- filtering/ordering/limit --------------------------------------
-    def _apply_where(self, data: List[Dict[str, Any]], where_norm: List[Tuple[str, str, Any]], table: str) -> List[Dict[str, Any]]:
+    def _clause_selectivity(self, table: str, clause: Tuple[str, str, Any]) -> float:
+        """Procena udela redova koji prolaze uslov (0..1), iz indeksa kad postoje."""
+        field, op, value = clause
+        n = max(len(self._cache.get(table, [])), 1)
+        try:
+            if field == "id" and op == "==":
+                return 1.0 / n
+            buckets = self._indexes.get(table, {}).get(field)
+            if buckets is not None and op in ("==", "in"):
+                vals = [value] if op == "==" else list(value or [])
+                return min(1.0, sum(len(buckets.get(v, ())) for v in vals) / n)
+            si = self._sorted.get(table, {}).get(field)
+            if si is not None and si.valid and op in (">", ">=", "<", "<=") and value is not None:
+                if op in (">", ">="):
+                    return si.count_range(value, op == ">=", None) / n
+                return si.count_range(None, True, value, op == "<=") / n
+        except TypeError:
+            pass
+        if op == "in":
+            return min(1.0, OP_SELECTIVITY["=="] * len(value or []))
+        return OP_SELECTIVITY.get(op, 1.0)
+
+    def _row_predicate(self, table: str, where_norm: List[Tuple[str, str, Any]]) -> Callable[[Dict[str, Any]], bool]:
+        """
+        Jedna kompajlirana funkcija za ceo where (jedan prolaz, jedan d.get po uslovu).
+        Uslovi se poređaju po cena / (1 - selektivnost) da najjeftiniji "ubica" ide prvi;
+        kompajlirani oblik upita se kešira (predicates._compile_shape).
+        """
+        if len(where_norm) > 1:
+            def rank(clause):
+                sel = self._clause_selectivity(table, clause)
+                return OP_COST.get(clause[1], 1) / max(1.0 - sel, 1e-9)
+            where_norm = sorted(where_norm, key=rank)
+        return compile_where(where_norm)
+
+    def _filter_rows(self, rows: List[Dict[str, Any]], where_norm: List[Tuple[str, str, Any]],
+                     table: str) -> Iterable[Dict[str, Any]]:
+        """Lenji filter: kandidati iz indeksa (ako ih ima) ili sami redovi, bez kopiranja."""
         if not where_norm:
-            return data
+            return self._scan(table, rows)
+        # indeks brzi put ('==', 'in', range): kreni od najmanjeg kandidat skupa
+        candidates = self._index_candidates(table, where_norm)
+        source = candidates if candidates is not None else self._scan(table, rows)
+        return filter(self._row_predicate(table, where_norm), source)
 
-        # indeks brzi put (samo za '==')
+    def _apply_where(self, data: List[Dict[str, Any]], where_norm: List[Tuple[str, str, Any]], table: str) -> List[Dict[str, Any]]:
+        return list(self._filter_rows(data, where_norm, table))
+
+    def _index_candidates(self, table: str, where_norm: List[Tuple[str, str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Redovi iz najselektivnijeg hash indeksa za '=='/'in' filtere, ili None ako nema indeksa."""
         idx_tbl = self._indexes.get(table, {})
-        eq_filters = [(f, v) for (f, op, v) in where_norm if op == "==" and f in idx_tbl]
-        if eq_filters:
-            sets = []
-            for f, v in eq_filters:
-                ids = idx_tbl[f].get(v, set())
-                sets.append(ids)
-            if sets:
-                candidate_ids = set.intersection(*sets) if len(sets) > 1 else sets[0]
-                data = [d for d in data if d.get("id") in candidate_ids]
+        best: Optional[List[Dict[str, Any]]] = None
+        for (field, op, value) in where_norm:
+            if field == "id" and op in ("==", "in"):
+                vals = [value] if op == "==" else list(value or [])
+                found: Dict[int, Dict[str, Any]] = {}
+                for v in vals:
+                    r = self._pk_get(table, v)
+                    if r is not None:
+                        found[id(r)] = r
+                rows = list(found.values())
+                if best is None or len(rows) < len(best):
+                    best = rows
+                continue
+            buckets = idx_tbl.get(field)
+            if buckets is None:
+                continue
+            try:
+                if op == "==":
+                    if value is None:
+                        continue  # None vrednosti se ne indeksiraju
+                    rows = list(buckets.get(value, {}).values())
+                elif op == "in":
+                    values = list(value or [])
+                    if any(v is None for v in values):
+                        continue  # None vrednosti se ne indeksiraju -> kandidati iz drugog uslova ili sken
+                    seen: Dict[Any, Dict[str, Any]] = {}
+                    for v in values:
+                        seen.update(buckets.get(v, {}))
+                    rows = list(seen.values())
+                else:
+                    continue
+            except TypeError:
+                continue  # nehešabilna vrednost upita -> sken
+            if best is None or len(rows) < len(best):
+                best = rows
 
+        for field, (lo, lo_incl, hi, hi_incl) in self._range_bounds(table, where_norm).items():
+            try:
+                rows = self._sorted[table][field].range(lo, lo_incl, hi, hi_incl)
+            except TypeError:
+                continue  # tip upita se ne poredi sa tipom indeksa -> sken
+            if best is None or len(rows) < len(best):
+                best = rows
+        return best
+
+    def _range_bounds(self, table: str, where_norm: List[Tuple[str, str, Any]]) -> Dict[str, List[Any]]:
+        """Sortirani indeksi: spoji granice po polju (npr. age >= 18 i age < 30) u [lo, lo_incl, hi, hi_incl]."""
+        bounds: Dict[str, List[Any]] = {}
         for (field, op, value) in where_norm:
-            if op == "==":
-                data = [d for d in data if d.get(field) == value]
-            elif op == "!=":
-                data = [d for d in data if d.get(field) != value]
-            elif op == "in":
-                data = [d for d in data if d.get(field) in (value or [])]
-            elif op == "like":
-                s = str(value).lower()
-                data = [d for d in data if s in str(d.get(field, "")).lower()]
-            elif op == ">":
-                data = [d for d in data if d.get(field) is not None and d.get(field) > value]
-            elif op == "<":
-                data = [d for d in data if d.get(field) is not None and d.get(field) < value]
-            elif op == ">=":
-                data = [d for d in data if d.get(field) is not None and d.get(field) >= value]
-            elif op == "<=":
-                data = [d for d in data if d.get(field) is not None and d.get(field) <= value]
-        return data
+            si = self._sorted.get(table, {}).get(field)
+            if si is None or not si.valid or op not in (">", ">=", "<", "<=") or value is None:
+                continue
+            b = bounds.setdefault(field, [None, True, None, True])
+            try:
+                if op in (">", ">="):
+                    incl = op == ">="
+                    if b[0] is None or value > b[0] or (value == b[0] and not incl):
+                        b[0], b[1] = value, incl
+                else:
+                    incl = op == "<="
+                    if b[2] is None or value < b[2] or (value == b[2] and not incl):
+                        b[2], b[3] = value, incl
+            except TypeError:
+                bounds.pop(field, None)
+        return bounds
+
+    def _index_count(self, table: str, where_norm: List[Tuple[str, str, Any]]) -> Optional[int]:
+        """
+        Broj pogodaka samo iz indeksa, bez dodira redova; None ako upit nije pokriven:
+        - jedan '=='/'in' uslov nad id-em ili hash indeksom -> zbir veličina bucket-a
+        - samo range uslovi nad jednim sortiranim indeksom -> bisect (count_range)
+        """
+        if len(where_norm) == 1 and where_norm[0][1] in ("==", "in"):
+            field, op, value = where_norm[0]
+            try:
+                values = {value} if op == "==" else set(value or [])
+            except TypeError:
+                return None
+            if field == "id":
+                return sum(1 for v in values if self._pk_get(table, v) is not None)
+            buckets = self._indexes.get(table, {}).get(field)
+            if buckets is None or None in values:
+                return None  # None vrednosti se ne indeksiraju
+            return sum(len(buckets.get(v, ())) for v in values)
+        fields = {f for (f, _, _) in where_norm}
+        if len(fields) != 1 or any(op not in (">", ">=", "<", "<=") or v is None for (_, op, v) in where_norm):
+            return None
+        bounds = self._range_bounds(table, where_norm)
+        if not bounds:
+            return None
+        field, (lo, lo_incl, hi, hi_incl) = next(iter(bounds.items()))
+        try:
+            return self._sorted[table][field].count_range(lo, lo_incl, hi, hi_incl)
+        except TypeError:
+            return None
 
     @staticmethod
-    def _apply_order_limit_offset(data: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
-        # order: podržavamo i stari "order_by": "col desc" i novi "order": [("col","desc")]
+    def _order_keys(spec: Dict[str, Any]) -> List[Tuple[str, bool]]:
+        """[(field, desc)] iz "order": [("col","desc")] ili starog "order_by": "col desc"."""
         if "order" in spec and isinstance(spec["order"], list) and spec["order"]:
-            for (field, direction) in spec["order"]:
-                data.sort(key=lambda x: x.get(field), reverse=(str(direction).lower() == "desc"))
-        elif "order_by" in spec and isinstance(spec["order_by"], str):
+            return [(field, str(direction).lower() == "desc") for (field, direction) in spec["order"]]
+        if "order_by" in spec and isinstance(spec["order_by"], str) and spec["order_by"].strip():
             parts = spec["order_by"].strip().split()
-            field = parts[0]
-            desc = len(parts) > 1 and parts[1].lower() == "desc"
-            data.sort(key=lambda x: x.get(field), reverse=desc)
-
-        off = spec.get("offset", 0) or 0
-        lim = spec.get("limit", None)
-        if lim is not None:
-            data = data[off: off + lim]
+            return [(parts[0], len(parts) > 1 and parts[1].lower() == "desc")]
+        return []
+
+    @staticmethod
+    def _sort_rows(data: List[Dict[str, Any]], keys: List[Tuple[str, bool]]) -> List[Dict[str, Any]]:
+        """Jedan prolaz sa složenim ključem (vidi system/db/ordering.py)."""
+        return ordering.sort_rows(data, keys)
+
+    def _iter_query(self, table: str, query: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Generator pipeline: izvor -> filter -> order -> offset/limit -> select.
+        - izvor je keširana lista tabele, kandidat skup iz indeksa ili sortirani indeks
+          (ORDER BY jedno indeksirano polje) — bez kopiranja cele tabele
+        - filter je jedan prolaz (jedan predikat po redu), lenjo
+        - bez order-a (ili sa order-om iz indeksa) limit/first prekida čitanje čim ima dovoljno redova
+        - order bez indeksa mora da materijalizuje samo filtrirane redove radi sortiranja;
+          sa malim limit + offset (<= ordering.TOPK_MAX) ide heap top-k, O(n log k)
+        """
+        where_norm = self._normalize_where(query.get("where"))
+        keys = self._order_keys(query)
+        off = query.get("offset", 0) or 0
+        lim = 1 if query.get("first") else query.get("limit", None)
+        if lim is not None and not keys and self._lazy_capable(table) and self._load_manifest(table) is None:
+            # neučitana jsonl tabela: dekodiraj redom samo dok limit ne bude pun
+            source: Iterable[Dict[str, Any]] = self._lazy_rows(table)
+            candidates = rows = None
         else:
-            data = data[off:]
+            rows = self._ensure_loaded(table)
+            candidates = self._index_candidates(table, where_norm) if where_norm else None
+            source = self._scan(table, rows) if candidates is None else candidates
+        presorted = False
+        if rows is not None and candidates is None and len(keys) == 1:
+            # mali kandidat skup iz drugog indeksa je jeftinije sortirati direktno
+            si = self._sorted.get(table, {}).get(keys[0][0])
+            if si is not None and si.valid:
+                source = si.ordered(keys[0][1])
+                presorted = True
+
+        stream: Iterator[Dict[str, Any]] = (
+            filter(self._row_predicate(table, where_norm), source) if where_norm else iter(source)
+        )
+        if keys and not presorted:
+            if lim is not None and off + lim <= ordering.TOPK_MAX:
+                stream = iter(ordering.top_rows(stream, keys, off + lim))
+            else:
+                stream = iter(self._sort_rows(list(stream), keys))
+
+        if off or lim is not None:
+            stream = islice(stream, off, None if lim is None else off + lim)
 
         # select projection (stari: select_fields u read_spec; novi: select: [...])
-        select = spec.get("select")
+        select = query.get("select")
         if select:
-            data = [{k: r.get(k) for k in select} for r in data]
-        return data
+            stream = ({k: r.get(k) for k in select} for r in stream)
+        return stream
 
     # -------- CRUD -----------------------------------------------------------
     def create(self, table: str, record: Dict[str, Any]) -> int:
-        with _LOCK:
-            data = self._ensure_loaded(table)
+        with self._writing(table) as data:
             if "id" not in record or record["id"] is None:
                 record["id"] = self._generate_id(table)
+            self._pk.setdefault(table, {})[record["id"]] = len(data)
             data.append(record)
-            self._add_to_index(table, record, ["id"])
-            if self._tx_depth == 0:
-                self._save_table(table)
+            self._add_to_index(table, record)
+            tx = self._tx()
+            if tx is not None:
+                tx.undo.append((table, "ins", record, None))
+            self._journal(table, [self._op_put(record)])
             return record["id"]
 
     def read(self, table: str, query: Dict[str, Any]) -> List[Dict[str, Any]]:
-        with _LOCK:
-            data = list(self._ensure_loaded(table))
-            # normalizuj where bez obzira na stil
-            where_norm = self._normalize_where(query.get("where"))
-            data = self._apply_where(data, where_norm, table)
+        with self._reading(table, load=False):
+            stream = self._iter_query(table, query or {})
             # old flag: first
             if query.get("first"):
-                data = self._apply_order_limit_offset(data, {"limit": 1})
-                return data[0] if data else None
-            # order/limit/offset/select
-            data = self._apply_order_limit_offset(data, query)
-            return data
+                return next(stream, None)
+            return list(stream)
 
-    def update(self, table: str, spec: Dict[str, Any], patch: Dict[str, Any]) -> int:
-        with _LOCK:
-            data = self._ensure_loaded(table)
+    def iter(self, table: str, query: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Strimuj rezultate upita bez materijalizacije (isti query dict kao read()).
+        Izvor se bira pod lock-om, a redovi se vraćaju lenjo — iteracija je "slabo
+        konzistentna": istovremeni upisi mogu (ali ne moraju) biti vidljivi.
+        """
+        query = dict(query or {})
+        query.pop("first", None)
+        with self._reading(table, load=False):
+            stream = self._iter_query(table, query)
+        yield from stream
+
+    def _target_rows(self, table: str, spec: Any) -> List[Dict[str, Any]]:
+        """Redovi za update/delete: spec dict ide kroz read_spec, skalarni id direktno kroz pk mapu."""
+        if isinstance(spec, dict):
             targets = self.read_spec(table, spec)  # koristi isti normalization put
-            changed = 0
-            target_ids = {t["id"] for t in (targets or [])}
-            for i, rec in enumerate(data):
-                if rec.get("id") in target_ids:
-                    self._drop_from_index(table, rec)
-                    rec.update(patch)
-                    self._add_to_index(table, rec, ["id"])
-                    changed += 1
-            if changed and self._tx_depth == 0:
-                self._save_table(table)
-            return changed
-
-    def delete(self, table: str, spec: Dict[str, Any]) -> int:
-        with _LOCK:
-            data = self._ensure_loaded(table)
-            targets = self.read_spec(table, spec)
-            target_ids = {t["id"] for t in (targets or [])}
-            kept = []
-            deleted = 0
-            for rec in data:
-                if rec.get("id") in target_ids:
-                    self._drop_from_index(table, rec)
-                    deleted += 1
-                else:
-                    kept.append(rec)
-            self._cache[table] = kept
-            if deleted and self._tx_depth == 0:
-                self._save_table(table)
-            return deleted
+            if isinstance(targets, dict):
+                return [targets]
+            return list(targets or [])
+        row = self._pk_get(table, spec)
+        return [row] if row is not None else []
+
+    def update(self, table: str, spec: Union[Dict[str, Any], Any], patch: Dict[str, Any]) -> Union[int, bool]:
+        with self._writing(table):
+            tx = self._tx()
+            ops = []
+            targets = self._target_rows(table, spec)
+            if "id" in patch:
+                self._check_pk_change(table, targets, patch["id"])
+            for rec in targets:
+                if tx is not None:
+                    tx.undo.append((table, "upd", rec, rec.copy()))
+                old_id = rec.get("id")
+                self._patch_row(table, rec, patch)
+                if rec.get("id") != old_id:
+                    ops.append(self._op_del(old_id))  # replay inače zadrži i red pod starim id-jem
+                ops.append(self._op_put(rec))
+            self._journal(table, ops)
+            return len(targets) if isinstance(spec, dict) else bool(targets)
+
+    def _check_pk_change(self, table: str, targets: List[Dict[str, Any]], new_id: Any) -> None:
+        """Promena id-a pre ijednog upisa: samo jedan red, ne None, ne id drugog živog reda."""
+        moving = [r for r in targets if r.get("id") != new_id]
+        if not moving:
+            return
+        if new_id is None:
+            raise ValueError("id ne može biti promenjen u None")
+        if len(targets) > 1:
+            raise ValueError("Promena id-a je dozvoljena samo za jedan red")
+        if self._pk_get(table, new_id) is not None:
+            raise ValueError(f"id {new_id!r} već postoji u tabeli {table}")
+
+    def delete(self, table: str, spec: Union[Dict[str, Any], Any]) -> Union[int, bool]:
+        with self._writing(table):
+            pk = self._pk[table]
+            ops = []
+            positions = []
+            for rec in self._target_rows(table, spec):
+                self._drop_from_index(table, rec)
+                positions.append(pk[rec.get("id")])
+                ops.append(self._op_del(rec.get("id")))
+            if positions:
+                tx = self._tx()
+                if tx is not None:
+                    data = self._cache[table]
+                    tx.undo.append((table, "del", None, [(p, data[p]) for p in sorted(positions)]))
+                self._tombstone(table, positions)
+            self._journal(table, ops)
+            return len(ops) if isinstance(spec, dict) else bool(ops)
+
+    def find_by_pk(self, table: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        with self._reading(table, load=False):
+            if self._lazy_capable(table):
+                return self._peek_pk(table, id_value)  # lenjo: samo segment/linija tog id-a
+            self._ensure_loaded(table)
+            return self._pk_get(table, id_value)
 
     def get_last_id(self, table: str) -> Optional[int]:
         return self._last_id.get(table)
@@ -339,6 +1706,7 @@ class JSONDriver(BaseDBDriver):
                 "limit": qs.limit,
                 "offset": qs.offset,
                 "select": getattr(qs, "select", None),
+                "first": bool(getattr(qs, "first", False)),
             }
             if getattr(qs, "order", None):
                 normalized["order"] = qs.order  # [("col","asc/desc")]
@@ -351,12 +1719,44 @@ class JSONDriver(BaseDBDriver):
         return self.read(table, query)
 
     # -------- Bulk -----------------------------------------------------------
-    def bulk_insert(self, table: str, records: List[Dict[str, Any]]) -> List[int]:
-        with self.transaction():
-            ids = []
-            for r in records:
-                ids.append(self.create(table, r))
-            return ids
+    def bulk_insert(
+        self,
+        table: str,
+        records: Iterable[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        commit_every_chunk: bool = False,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> List[int]:
+        """
+        Upis liste ili generatora u blokovima od chunk_size (JSON_BULK_CHUNK / bulk_chunk) redova.
+        Uz commit_every_chunk=True svaki blok je jedan append u žurnal; inače se ceo unos upisuje
+        jednim append-om pri commit-u. Vidi BaseDBDriver._insert_chunked.
+        """
+        return self._insert_chunked(
+            records,
+            lambda chunk: self._insert_chunk(table, chunk),
+            chunk_size or self._bulk_chunk,
+            commit_every_chunk,
+            progress,
+        )
+
+    def _insert_chunk(self, table: str, records: List[Dict[str, Any]]) -> List[int]:
+        """Kao create() za ceo blok: jedan write lock, jedno indeksiranje po redu, jedan zapis u žurnal."""
+        with self._writing(table) as data:
+            pk = self._pk.setdefault(table, {})
+            tx = self._tx()
+            ops = []
+            for record in records:
+                if "id" not in record or record["id"] is None:
+                    record["id"] = self._generate_id(table)
+                pk[record["id"]] = len(data)
+                data.append(record)
+                self._add_to_index(table, record)
+                if tx is not None:
+                    tx.undo.append((table, "ins", record, None))
+                ops.append(self._op_put(record))
+            self._journal(table, ops)
+            return [r["id"] for r in records]
 
     def bulk_update(self, table: str, where_ids: List[int], patch: Dict[str, Any]) -> int:
         spec = {"where": [("id", "in", list(where_ids))]}
@@ -365,115 +1765,139 @@ class JSONDriver(BaseDBDriver):
     
     # --- NOVO: count() za JSON driver (brzo, koristi keš ako postoji) ---
     def count(self, table: str, where: dict | None = None) -> int:
-        # Pokušaj da koristiš in-memory keš ako ga drajver održava
-        try:
-            cache = getattr(self, "_tables", None) or getattr(self, "_cache", None)
-            if isinstance(cache, dict) and table in cache:
-                rows = cache[table]
-            else:
-                rows = self._load_table(table)
-        except Exception:
-            # konzervativno – uvek možemo da učitamo sa diska
-            rows = self._load_table(table)
+        with self._reading(table) as rows:
+            return self._count_rows(table, rows, where)
+
+    # --- NOVO: exists() — indeks ili prvi pogodak, bez čitanja ostatka ---
+    def exists(self, table: str, where: dict | None = None) -> bool:
+        with self._reading(table) as rows:
+            where_norm = self._normalize_where(where)
+            if not where_norm:
+                return len(rows) > self._tombs.get(table, 0)
+            n = self._index_count(table, where_norm)
+            if n is not None:
+                return n > 0
+            candidates = self._index_candidates(table, where_norm)
+            source = self._scan(table, rows) if candidates is None else candidates
+            return any(map(self._row_predicate(table, where_norm), source))
+
+    def _count_rows(self, table: str, rows: List[Dict[str, Any]], where: dict | None) -> int:
+        if not where:
+            return len(rows) - self._tombs.get(table, 0)
+        norm = self._normalize_where(where)
+        n = self._index_count(table, norm)
+        if n is not None:
+            return n
+        candidates = self._index_candidates(table, norm)
+        source = self._scan(table, rows) if candidates is None else candidates
+        # brojanje bez pravljenja liste pogodaka
+        return sum(map(self._row_predicate(table, norm), source))
 
-        if where:
-            try:
-                norm = self._normalize_where(where)
-                rows = self._apply_where(rows, norm)
-            except Exception:
-                # ultra-fallback ako privatne metode nisu dostupne
-                def _match(row):
-                    for k, v in where.items():
-                        if isinstance(v, dict):
-                            # minimalni set operatera; po potrebi proširi
-                            if "=" in v and row.get(k) != v["="]:
-                                return False
-                            elif "in" in v and row.get(k) not in set(v["in"]):
-                                return False
-                            elif "like" in v and v["like"] not in str(row.get(k, "")):
-                                return False
-                        else:
-                            if row.get(k) != v:
-                                return False
-                    return True
-                rows = [r for r in rows if _match(r)]
-
-        # Ako rows može biti generator, pretvori u list za tačan len()
-        try:
-            return len(rows)
-        except TypeError:
-            return sum(1 for _ in rows)
-    
     # --- NOVO: brisanje u seriji po ID-jevima ---
     def bulk_delete(self, table: str, ids: List[int]) -> int:
-        self._ensure_loaded(table)
-        ids_set = set(int(i) for i in (ids or []))
-        if not ids_set:
+        """Brisanje po id-jevima preko pk mape i tombstone-a: O(k), jedan upis na disk."""
+        ids = list(dict.fromkeys(ids or []))
+        if not ids:
             return 0
-        before = len(self._tables[table]["rows"])
-        # skini iz indeksa pre brisanja
-        for row in list(self._tables[table]["rows"]):
-            if int(row.get("id", -1)) in ids_set:
-                self._drop_from_index(table, row)
-        # filtriraj
-        self._tables[table]["rows"] = [r for r in self._tables[table]["rows"] if int(r.get("id", -1)) not in ids_set]
-        self._save_table(table)
-        return before - len(self._tables[table]["rows"])
+        with self.transaction():
+            return self.delete(table, {"where": [("id", "in", ids)]})
 
     # --- NOVO: single upsert po unique_by poljima ---
     def upsert(self, table: str, data: Dict[str, Any], unique_by: List[str]):
         if not unique_by:
             raise ValueError("unique_by je obavezan za upsert() u JSONDriver")
-        self._ensure_loaded(table)
-        # nadji postojeći red
-        filt = {k: data[k] for k in unique_by if k in data}
-        if len(filt) != len(unique_by):
+        if any(k not in data for k in unique_by):
             raise ValueError("Sva unique_by polja moraju biti prisutna u data payload-u.")
-        norm = self._normalize_where(filt)
-        rows = self._apply_where(self._tables[table]["rows"], norm)
-        if rows:
-            # update first match
-            row = rows[0]
-            rid = int(row["id"])
-            self._drop_from_index(table, row)
-            row.update(data)
-            self._add_to_index(table, row)
-            self._save_table(table)
-            return row
-        else:
-            # create
-            new_row = dict(data)
-            new_row["id"] = self._generate_id(table)
-            self._tables[table]["rows"].append(new_row)
-            self._add_to_index(table, new_row)
-            self._save_table(table)
-            return new_row
+        return self._upsert_rows(table, [data], unique_by)[0][0]
 
     # --- NOVO: bulk upsert ---
     def bulk_upsert(self, table: str, records: List[Dict[str, Any]], unique_by: List[str]) -> Dict[str, int]:
         if not records:
             return {"created": 0, "updated": 0}
-        self._ensure_loaded(table)
-        created = 0
-        updated = 0
+        if not unique_by:
+            raise ValueError("unique_by je obavezan za bulk_upsert() u JSONDriver")
         for r in records:
-            filt = {k: r[k] for k in unique_by if k in r}
-            if len(filt) != len(unique_by):
+            if any(k not in r for k in unique_by):
                 raise ValueError("Sva unique_by polja moraju biti prisutna u svakom zapisu (bulk_upsert).")
-            norm = self._normalize_where(filt)
-            rows = self._apply_where(self._tables[table]["rows"], norm)
-            if rows:
-                row = rows[0]
-                self._drop_from_index(table, row)
-                row.update(r)
-                self._add_to_index(table, row)
-                updated += 1
-            else:
-                new_row = dict(r)
-                new_row["id"] = self._generate_id(table)
-                self._tables[table]["rows"].append(new_row)
-                self._add_to_index(table, new_row)
-                created += 1
-        self._save_table(table)
+        _, created, updated = self._upsert_rows(table, records, unique_by)
         return {"created": created, "updated": updated}
 
+    def _unique_lookup(self, table: str, rows: List[Dict[str, Any]],
+                       unique_by: List[str]) -> Tuple[Callable[[tuple], Optional[Dict[str, Any]]],
+                                                      Callable[[tuple, Dict[str, Any]], None]]:
+        """
+        (find, remember) nad unique_by ključem: pk mapa za ["id"], postojeći hash indeks
+        za jedno polje, inače privremena mapa ključ -> prvi red (jedan prolaz, gradi se lenjo).
+        """
+        field = unique_by[0] if len(unique_by) == 1 else None
+        buckets = self._indexes.get(table, {}).get(field) if field is not None else None
+        temp: Dict[tuple, Dict[str, Any]] = {}
+        built = []
+
+        def scan(key: tuple) -> Optional[Dict[str, Any]]:
+            # nehešabilne vrednosti (list/dict) — poređenje red po red
+            return next((r for r in self._scan(table, rows) if tuple(r.get(k) for k in unique_by) == key), None)
+
+        def find(key: tuple) -> Optional[Dict[str, Any]]:
+            try:
+                if field == "id":
+                    return self._pk_get(table, key[0])
+                if buckets is not None and key[0] is not None:
+                    bucket = buckets.get(key[0])
+                    return next(iter(bucket.values())) if bucket else None
+                if not built:
+                    for r in self._scan(table, rows):
+                        try:
+                            temp.setdefault(tuple(r.get(k) for k in unique_by), r)
+                        except TypeError:
+                            continue
+                    built.append(True)
+                return temp.get(key)
+            except TypeError:
+                return scan(key)
+
+        def remember(key: tuple, row: Dict[str, Any]) -> None:
+            if built:
+                try:
+                    temp.setdefault(key, row)
+                except TypeError:
+                    pass  # nehešabilan ključ se ionako traži skeniranjem
+
+        return find, remember
+
+    def _upsert_rows(self, table: str, records: List[Dict[str, Any]],
+                     unique_by: List[str]) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Upsert serije u O(n + m): jedan lookup po zapisu (vidi _unique_lookup), sve u
+        jednoj transakciji -> jedan upis na disk. Postojeći red dobija sva polja osim id-a;
+        duplikati unutar serije ažuriraju red koji je serija već napravila.
+        """
+        out: List[Dict[str, Any]] = []
+        created = updated = 0
+        with self.transaction(), self._writing(table) as data:
+            tx = self._tx()
+            pk = self._pk.setdefault(table, {})
+            find, remember = self._unique_lookup(table, data, unique_by)
+            ops = []
+            for r in records:
+                key = tuple(r[k] for k in unique_by)
+                row = find(key)
+                if row is not None:
+                    tx.undo.append((table, "upd", row, row.copy()))
+                    self._patch_row(table, row, {k: v for k, v in r.items() if k != "id"})
+                    updated += 1
+                else:
+                    row = dict(r)
+                    if row.get("id") is None:
+                        row["id"] = self._generate_id(table)
+                    pk[row["id"]] = len(data)
+                    data.append(row)
+                    self._add_to_index(table, row)
+                    tx.undo.append((table, "ins", row, None))
+                    remember(key, row)
+                    created += 1
+                ops.append(self._op_put(row))
+                out.append(row)
+            self._journal(table, ops)
+        return out, created, updated
+
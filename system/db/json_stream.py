@@ -0,0 +1,31 @@
+# =============================================================================
+# File:        system/db/json_stream.py
+# Purpose:     Strimovani JSON enkoder za JSONDriver (niz redova u delovima,
+#              kompaktni separatori, bez jednog ogromnog stringa u memoriji)
+# =============================================================================
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, List
+
+CHUNK_ROWS = 2000  # podrazumevano redova po delu (JSON_CHUNK_ROWS)
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode(obj: Any) -> str:
+    """Kompaktan JSON (isti enkoder kao za delove tabele)."""
+    return _ENCODER.encode(obj)
+
+
+def iter_array(rows: List[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """
+    JSON niz redova kao niz delova teksta. Svaki deo je C-enkodiran isečak od
+    chunk_rows redova, pa je vršna memorija ~ jedan deo umesto cele tabele.
+    """
+    chunk_rows = max(1, int(chunk_rows))
+    yield "["
+    for start in range(0, len(rows), chunk_rows):
+        part = _ENCODER.encode(rows[start:start + chunk_rows])[1:-1]
+        yield part if start == 0 else "," + part
+    yield "]"
@@ -0,0 +1,147 @@
+# =============================================================================
+# File:        system/db/jsonl_store.py
+# Purpose:     JSON Lines raspored tabele (JSONDriver) — jedan red po liniji +
+#              indeks bajt-ofseta, lenjo čitanje preko mmap-a
+# =============================================================================
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def render(rows: List[Dict[str, Any]], chunk_rows: int = 2000) -> Tuple[Iterator[str], Iterator[str]]:
+    """
+    Delovi teksta .jsonl fajla i njegovog .idx fajla (upisuju se tim redom).
+    idx = {"size": bajtova podataka, "ids": [...], "offsets": [...]} — offsets[i] je
+    početak i-te linije; size služi da se prepozna zastareo indeks (pad između rename-ova).
+    Ofseti se skupljaju dok se podaci strimuju, pa idx mora da se troši posle podataka.
+    """
+    ids: List[Any] = []
+    offsets: List[int] = []
+    state = {"pos": 0}
+
+    def data() -> Iterator[str]:
+        pos = 0
+        for start in range(0, len(rows), chunk_rows):
+            lines = []
+            for r in rows[start:start + chunk_rows]:
+                line = json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                ids.append(r.get("id"))
+                offsets.append(pos)
+                pos += len(line.encode("utf-8"))
+                lines.append(line)
+            yield "".join(lines)
+        state["pos"] = pos
+
+    def idx() -> Iterator[str]:
+        yield json.dumps({"size": state["pos"], "ids": ids, "offsets": offsets}, separators=(",", ":"))
+
+    return data(), idx()
+
+
+class LazyTable:
+    """
+    Otvoren .jsonl fajl bez dekodiranja: id -> ofset iz .idx (ili iz jednog
+    prolaza kroz mmap ako indeks nedostaje/zastareo), red se dekodira tek kad zatreba.
+    Vlasnik poziva close() kad tabelu zameni, izbaci iz keša ili zatvori drajver.
+    """
+
+    def __init__(self, path: str, idx_path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._mm: Optional[mmap.mmap] = None
+        if self.size:
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.ids, self.offsets = self._load_index(idx_path)
+        self._pos: Optional[Dict[Any, int]] = None
+        self._guard = threading.Lock()
+        self._iterating = 0
+        self._closed = False
+
+    def _load_index(self, idx_path: str) -> Tuple[List[Any], List[int]]:
+        if os.path.exists(idx_path):
+            try:
+                with open(idx_path, "r", encoding="utf-8") as f:
+                    idx = json.load(f)
+                if idx.get("size") == self.size:
+                    return idx["ids"], idx["offsets"]
+            except ValueError:
+                pass
+        return self._scan()
+
+    def _scan(self) -> Tuple[List[Any], List[int]]:
+        ids: List[Any] = []
+        offsets: List[int] = []
+        mm = self._mm
+        if mm is None:
+            return ids, offsets
+        start = 0
+        while start < self.size:
+            end = mm.find(b"\n", start)
+            if end < 0:
+                end = self.size
+            if end > start:
+                ids.append(json.loads(mm[start:end]).get("id"))
+                offsets.append(start)
+            start = end + 1
+        return ids, offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _line(self, i: int) -> Dict[str, Any]:
+        start = self.offsets[i]
+        end = self._mm.find(b"\n", start)
+        return json.loads(self._mm[start:end if end >= 0 else self.size])
+
+    def has(self, id_value: Any) -> bool:
+        return self.position(id_value) is not None
+
+    def position(self, id_value: Any) -> Optional[int]:
+        if self._pos is None:
+            self._pos = {rid: i for i, rid in enumerate(self.ids)}
+        try:
+            return self._pos.get(id_value)
+        except TypeError:
+            return None
+
+    def get(self, id_value: Any) -> Optional[Dict[str, Any]]:
+        i = self.position(id_value)
+        return None if i is None else self._line(i)
+
+    def iter_rows(self) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        with self._guard:
+            if self._closed:
+                raise ValueError(f"LazyTable je zatvoren: {self.path}")
+            self._iterating += 1
+        try:
+            for i, rid in enumerate(self.ids):
+                yield rid, self._line(i)
+        finally:
+            with self._guard:
+                self._iterating -= 1
+                if self._closed and not self._iterating:
+                    self._release()
+
+    def close(self) -> None:
+        """Oslobodi mmap; ako iter_rows u drugoj niti još čita, zatvara ga poslednji iterator."""
+        with self._guard:
+            self._closed = True
+            if not self._iterating:
+                self._release()
+
+    def _release(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Pun dekod u jednom json.loads pozivu (linije spojene u niz)."""
+        if self._mm is None:
+            return []
+        body = self._mm[:].rstrip(b"\n").replace(b"\n", b",")
+        return json.loads(b"[" + body + b"]")
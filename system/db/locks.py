@@ -0,0 +1,231 @@
+# =============================================================================
+# File:        system/db/locks.py
+# Purpose:     Reader/writer lock po tabeli (JSONDriver) + međuprocesni
+#              fajl lock (fcntl) sa brojačem generacije
+# =============================================================================
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:  # fcntl postoji samo na POSIX-u; bez njega FileLock ne zaključava (samo brojač)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from system.db.query import DBError
+
+
+class LockTimeout(DBError):
+    """Lock tabele nije dobijen u zadatom roku (moguć i deadlock između transakcija)."""
+    pass
+
+
+class RWLock:
+    """
+    Više čitalaca ILI jedan pisac.
+    - reentrantan: pisac može ponovo da uzme write/read; čitalac može ponovo read
+    - pisac koji čeka blokira nove čitaoce (bez "izgladnjivanja" pisca),
+      ali ne i niti koje već drže lock (da ne bi došlo do samoblokade)
+    - upgrade read -> write je dozvoljen kada ostali čitaoci izađu
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}  # thread ident -> dubina
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self, timeout: Optional[float] = None) -> bool:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return True
+            ok = self._cond.wait_for(lambda: self._writer is None and not self._waiting_writers, timeout)
+            if not ok:
+                return False
+            self._readers[me] = 1
+            return True
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            left = self._readers.get(me, 0) - 1
+            if left > 0:
+                self._readers[me] = left
+            else:
+                self._readers.pop(me, None)
+                self._cond.notify_all()
+
+    def acquire_write(self, timeout: Optional[float] = None) -> bool:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return True
+            self._waiting_writers += 1
+            try:
+                ok = self._cond.wait_for(
+                    lambda: self._writer is None and all(t == me for t in self._readers), timeout
+                )
+            finally:
+                self._waiting_writers -= 1
+            if not ok:
+                self._cond.notify_all()
+                return False
+            self._writer = me
+            self._writer_depth = 1
+            return True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer_depth -= 1
+            if self._writer_depth <= 0:
+                self._writer = None
+                self._writer_depth = 0
+                self._cond.notify_all()
+
+    def held_by_me(self) -> bool:
+        return self._writer == threading.get_ident()
+
+    def used_by_me(self) -> bool:
+        """Tekuća nit drži lock (read ili write)."""
+        me = threading.get_ident()
+        return self._writer == me or me in self._readers
+
+    @contextmanager
+    def read_locked(self, timeout: Optional[float] = None, name: str = ""):
+        if not self.acquire_read(timeout):
+            raise LockTimeout(f"Read lock timeout: {name}")
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self, timeout: Optional[float] = None, name: str = ""):
+        if not self.acquire_write(timeout):
+            raise LockTimeout(f"Write lock timeout: {name}")
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+# Registar lock-ova po apsolutnoj putanji tabele: više instanci drajvera nad istim
+# root-om dele isti lock za istu tabelu (kao ranije globalni _LOCK), a različite tabele
+# se više ne blokiraju međusobno.
+_REGISTRY: Dict[str, RWLock] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def table_lock(root: str, table: str) -> RWLock:
+    key = os.path.join(os.path.abspath(root), table)
+    lock = _REGISTRY.get(key)
+    if lock is None:
+        with _REGISTRY_LOCK:
+            lock = _REGISTRY.setdefault(key, RWLock())
+    return lock
+
+
+class FileLock:
+    """
+    Advisory fcntl.flock nad <root>/<table>.lock, deljen između niti procesa:
+    - shared (čitanje/učitavanje) i exclusive (upis) sa brojanjem dubine — flock
+      pripada otvorenom fajlu, pa se stvarni lock uzima/pušta samo na prvom/poslednjem
+    - prvih 8 bajtova fajla je brojač generacije: svaki upis tabele na disk ga
+      povećava, pa drugi procesi jeftino (jedan pread) vide da im je keš zastareo
+    Niti istog procesa su već razdvojene RWLock-om, ovde se štiti samo od drugih procesa.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._mutex = threading.Lock()
+        self._shared = 0
+        self._exclusive = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _flock(self, op: int, timeout: Optional[float]) -> None:
+        if fcntl is None:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(self._fd, op | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(f"File lock timeout: {self.path}")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.02)
+
+    def acquire(self, exclusive: bool, timeout: Optional[float] = None) -> None:
+        with self._mutex:
+            self._open()
+            if exclusive:
+                if not self._exclusive:
+                    self._flock(fcntl.LOCK_EX if fcntl else 0, timeout)
+                self._exclusive += 1
+            else:
+                if not self._exclusive and not self._shared:
+                    self._flock(fcntl.LOCK_SH if fcntl else 0, timeout)
+                self._shared += 1
+
+    def release(self, exclusive: bool) -> None:
+        with self._mutex:
+            if exclusive:
+                self._exclusive -= 1
+            else:
+                self._shared -= 1
+            if fcntl is None or self._exclusive:
+                return
+            if self._shared:
+                if exclusive:
+                    fcntl.flock(self._fd, fcntl.LOCK_SH)  # ostali su samo čitaoci
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def exclusive_held(self) -> bool:
+        return self._exclusive > 0
+
+    @contextmanager
+    def locked(self, exclusive: bool = False, timeout: Optional[float] = None):
+        self.acquire(exclusive, timeout)
+        try:
+            yield
+        finally:
+            self.release(exclusive)
+
+    def generation(self) -> int:
+        raw = os.pread(self._open(), 8, 0)
+        return int.from_bytes(raw, "little") if len(raw) == 8 else 0
+
+    def bump(self) -> int:
+        """Povećaj brojač generacije (pozivati pod exclusive lock-om)."""
+        gen = self.generation() + 1
+        os.pwrite(self._open(), gen.to_bytes(8, "little"), 0)
+        return gen
+
+
+_FILE_LOCKS: Dict[str, FileLock] = {}
+
+
+def file_lock(root: str, table: str) -> FileLock:
+    path = os.path.join(os.path.abspath(root), f"{table}.lock")
+    lock = _FILE_LOCKS.get(path)
+    if lock is None:
+        with _REGISTRY_LOCK:
+            lock = _FILE_LOCKS.setdefault(path, FileLock(path))
+    return lock
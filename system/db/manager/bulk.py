@@ -4,7 +4,7 @@
 # =============================================================================
 from __future__ import annotations
 
-from typing import Any, Dict, List, Sequence, Iterable
+from typing import Any, Callable, Dict, List, Optional, Sequence, Iterable
 
 from system.managers.error_manager import ErrorManager
 from .helpers import _requires_init, now_iso
@@ -12,21 +12,45 @@ from .helpers import _requires_init, now_iso
 
 class DBBulkMixin:
     @_requires_init
-    def bulk_create(cls, table: str, records: List[Dict[str, Any]]) -> List[int]:
+    def bulk_create(
+        cls,
+        table: str,
+        records: Iterable[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        commit_every_chunk: bool = False,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> List[int]:
+        """
+        records može biti lista ili generator — timestamps se dopunjuju lenjo, red po red,
+        a drajver upisuje u blokovima (chunk_size; podrazumevano iz drajvera).
+        Podrazumevano je sve jedna transakcija; commit_every_chunk=True: svaki blok je zasebna
+        transakcija (trajan odmah). progress(ukupno_upisano) se zove posle svakog bloka —
+        bez commit_every_chunk ti redovi još nisu potvrđeni.
+        """
         try:
-            if not records:
+            if isinstance(records, (list, tuple)) and not records:
                 return []
-            # upotpuni timestamps
+            # upotpuni timestamps (generator — bez kopije celog ulaza)
             ts = now_iso()
-            norm = []
-            for r in records:
-                rr = dict(r or {})
-                rr.setdefault("created_at", ts)
-                rr.setdefault("updated_at", rr["created_at"])
-                norm.append(rr)
+
+            def stamped(rows):
+                for r in rows:
+                    rr = dict(r or {})
+                    rr.setdefault("created_at", ts)
+                    rr.setdefault("updated_at", rr["created_at"])
+                    yield rr
+
+            norm = stamped(records)
 
             if hasattr(cls._driver, "bulk_insert"):
-                return cls._driver.bulk_insert(table, norm)
+                opts: Dict[str, Any] = {}
+                if chunk_size:
+                    opts["chunk_size"] = chunk_size
+                if commit_every_chunk:
+                    opts["commit_every_chunk"] = True
+                if progress is not None:
+                    opts["progress"] = progress
+                return cls._driver.bulk_insert(table, norm, **opts)
 
             ids: List[int] = []
             with cls.transaction():
@@ -34,6 +58,8 @@ class DBBulkMixin:
                     row = cls.create(table, r)
                     if isinstance(row, dict) and "id" in row:
                         ids.append(int(row["id"]))
+                    if progress is not None and chunk_size and len(ids) % chunk_size == 0:
+                        progress(len(ids))
             return ids
         except Exception as e:
             ErrorManager.create(e)
@@ -46,9 +46,20 @@ class DBConfigMixin:
         except Exception as e:
             ErrorManager.create(e)
 
+    @classmethod
+    def flush(cls) -> None:
+        """Upiši baferovane izmene drajvera na disk (JSON_DURABILITY=batched)."""
+        try:
+            if cls._driver and hasattr(cls._driver, "flush"):
+                cls._driver.flush()
+        except Exception as e:
+            ErrorManager.create(e)
+
     @classmethod
     def shutdown(cls) -> None:
         try:
+            if cls._driver and hasattr(cls._driver, "flush"):
+                cls._driver.flush()
             if cls._driver and hasattr(cls._driver, "close"):
                 cls._driver.close()
         except Exception as e:
@@ -58,16 +69,35 @@ class DBConfigMixin:
             cls._initialized = False
             cls._config = {"driver": None, "params": {}, "source": None}
 
+    @staticmethod
+    def _release_driver(driver) -> None:
+        """Zameni/napušteni drajver: upiši bafer i zatvori ga (pozadinska nit, konekcije)."""
+        if driver is None:
+            return
+        try:
+            if hasattr(driver, "flush"):
+                driver.flush()
+            if hasattr(driver, "close"):
+                driver.close()
+        except Exception as e:
+            ErrorManager.create(e)
+
     @classmethod
-    def _activate(cls, driver_key: str, params: Dict[str, Any], *, source: str) -> None:
-        """Uniformna aktivacija drajvera preko **params."""
+    def _activate(cls, driver_key: str, params: Dict[str, Any], *, source: str, release_prev: bool = True) -> None:
+        """
+        Uniformna aktivacija drajvera preko **params. Prethodni drajver se zatvara
+        (release_prev=False: pozivalac ga čuva i vraća, npr. with_driver).
+        """
         driver_key = (driver_key or "json").strip().lower()
         if driver_key == "json":
-            cls._driver = JSONDriver(**(params or {}))
+            driver = JSONDriver(**(params or {}))
         elif driver_key == "sqlite":
-            cls._driver = SQLiteDriver(**(params or {}))
+            driver = SQLiteDriver(**(params or {}))
         else:
             raise ValueError(f"Nepoznat driver_key: {driver_key}")
+        prev, cls._driver = cls._driver, driver
+        if release_prev and prev is not driver:
+            cls._release_driver(prev)
 
         cls._config = {"driver": driver_key, "params": dict(params or {}), "source": source}
         _log("info", f"activate -> driver={driver_key} source={source} params={params}")
@@ -77,6 +107,20 @@ class DBConfigMixin:
     def active_config(cls) -> Dict[str, Any]:
         return dict(cls._config)
 
+    @classmethod
+    def memory_usage(cls) -> Dict[str, Dict[str, int]]:
+        """
+        Približna memorija keša po tabeli: {table: {"rows", "indexes", "total"}} u bajtovima.
+        Drajveri bez sopstvenog keša (SQLite) vraćaju {}.
+        """
+        try:
+            if cls._driver and hasattr(cls._driver, "memory_usage"):
+                return cls._driver.memory_usage()
+            return {}
+        except Exception as e:
+            ErrorManager.create(e)
+            return {}
+
     @classmethod
     def get_driver_key(cls) -> Optional[str]:
         return cls._config.get("driver")
@@ -4,7 +4,7 @@
 # =============================================================================
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Iterator, Optional, List
 
 from system.managers.error_manager import ErrorManager
 from system.db.query import QuerySpec
@@ -33,6 +33,18 @@ class DBCrudMixin:
         except Exception as e:
             ErrorManager.create(e)
 
+    @_requires_init
+    def iter(cls, table: str, query: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Strimuj rezultate upita red po red (drajver bez iter() -> pročitaj pa iteriraj)."""
+        try:
+            if hasattr(cls._driver, "iter"):
+                return cls._driver.iter(table, query or {})
+            result = cls.read(table, query or {})
+            return iter(result if isinstance(result, list) else [])
+        except Exception as e:
+            ErrorManager.create(e)
+            return iter([])
+
     @_requires_init
     def update(cls, table: str, id_value: Any, data: Dict[str, Any]):
         try:
@@ -60,6 +72,9 @@ class DBCrudMixin:
     @_requires_init
     def find_by_pk(cls, table: str, value: Any, pk_field: str = "id"):
         try:
+            # Brzi put: direktan lookup po primarnom ključu (JSON pk mapa / SQLite rowid)
+            if pk_field == "id" and hasattr(cls._driver, "find_by_pk"):
+                return cls._driver.find_by_pk(table, value)
             spec = QuerySpec(table=table, where={pk_field: value}, first=True)
             return cls._driver.read_spec(spec)
         except Exception as e:
@@ -112,6 +127,9 @@ class DBCrudMixin:
     @_requires_init
     def exists(cls, table: str, **filters) -> bool:
         try:
+            # Brzi put ako driver zna EXISTS (indeks / LIMIT 1, bez čitanja reda)
+            if hasattr(cls._driver, "exists"):
+                return bool(cls._driver.exists(table, filters or None))
             result = cls.read(table, query={"where": filters, "first": True})
             return result is not None
         except Exception as e:
@@ -9,15 +9,17 @@ from .driver_switch import DBDriverSwitchMixin
 from .transactions import DBTransactionsMixin
 from .crud import DBCrudMixin
 from .bulk import DBBulkMixin
+from .indexes import DBIndexMixin
 
 
-class DBManager(DBConfigMixin, DBDriverSwitchMixin, DBTransactionsMixin, DBCrudMixin, DBBulkMixin):
+class DBManager(DBConfigMixin, DBDriverSwitchMixin, DBTransactionsMixin, DBCrudMixin, DBBulkMixin, DBIndexMixin):
     """
     Centralna DB klasa (isti javni API kao pre refaktora).
-    - initialize(), shutdown(), active_config(), get_driver_key(), get_driver_name(), capabilities()
+    - initialize(), shutdown(), flush(), active_config(), get_driver_key(), get_driver_name(), capabilities(), memory_usage()
     - switch_driver(), with_driver()
     - transaction()
     - create/read/update/delete + ORM helperi
     - bulk_create(), bulk_update()
+    - create_index(), drop_index(), list_indexes()
     """
     pass
@@ -81,13 +81,15 @@ class DBDriverSwitchMixin:
             else:
                 raise ValueError(f"Nepodržan driver u with_driver: {driver_key}")
 
-            cls._activate(driver_key, params, source="context")
+            cls._activate(driver_key, params, source="context", release_prev=False)
             yield cls
 
         except Exception as e:
             ErrorManager.create(e)
             raise
         finally:
-            cls._driver = prev_driver
+            temp_driver, cls._driver = cls._driver, prev_driver
             cls._config = prev_cfg
+            if temp_driver is not prev_driver:
+                cls._release_driver(temp_driver)  # privremeni drajver: flush + close
             _log("info", f"restore (from context) -> driver={prev_cfg.get('driver')} source={prev_cfg.get('source')}")
@@ -0,0 +1,46 @@
+# =============================================================================
+# File:        system/db/manager/indexes.py
+# Purpose:     Deklarativni sekundarni indeksi (create_index/drop_index)
+# =============================================================================
+from __future__ import annotations
+
+from typing import List
+
+from system.managers.error_manager import ErrorManager
+from .helpers import _requires_init
+
+
+class DBIndexMixin:
+    @_requires_init
+    def create_index(cls, table: str, field: str, kind: str = "hash") -> bool:
+        """
+        Napravi (trajni) indeks nad poljem ako drajver to podržava. Vraća True ako je indeks nov.
+        kind: "hash" (jednakost) ili "sorted" (range upiti i ORDER BY) — SQLite B-tree pokriva oba.
+        """
+        try:
+            if hasattr(cls._driver, "create_index"):
+                return bool(cls._driver.create_index(table, field, kind=kind))
+            return False
+        except Exception as e:
+            ErrorManager.create(e)
+            return False
+
+    @_requires_init
+    def drop_index(cls, table: str, field: str, kind: str = "hash") -> bool:
+        try:
+            if hasattr(cls._driver, "drop_index"):
+                return bool(cls._driver.drop_index(table, field, kind=kind))
+            return False
+        except Exception as e:
+            ErrorManager.create(e)
+            return False
+
+    @_requires_init
+    def list_indexes(cls, table: str, kind: str = "hash") -> List[str]:
+        try:
+            if hasattr(cls._driver, "list_indexes"):
+                return list(cls._driver.list_indexes(table, kind=kind))
+            return []
+        except Exception as e:
+            ErrorManager.create(e)
+            return []
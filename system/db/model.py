@@ -7,7 +7,7 @@
 # =============================================================================
 
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from system.db.manager.db_manager import DBManager
 from system.db.query_builder import QueryBuilder
@@ -38,6 +38,11 @@ class Model:
     # }
     __schema__: Optional[Dict[str, Any]] = None
 
+    # Opcioni sekundarni indeksi (JSON: hash indeks, SQLite: CREATE INDEX).
+    # Polja iz __schema__["unique"] se indeksiraju automatski (brz unique check).
+    # __indexes__ = ["email", "status"]
+    __indexes__: Optional[List[str]] = None
+
     # --------------------------------------------------------------------- #
     # QueryBuilder / Read helpers
     # --------------------------------------------------------------------- #
@@ -52,7 +57,7 @@ class Model:
 
     @classmethod
     def find(cls, value):
-        return DBManager.find_by_pk(cls.table, cls.pk_field, value)
+        return DBManager.find_by_pk(cls.table, value, cls.pk_field)
 
     @classmethod
     def where(cls, order_by=None, limit=None, offset=None, **filters):
@@ -94,6 +99,40 @@ class Model:
     def driver(cls):
         return DBManager.get_driver_name()
 
+    @classmethod
+    def index_fields(cls) -> List[str]:
+        fields = list(cls.__indexes__ or [])
+        for f in (cls.__schema__ or {}).get("unique", []) or []:
+            if f not in fields:
+                fields.append(f)
+        return fields
+
+    @classmethod
+    def ensure_indexes(cls, written: Optional[Iterable[str]] = None) -> None:
+        """
+        Prijavi deklarisane indekse aktivnom drajveru (idempotentno; zovu ga samo write helperi).
+        Ishod se pamti po modelu i drajveru, uključujući polja bez kolone (SQLite ne može da
+        indeksira kolonu pre prvog upisa) — ona se ponovo proveravaju tek posle upisa koji
+        ih sadrži (written), bez DDL-a i writer lock-a pri svakom pozivu.
+        """
+        fields = cls.index_fields()
+        if not fields or not cls.table:
+            return
+        DBManager.initialize()
+        driver = DBManager._driver
+        if cls.__dict__.get("_indexes_driver") is driver:
+            missing = cls.__dict__.get("_indexes_missing") or set()
+            if written is None or missing.isdisjoint(written):
+                return
+            fields = [f for f in fields if f in missing]
+        missing = set()
+        if hasattr(driver, "create_index"):
+            for f in fields:
+                DBManager.create_index(cls.table, f)
+            missing = set(fields) - set(DBManager.list_indexes(cls.table))
+        cls._indexes_driver = driver
+        cls._indexes_missing = missing
+
     # --------------------------------------------------------------------- #
     # Write helpers (sa validacijom)
     # --------------------------------------------------------------------- #
@@ -101,14 +140,20 @@ class Model:
     @classmethod
     def create(cls, **data):
         """Create sa opcionalnom validacijom preko __schema__."""
+        cls.ensure_indexes()
         data = cls._apply_validation(data, profile="create", exclude_pk=None)
-        return DBManager.create(cls.table, data)
+        row = DBManager.create(cls.table, data)
+        cls.ensure_indexes(written=data)  # nove kolone sada postoje (SQLite)
+        return row
 
     @classmethod
     def update(cls, id, **data):
         """Update sa opcionalnom validacijom preko __schema__ (partial update)."""
+        cls.ensure_indexes()
         data = cls._apply_validation(data, profile="update", exclude_pk=id, partial=True)
-        return DBManager.update(cls.table, id, data)
+        ok = DBManager.update(cls.table, id, data)
+        cls.ensure_indexes(written=data)
+        return ok
 
     @classmethod
     def delete(cls, id):
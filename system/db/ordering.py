@@ -0,0 +1,77 @@
+# =============================================================================
+# File:        system/db/ordering.py
+# Purpose:     ORDER BY za JSONDriver: složeni ključ (više polja, mešano asc/desc,
+#              None i mešani tipovi bez TypeError-a) + top-k preko heap-a
+# =============================================================================
+from __future__ import annotations
+
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+TOPK_MAX = 1024  # limit + offset do ove granice ide kroz heap umesto punog sortiranja
+
+
+def _part(value: Any) -> Tuple[int, Any]:
+    """
+    Uporediv deo ključa, redosled kao u SQLite-u: NULL < brojevi < tekst < ostalo
+    (liste/dict-ovi po repr-u). NULL je prvi u ASC i poslednji u DESC.
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, repr(value))
+
+
+class _Desc:
+    """Obrnuto poređenje jednog dela ključa (desc polje u mešanom asc/desc ključu)."""
+    __slots__ = ("v",)
+
+    def __init__(self, v: Any):
+        self.v = v
+
+    def __eq__(self, other: "_Desc") -> bool:
+        return self.v == other.v
+
+    def __lt__(self, other: "_Desc") -> bool:
+        return other.v < self.v
+
+
+def sort_key(keys: List[Tuple[str, bool]]) -> Tuple[Callable[[Dict[str, Any]], Any], bool]:
+    """
+    (key, reverse) za jedan prolaz sortiranja po [(field, desc)].
+    Isti smer za sva polja -> običan tuple + reverse; mešano -> desc delovi obrnuti (_Desc).
+    """
+    if len(keys) == 1:
+        field, desc = keys[0]
+        return (lambda r: _part(r.get(field))), desc
+    fields = [f for f, _ in keys]
+    if len({d for _, d in keys}) == 1:
+        return (lambda r: tuple(_part(r.get(f)) for f in fields)), keys[0][1]
+    spec = [(f, d) for f, d in keys]
+    return (lambda r: tuple(_Desc(_part(r.get(f))) if d else _part(r.get(f)) for f, d in spec)), False
+
+
+def sort_rows(rows: List[Dict[str, Any]], keys: List[Tuple[str, bool]]) -> List[Dict[str, Any]]:
+    """
+    Stabilno sortiranje u mestu. Isti smer svih polja: jedan prolaz sa složenim ključem.
+    Mešano asc/desc: stabilni prolazi od najmanje značajnog polja (C poređenja su
+    brža od _Desc omotača za ceo skup; isti rezultat kao složeni ključ).
+    """
+    if len({d for _, d in keys}) > 1:
+        for field, desc in reversed(keys):
+            rows.sort(key=lambda r: _part(r.get(field)), reverse=desc)
+        return rows
+    key, reverse = sort_key(keys)
+    rows.sort(key=key, reverse=reverse)
+    return rows
+
+
+def top_rows(rows: Iterable[Dict[str, Any]], keys: List[Tuple[str, bool]], k: int) -> List[Dict[str, Any]]:
+    """Prvih k redova po redosledu sort_rows (stabilno), O(n log k) bez sortiranja svega."""
+    key, reverse = sort_key(keys)
+    if reverse:
+        return heapq.nlargest(k, rows, key=key)
+    return heapq.nsmallest(k, rows, key=key)
@@ -0,0 +1,89 @@
+# =============================================================================
+# File:        system/db/predicates.py
+# Purpose:     Kompajliranje normalizovanog where-a u jednu predikat funkciju
+#              (JSONDriver) + keš po "obliku" upita
+# =============================================================================
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+Clause = Tuple[str, str, Any]
+Shape = Tuple[Tuple[str, str], ...]
+
+SUPPORTED_OPS = frozenset({"==", "!=", "in", "like", ">", "<", ">=", "<="})
+
+
+def _clause_src(i: int, field: str, op: str) -> List[str]:
+    """Izvorne linije za jedan uslov; vrednost upita je u v{i}, vrednost reda u x."""
+    get = f"    x = g({field!r})"
+    if op == "==":
+        return [get, f"    if x != v{i}: return False"]
+    if op == "!=":
+        return [get, f"    if x == v{i}: return False"]
+    if op == "in":
+        # v{i} je frozenset kad su sve vrednosti hešabilne; nehešabilna vrednost reda -> lista l{i}
+        return [
+            get,
+            "    try:",
+            f"        if x not in v{i}: return False",
+            "    except TypeError:",
+            f"        if x not in l{i}: return False",
+        ]
+    if op == "like":
+        # isto kao ranije: str(d.get(field, "")).lower() sadrži str(value).lower()
+        return [f"    if v{i} not in str(g({field!r}, '')).lower(): return False"]
+    if op in (">", "<", ">=", "<="):
+        return [get, f"    if x is None or not (x {op} v{i}): return False"]
+    return []
+
+
+@lru_cache(maxsize=256)
+def _compile_shape(shape: Shape) -> Callable[..., Callable[[Dict[str, Any]], bool]]:
+    """
+    Za oblik upita ((field, op), ...) generiši fabriku koja prima vrednosti upita
+    i vraća predikat. Keširano — isti oblik sa drugim vrednostima se ne kompajlira ponovo.
+    """
+    params = []
+    body = ["  def pred(d):", "    g = d.get"]
+    for i, (field, op) in enumerate(shape):
+        params.append(f"v{i}")
+        if op == "in":
+            params.append(f"l{i}")
+        body.extend(_clause_src(i, field, op))
+    body.append("    return True")
+    src = f"def make({', '.join(params)}):\n" + "\n".join(body) + "\n  return pred\n"
+    ns: Dict[str, Any] = {}
+    exec(compile(src, f"<where {shape!r}>", "exec"), ns)
+    return ns["make"]
+
+
+def _bind_value(op: str, value: Any) -> List[Any]:
+    if op == "in":
+        seq = list(value or [])
+        try:
+            return [frozenset(seq), seq]
+        except TypeError:
+            return [seq, seq]
+    if op == "like":
+        return [str(value).lower()]
+    return [value]
+
+
+def compile_where(clauses: List[Clause]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Jedan predikat za ceo where (redosled uslova = redosled u listi; pozivalac
+    ga prethodno sortira po selektivnosti). Nepoznati operatori se ignorišu,
+    kao i ranije.
+    """
+    usable = [(f, op, v) for (f, op, v) in clauses if op in SUPPORTED_OPS]
+    shape: Shape = tuple((f, op) for (f, op, _) in usable)
+    args: List[Any] = []
+    for (_, op, v) in usable:
+        args.extend(_bind_value(op, v))
+    return _compile_shape(shape)(*args)
+
+
+# okvirna cena/selektivnost operatora kada nema statistike iz indeksa
+OP_SELECTIVITY = {"==": 0.05, "in": 0.1, ">": 0.3, "<": 0.3, ">=": 0.3, "<=": 0.3, "like": 0.5, "!=": 0.95}
+OP_COST = {"==": 1, "!=": 1, "in": 2, ">": 2, "<": 2, ">=": 2, "<=": 2, "like": 5}
@@ -0,0 +1,159 @@
+# =============================================================================
+# File:        system/db/sorted_index.py
+# Purpose:     Sortirani (bisect) indeks za range upite i ORDER BY u JSONDriver-u
+# =============================================================================
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class SortedIndex:
+    """
+    Paralelne liste `keys` (sortirane vrednosti), `ids` i `rows` (istim redom); unutar
+    iste vrednosti redovi su poređani po id-u, pa je ulaz praktično ključ (vrednost, id).
+    - range upit: O(log n + k) preko bisect-a
+    - uređeno čitanje: iteracija po indeksu, bez sortiranja cele tabele
+    - remove: bisect po vrednosti pa po id-u (bez skena redova iste vrednosti)
+    Redovi sa None (ili bez polja) drže se posebno u `nulls` (id -> red) — kao u SQLite-u,
+    NULL je "manji" od svake vrednosti (prvi u ASC, poslednji u DESC).
+    Ako se u polju pojave neuporedivi tipovi (npr. int i str), indeks postaje
+    nevažeći (`valid=False`) i drajver se vraća na običan sken.
+    """
+
+    __slots__ = ("field", "keys", "ids", "rows", "nulls", "valid")
+
+    def __init__(self, field: str):
+        self.field = field
+        self.keys: List[Any] = []
+        self.ids: List[Any] = []
+        self.rows: List[Dict[str, Any]] = []
+        self.nulls: Dict[Any, Dict[str, Any]] = {}
+        self.valid = True
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.nulls)
+
+    # --- održavanje ---
+    def build(self, rows: Iterable[Dict[str, Any]]) -> None:
+        f = self.field
+        triples = []
+        self.nulls = {}
+        for r in rows:
+            v = r.get(f)
+            if v is None:
+                self.nulls[r.get("id")] = r
+            else:
+                triples.append((v, r.get("id"), r))
+        try:
+            triples.sort(key=lambda t: (t[0], t[1]))
+        except TypeError:
+            try:
+                triples.sort(key=lambda t: t[0])  # id-jevi različitih tipova: dovoljno po vrednosti
+            except TypeError:
+                self._invalidate()
+                return
+        self.keys = [t[0] for t in triples]
+        self.ids = [t[1] for t in triples]
+        self.rows = [t[2] for t in triples]
+        self.valid = True
+
+    def _slot(self, v: Any, rid: Any) -> Tuple[int, int, int]:
+        """(lo, hi) raspon vrednosti v i pozicija id-a rid unutar njega (bisect po id-u)."""
+        lo = bisect_left(self.keys, v)
+        hi = bisect_right(self.keys, v, lo)
+        try:
+            i = bisect_left(self.ids, rid, lo, hi)
+        except TypeError:
+            i = hi
+        return lo, hi, i
+
+    def add(self, row: Dict[str, Any]) -> None:
+        if not self.valid:
+            return
+        v = row.get(self.field)
+        rid = row.get("id")
+        if v is None:
+            self.nulls[rid] = row
+            return
+        try:
+            _, _, i = self._slot(v, rid)
+        except TypeError:
+            self._invalidate()
+            return
+        self.keys.insert(i, v)
+        self.ids.insert(i, rid)
+        self.rows.insert(i, row)
+
+    def remove(self, row: Dict[str, Any]) -> None:
+        if not self.valid:
+            return
+        v = row.get(self.field)
+        rid = row.get("id")
+        if v is None:
+            if self.nulls.get(rid) is row:
+                del self.nulls[rid]
+            return
+        try:
+            lo, hi, i = self._slot(v, rid)
+        except TypeError:
+            self._invalidate()
+            return
+        if not (i < hi and self.rows[i] is row):
+            # id-jevi neuporedivih tipova ili duplirani id: linearno, samo u rasponu vrednosti
+            i = next((j for j in range(lo, hi) if self.rows[j] is row), -1)
+            if i < 0:
+                return
+        del self.keys[i]
+        del self.ids[i]
+        del self.rows[i]
+
+    def _invalidate(self) -> None:
+        self.valid = False
+        self.keys = []
+        self.ids = []
+        self.rows = []
+        self.nulls = {}
+
+    # --- upiti ---
+    def _bounds(self, lo: Any, lo_inclusive: bool, hi: Any, hi_inclusive: bool) -> Tuple[int, int]:
+        start = 0
+        end = len(self.keys)
+        if lo is not None:
+            start = bisect_left(self.keys, lo) if lo_inclusive else bisect_right(self.keys, lo)
+        if hi is not None:
+            end = bisect_right(self.keys, hi) if hi_inclusive else bisect_left(self.keys, hi)
+        return start, end
+
+    def count_range(
+        self,
+        lo: Any = None,
+        lo_inclusive: bool = True,
+        hi: Any = None,
+        hi_inclusive: bool = True,
+    ) -> int:
+        """Broj redova u opsegu u O(log n), bez kopiranja."""
+        start, end = self._bounds(lo, lo_inclusive, hi, hi_inclusive)
+        return max(0, end - start)
+
+    def range(
+        self,
+        lo: Any = None,
+        lo_inclusive: bool = True,
+        hi: Any = None,
+        hi_inclusive: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Redovi sa lo <(=) vrednost <(=) hi, rastuće. None granica = bez ograničenja."""
+        start, end = self._bounds(lo, lo_inclusive, hi, hi_inclusive)
+        if start >= end:
+            return []
+        return self.rows[start:end]
+
+    def ordered(self, desc: bool = False) -> Iterator[Dict[str, Any]]:
+        """Svi redovi po vrednosti polja (NULL prvi u ASC, poslednji u DESC)."""
+        if desc:
+            yield from reversed(self.rows)
+            yield from reversed(self.nulls.values())
+        else:
+            yield from self.nulls.values()
+            yield from self.rows
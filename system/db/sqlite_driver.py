@@ -5,17 +5,24 @@
 #              - Savepoint (ugnježdene) transakcije
 #              - Brzi batch: bulk_insert / bulk_update
 #              - Sigurni identifikatori, dinamične kolone (kao do sada)
+#              - Konekcije: jedna writer + ograničen pool reader konekcija (paralelna WAL čitanja)
+#              - Keš šeme (tabele/kolone): DDL samo za nove kolone, invalidacija po schema_version
+#              - INSERT ... RETURNING (SQLite >= 3.35) za create/upsert/bulk_insert
+#              - bulk_insert prima i generator, upis u blokovima (ograničena memorija)
 # Author:      Aleksandar Popović (+ dorade za performanse)
 # Updated:     2025-08-13
 # =============================================================================
 from __future__ import annotations
 
+import functools
+import itertools
 import os
+import queue
 import re
 import sqlite3
 import threading
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from system.config.env import EnvLoader
 from system.db.base_driver import BaseDBDriver
@@ -23,6 +30,11 @@ from system.db.query import QuerySpec, DriverCapabilities
 
 _SAFE_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+# RETURNING klauzula postoji od SQLite 3.35; limit parametara po statement-u je 32766 od 3.32 (ranije 999)
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_MAX_VARS = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+_MAX_ROWS_PER_INSERT = 500  # višeredni VALUES: isti oblik statement-a za pune blokove (keš statement-a)
+
 
 def _safe_ident(name: str) -> str:
     if not _SAFE_IDENT.match(name or ""):
@@ -30,6 +42,15 @@ def _safe_ident(name: str) -> str:
     return name
 
 
+def _writes(fn):
+    """Metoda piše kroz writer konekciju: čeka da druge niti završe svoje transakcije."""
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
 class SQLiteDriver(BaseDBDriver):
     """
     Kompatibilan sa postojećim kodom:
@@ -40,8 +61,23 @@ class SQLiteDriver(BaseDBDriver):
       - bulk_insert(records: List[dict]) -> List[int]
       - bulk_update(ids: List[int], patch: Dict[str, Any]) -> int
       - count(table, where=None) -> int  (brzi COUNT(*))
+      - create_index/drop_index/list_indexes(table, field)
+      - find_by_pk(table, id) -> Optional[dict]
+      - iter(table, query) -> Iterator[dict]  (strim kroz kursor)
+
+    Konekcije:
+      - self.conn je jedina writer konekcija; svi upisi i transakcije idu kroz nju pod
+        lock-om instance (ranije: _LOCK zajednički za sve instance klase)
+      - čitanja van transakcije pozajmljuju reader konekciju iz pool-a od najviše
+        SQLITE_READ_POOL (read_pool_size, podrazumevano 4) konekcija (otvaraju se lenjo,
+        PRAGMA query_only) — u WAL režimu čitaoci rade paralelno međusobno i sa piscem
+        i vide samo potvrđene podatke; ugnježdeno čitanje iste niti koristi istu konekciju
+      - nit koja je u transakciji čita kroz writer konekciju (vidi svoje nepotvrđene izmene)
+      - reader konekcije samo kad je journal_mode writer-a 'wal'; u ostalim režimima
+        (SQLITE_JOURNAL_MODE=delete, SQLITE_WAL=false) sve čita kroz self.conn
+      - pun pool: čeka se najviše busy_timeout, pa RuntimeError (umesto večnog čekanja)
+      - SQLITE_READ_CONNECTIONS=false (.env) ili read_connections=False -> sve kroz self.conn
     """
-    _LOCK = threading.RLock()
 
     def __init__(self, **params):
         db_path = params.get("path")
@@ -66,13 +102,38 @@ class SQLiteDriver(BaseDBDriver):
         self.conn = sqlite3.connect(self.db_file, isolation_level=None, timeout=5.0, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
 
-        self._apply_pragmas()
+        self._apply_pragmas(self.conn)
+        self._busy_timeout_s = self._busy_timeout_ms() / 1000.0
 
         self._last_ids: Dict[str, int] = {}
+        # RETURNING: podrazumevano po verziji biblioteke; returning=False forsira stari put
+        returning = params.get("returning")
+        self._returning = _HAS_RETURNING if returning is None else (bool(returning) and _HAS_RETURNING)
+        self._bulk_chunk = int(params.get("bulk_chunk") or EnvLoader.get("SQLITE_BULK_CHUNK", "5000") or 5000)
         self._tx_depth = 0  # za savepoint-e
+        self._tx_owner: Optional[int] = None  # nit koja drži otvorenu transakciju
+        self._write_lock = threading.RLock()  # writer konekcija: jedna nit (transakcija) u datom trenutku
+
+        # pool reader konekcija (lenjo, najviše _pool_size)
+        # reader konekcije samo u WAL režimu: u ostalim režimima otvoreno čitanje drži SHARED lock
+        # i upis writer-a čeka busy_timeout pa pada sa "database is locked" -> čitanje kroz writer
+        readers = params.get("read_connections")
+        self._use_readers = (
+            EnvLoader.get_bool("SQLITE_READ_CONNECTIONS", True) if readers is None else bool(readers)
+        ) and self._journal_mode() == "wal"
+        self._pool_size = max(1, int(params.get("read_pool_size") or EnvLoader.get("SQLITE_READ_POOL", "4") or 4))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._local = threading.local()  # konekcija koju tekuća nit trenutno drži
+        self._readers: List[sqlite3.Connection] = []  # sve otvorene (za close)
+        self._readers_lock = threading.Lock()
+
+        # keš šeme (writer konekcija): tabela -> skup kolona; važi dok se schema_version ne promeni
+        self._schema: Dict[str, Set[str]] = {}
+        self._unique_indexes: Set[str] = set()  # poznati UNIQUE indeksi za upsert
+        self._schema_version: Optional[int] = None
 
     # --- PRAGMA podešavanja (tunable preko .env) ---
-    def _apply_pragmas(self) -> None:
+    def _apply_pragmas(self, conn: sqlite3.Connection, reader: bool = False) -> None:
         """
         Podržava sledeće .env varijable (sve opcione):
           - SQLITE_JOURNAL_MODE=wal|delete|truncate|persist|off|memory
@@ -83,38 +144,17 @@ class SQLiteDriver(BaseDBDriver):
           - SQLITE_CACHE_PAGES=20000   (broj stranica u cache-u; koristi se negativna vrednost u PRAGMA)
           - SQLITE_CACHE_SIZE=20000    (KB; biće konvertovan u negativnu vrednost za PRAGMA)
           - SQLITE_BUSY_TIMEOUT_MS=4000
+        Reader konekcije (reader=True) preskaču podešavanja fajla (journal_mode,
+        synchronous, page_size) i dobijaju PRAGMA query_only.
         """
-        cur = self.conn.cursor()
+        cur = conn.cursor()
         try:
             # Uključi FK
             cur.execute("PRAGMA foreign_keys = ON;")
-
-            # Journal mode: prioritet ima eksplicitni JOURNAL_MODE, zatim boolean SQLITE_WAL
-            jm = EnvLoader.get("SQLITE_JOURNAL_MODE", None)
-            if jm:
-                jm = str(jm).strip().lower()
-                cur.execute(f"PRAGMA journal_mode = {jm};")
+            if reader:
+                cur.execute("PRAGMA query_only = ON;")
             else:
-                wal_on = EnvLoader.get_bool("SQLITE_WAL", True)
-                if wal_on:
-                    try:
-                        cur.execute("PRAGMA journal_mode = wal;")
-                    except sqlite3.Error:
-                        pass  # fallback ispod
-
-            # Synchronous
-            sync = (EnvLoader.get("SQLITE_SYNCHRONOUS", "NORMAL") or "NORMAL").upper()
-            if sync not in ("OFF", "NORMAL", "FULL", "EXTRA"):
-                sync = "NORMAL"
-            cur.execute(f"PRAGMA synchronous = {sync};")
-
-            # Page size (pre kreiranja tabela ima efekta; pylno ok i posle)
-            page_size = EnvLoader.get("SQLITE_PAGE_SIZE", None)
-            if page_size and str(page_size).isdigit():
-                try:
-                    cur.execute(f"PRAGMA page_size = {int(page_size)};")
-                except sqlite3.Error:
-                    pass
+                self._apply_file_pragmas(cur)
 
             # Cache: ili broj stranica (CACHE_PAGES) ili KB (CACHE_SIZE)
             cache_pages = EnvLoader.get("SQLITE_CACHE_PAGES", None)
@@ -136,17 +176,116 @@ class SQLiteDriver(BaseDBDriver):
                 cur.execute(f"PRAGMA temp_store = {temp_store};")
 
             # Busy timeout
+            cur.execute(f"PRAGMA busy_timeout = {self._busy_timeout_ms()};")
+
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _busy_timeout_ms() -> int:
+        try:
+            return int(EnvLoader.get("SQLITE_BUSY_TIMEOUT_MS", "4000") or 4000)
+        except ValueError:
+            return 4000
+
+    def _journal_mode(self) -> str:
+        """Stvarni journal_mode writer konekcije (PRAGMA može tiho da ostane na starom režimu)."""
+        cur = self.conn.cursor()
+        try:
+            row = cur.execute("PRAGMA journal_mode;").fetchone()
+            return str(row[0]).lower() if row else ""
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _apply_file_pragmas(cur: sqlite3.Cursor) -> None:
+        """PRAGMA-e koje važe za ceo fajl / writer konekciju."""
+        # Journal mode: prioritet ima eksplicitni JOURNAL_MODE, zatim boolean SQLITE_WAL
+        jm = EnvLoader.get("SQLITE_JOURNAL_MODE", None)
+        if jm:
+            jm = str(jm).strip().lower()
+            cur.execute(f"PRAGMA journal_mode = {jm};")
+        else:
+            wal_on = EnvLoader.get_bool("SQLITE_WAL", True)
+            if wal_on:
+                try:
+                    cur.execute("PRAGMA journal_mode = wal;")
+                except sqlite3.Error:
+                    pass  # fallback ispod
+
+        # Synchronous
+        sync = (EnvLoader.get("SQLITE_SYNCHRONOUS", "NORMAL") or "NORMAL").upper()
+        if sync not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            sync = "NORMAL"
+        cur.execute(f"PRAGMA synchronous = {sync};")
+
+        # Page size (pre kreiranja tabela ima efekta; pylno ok i posle)
+        page_size = EnvLoader.get("SQLITE_PAGE_SIZE", None)
+        if page_size and str(page_size).isdigit():
             try:
-                bt = int(EnvLoader.get("SQLITE_BUSY_TIMEOUT_MS", "4000") or 4000)
-            except ValueError:
-                bt = 4000
-            cur.execute(f"PRAGMA busy_timeout = {bt};")
+                cur.execute(f"PRAGMA page_size = {int(page_size)};")
+            except sqlite3.Error:
+                pass
+
+    # --- konekcije ---
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if len(self._readers) < self._pool_size:
+                conn = sqlite3.connect(self.db_file, isolation_level=None, timeout=5.0, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                self._apply_pragmas(conn, reader=True)
+                self._readers.append(conn)
+                return conn
+        # pool je pun -> čekaj da se neka konekcija vrati, ali ne duže od busy_timeout
+        # (npr. nedovršeni iter() generatori drugih niti drže sve konekcije)
+        try:
+            return self._idle.get(timeout=self._busy_timeout_s)
+        except queue.Empty:
+            raise RuntimeError(
+                f"SQLite reader pool iscrpljen: svih {self._pool_size} konekcija je zauzeto duže od "
+                f"{self._busy_timeout_s:g}s (nedovršeni iter() generatori?). "
+                f"Povećaj SQLITE_READ_POOL / read_pool_size ili zatvori generatore."
+            ) from None
 
+    @contextmanager
+    def _read_cursor(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Kursor za čitanje: writer konekcija ako je tekuća nit u transakciji, inače
+        pozajmljena reader konekcija (vraća se u pool na kraju; ugnježdeno čitanje iste
+        niti, npr. find_by_pk usred iter(), koristi istu konekciju).
+        """
+        if not self._use_readers or self._tx_owner == threading.get_ident():
+            conn, owned = self.conn, False
+        else:
+            conn = getattr(self._local, "conn", None)
+            owned = conn is None
+            if owned:
+                conn = self._local.conn = self._checkout()
+        cur = conn.cursor()
+        try:
+            yield cur
         finally:
             cur.close()
+            if owned:
+                if getattr(self._local, "conn", None) is conn:
+                    self._local.conn = None
+                self._idle.put(conn)
 
     # --- lifecycle ---
     def close(self) -> None:
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+            self._idle = queue.LifoQueue()
+        for conn in readers:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
         try:
             self.conn.close()
         except Exception:
@@ -171,11 +310,12 @@ class SQLiteDriver(BaseDBDriver):
     # --- transakcije (sa savepointima) ---
     @contextmanager
     def transaction(self):
-        with self._LOCK:
+        with self._write_lock:
             cur = self.conn.cursor()
             try:
                 if self._tx_depth == 0:
                     cur.execute("BEGIN;")
+                    self._tx_owner = threading.get_ident()
                 else:
                     cur.execute(f"SAVEPOINT sp_{self._tx_depth+1};")
                 self._tx_depth += 1
@@ -191,8 +331,11 @@ class SQLiteDriver(BaseDBDriver):
                     cur.execute("ROLLBACK;")
                 else:
                     cur.execute(f"ROLLBACK TO SAVEPOINT sp_{self._tx_depth+1};")
+                self._forget_schema()  # rollback poništava i DDL (ADD COLUMN) iz transakcije
                 raise
             finally:
+                if self._tx_depth == 0:
+                    self._tx_owner = None
                 cur.close()
 
     # --- helpers ---
@@ -202,22 +345,30 @@ class SQLiteDriver(BaseDBDriver):
           - fiksne kolone: id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT, updated_at TEXT
           - dinamične kolone izvedene iz sample keys (TEXT/INTEGER/REAL)
         Ako tabela ne postoji → kreiraj; ako kolona fali → ALTER TABLE ADD COLUMN.
+
+        Poznate tabele/kolone se keširaju: kad su sve kolone iz sample-a već viđene,
+        ne šalje se nijedan statement (insert = jedan INSERT). DDL ide samo za nove kolone.
         """
         t = _safe_ident(table)
-        cur = self.conn.cursor()
-
-        cur.execute(f"""
-            CREATE TABLE IF NOT EXISTS "{t}" (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                created_at TEXT,
-                updated_at TEXT
-            );
-        """)
+        cols = self._schema.get(t)
+        if cols is not None and (not sample or cols.issuperset(sample.keys())):
+            return
 
-        if sample:
+        cur = self.conn.cursor()
+        try:
+            # nova kolona (ili prvi put) → pročitaj stvarno stanje, možda ju je dodala druga konekcija
             cur.execute(f'PRAGMA table_info("{t}");')
             existing_cols = {row["name"] for row in cur.fetchall()}
-            for k, v in sample.items():
+            if not existing_cols:
+                cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS "{t}" (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        created_at TEXT,
+                        updated_at TEXT
+                    );
+                """)
+                existing_cols = {"id", "created_at", "updated_at"}
+            for k, v in (sample or {}).items():
                 if k in ("id", "created_at", "updated_at"):
                     continue
                 if k not in existing_cols:
@@ -227,8 +378,71 @@ class SQLiteDriver(BaseDBDriver):
                     elif isinstance(v, int): sqltype = "INTEGER"
                     elif isinstance(v, float): sqltype = "REAL"
                     cur.execute(f'ALTER TABLE "{t}" ADD COLUMN "{col}" {sqltype};')
+                    existing_cols.add(k)
+
+            self._schema[t] = existing_cols
+            self._schema_version = self._read_schema_version(cur)
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _read_schema_version(cur: sqlite3.Cursor) -> int:
+        return int(cur.execute("PRAGMA schema_version;").fetchone()[0])
 
-        cur.close()
+    def _forget_schema(self) -> None:
+        self._schema.clear()
+        self._unique_indexes.clear()
+        self._schema_version = None
+
+    def _schema_changed(self) -> bool:
+        """
+        Da li se šema promenila mimo keša (druga konekcija/proces, DROP/ALTER spolja).
+        Ako jeste → keš se briše. Poziva se tek kad statement padne, ne pri svakom upisu.
+        """
+        if self._schema_version is None:
+            return False
+        cur = self.conn.cursor()
+        try:
+            changed = self._read_schema_version(cur) != self._schema_version
+        finally:
+            cur.close()
+        if changed:
+            self._forget_schema()
+        return changed
+
+    def _execute_schema(self, cur: sqlite3.Cursor, table: str, sample: Optional[Dict[str, Any]], run,
+                        unique_by: Optional[List[str]] = None):
+        """
+        Izvrši run(cur); ako padne na nepostojećoj tabeli/koloni (ili UNIQUE indeksu za upsert),
+        a šema je u međuvremenu promenjena, osveži keš (_ensure_table) i pokušaj još jednom.
+        """
+        try:
+            return run(cur)
+        except sqlite3.OperationalError:
+            if not self._schema_changed():
+                raise
+            self._ensure_table(table, sample=sample)
+            if unique_by:
+                self._ensure_unique_index(table, unique_by)
+            return run(cur)
+
+    def _note_ddl(self) -> None:
+        """Posle sopstvenog DDL-a (indeksi) zapamti novu verziju šeme — keš kolona i dalje važi."""
+        if self._schema_version is None:
+            return
+        cur = self.conn.cursor()
+        try:
+            self._schema_version = self._read_schema_version(cur)
+        finally:
+            cur.close()
+
+    @staticmethod
+    def _insert_sql(t: str, cols: List[str], rows: int = 1, returning: str = "") -> str:
+        if not cols:
+            return f'INSERT INTO "{t}" DEFAULT VALUES{returning};'
+        cols_q = ", ".join([f'"{_safe_ident(c)}"' for c in cols])
+        one = "(" + ", ".join(["?"] * len(cols)) + ")"
+        return f'INSERT INTO "{t}" ({cols_q}) VALUES {", ".join([one] * rows)}{returning};'
 
     def _insert(self, table: str, data: Dict[str, Any]) -> int:
         t = _safe_ident(table)
@@ -236,43 +450,105 @@ class SQLiteDriver(BaseDBDriver):
 
         cols = [k for k in data.keys()]
         vals = [data[k] for k in cols]
-        cols_q = ", ".join([f'"{_safe_ident(c)}"' for c in cols])
-        params_q = ", ".join(["?"] * len(vals))
+        sql = self._insert_sql(t, cols)
 
         cur = self.conn.cursor()
         try:
-            cur.execute(f'INSERT INTO "{t}" ({cols_q}) VALUES ({params_q});', vals)
-            last_id = self.conn.execute("SELECT last_insert_rowid();").fetchone()[0]
+            self._execute_schema(cur, t, data, lambda c: c.execute(sql, vals))
+            last_id = cur.lastrowid  # bez dodatnog SELECT last_insert_rowid()
             self._last_ids[t] = int(last_id)
             return int(last_id)
         finally:
             cur.close()
 
+    def _insert_returning(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """INSERT ... RETURNING * — jedan statement vraća ceo upisani red (SQLite >= 3.35)."""
+        t = _safe_ident(table)
+        self._ensure_table(t, sample=data)
+
+        cols = [k for k in data.keys()]
+        vals = [data[k] for k in cols]
+        sql = self._insert_sql(t, cols, returning=" RETURNING *")
+
+        cur = self.conn.cursor()
+        try:
+            self._execute_schema(cur, t, data, lambda c: c.execute(sql, vals))
+            row = cur.fetchone()
+            cur.fetchall()  # dovrši statement (autocommit se potvrđuje tek kad se kursor isprazni)
+            out = {k: row[k] for k in row.keys()}
+            self._last_ids[t] = int(out["id"])
+            return out
+        finally:
+            cur.close()
+
     def _insert_many(self, table: str, rows: List[Dict[str, Any]]) -> List[int]:
-        """Brz batch insert — koristi jedan pripremljen statement + executemany."""
+        """
+        Brz batch insert. Vraća id-jeve tačnim redosledom ulaza — bez pretpostavke da su uzastopni.
+          - redovi sa zadatim "id": executemany (id-jevi su poznati iz ulaza)
+          - ostali, uz RETURNING: višeredni INSERT ... VALUES (...), (...) RETURNING id u blokovima
+            (id-jevi iz AUTOINCREMENT-a rastu redosledom upisa → sortiraju se, jer redosled
+            RETURNING izlaza SQLite ne garantuje)
+          - ostali, stari SQLite: statement po redu + lastrowid
+        Uzastopni redovi iste vrste idu zajedno, pa je redosled upisa isti kao u ulazu.
+        Kolone su unija ključeva svih redova bloka (redosled prvog pojavljivanja); red bez
+        nekog ključa upisuje NULL (bez "id" -> AUTOINCREMENT), pa se nijedan podatak ne gubi.
+        """
         if not rows:
             return []
 
         t = _safe_ident(table)
-        self._ensure_table(t, sample=rows[0])
-
-        cols = list(rows[0].keys())
-        cols_q = ", ".join([f'"{_safe_ident(c)}"' for c in cols])
-        params_q = ", ".join(["?"] * len(cols))
+        # uzorak za šemu: prva ne-None vrednost po koloni (tip kolone za ALTER TABLE)
+        sample: Dict[str, Any] = {}
+        for r in rows:
+            for k, v in r.items():
+                if sample.get(k) is None:
+                    sample[k] = v
+        self._ensure_table(t, sample=sample)
+
+        cols = list(sample.keys())
         values = [[r.get(c) for c in cols] for r in rows]
+        id_pos = cols.index("id") if "id" in cols else None
+        ids: List[int] = []
 
         cur = self.conn.cursor()
         try:
-            cur.executemany(f'INSERT INTO "{t}" ({cols_q}) VALUES ({params_q});', values)
-            last = self.conn.execute("SELECT last_insert_rowid();").fetchone()[0]
-            n = len(rows)
-            ids = list(range(int(last) - n + 1, int(last) + 1))
+            groups = (
+                itertools.groupby(values, key=lambda v: v[id_pos] is not None)
+                if id_pos is not None else [(False, values)]
+            )
+            for explicit, group in groups:
+                block = list(group)
+                if explicit:
+                    sql = self._insert_sql(t, cols)
+                    self._execute_schema(cur, t, sample, lambda c: c.executemany(sql, block))
+                    ids.extend(int(v[id_pos]) for v in block)
+                elif self._returning and cols:
+                    ids.extend(self._insert_returning_ids(cur, t, cols, block, sample))
+                else:
+                    sql = self._insert_sql(t, cols)
+                    for vals in block:
+                        self._execute_schema(cur, t, sample, lambda c: c.execute(sql, vals))
+                        ids.append(int(cur.lastrowid))
             if ids:
-                self._last_ids[t] = ids[-1]
+                self._last_ids[t] = max(ids)
             return ids
         finally:
             cur.close()
 
+    def _insert_returning_ids(self, cur: sqlite3.Cursor, t: str, cols: List[str],
+                              values: List[List[Any]], sample: Dict[str, Any]) -> List[int]:
+        per = max(1, min(_MAX_ROWS_PER_INSERT, _MAX_VARS // len(cols)))
+        full_sql = self._insert_sql(t, cols, rows=per, returning=" RETURNING id")
+        ids: List[int] = []
+        for i in range(0, len(values), per):
+            block = values[i:i + per]
+            sql = full_sql if len(block) == per else \
+                self._insert_sql(t, cols, rows=len(block), returning=" RETURNING id")
+            flat = [v for row in block for v in row]
+            self._execute_schema(cur, t, sample, lambda c: c.execute(sql, flat))
+            ids.extend(sorted(int(r[0]) for r in cur.fetchall()))
+        return ids
+
     def _update(self, table: str, id_value: Any, data: Dict[str, Any]) -> bool:
         t = _safe_ident(table)
         if not data:
@@ -310,7 +586,48 @@ class SQLiteDriver(BaseDBDriver):
         finally:
             cur.close()
 
-    def _select(
+    @staticmethod
+    def _where_sql(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """WHERE klauzula iz where dict-a (jednakost ili {op: val}) → ("WHERE ...", params) ili ("", [])."""
+        params: List[Any] = []
+        if not where:
+            return "", params
+        clauses: List[str] = []
+        for k, v in where.items():
+            col = _safe_ident(k)
+            if isinstance(v, dict):
+                for op, val in v.items():
+                    if op in ("=", "!=", "<", "<=", ">", ">="):
+                        clauses.append(f'"{col}" {op} ?')
+                        params.append(val)
+                    elif op == "in":
+                        if not val:
+                            clauses.append("1=0")
+                        else:
+                            placeholders = ", ".join(["?"] * len(val))
+                            clauses.append(f'"{col}" IN ({placeholders})')
+                            params.extend(list(val))
+                    elif op == "like":
+                        clauses.append(f'"{col}" LIKE ?')
+                        params.append(f"%{val}%")
+                    elif op == "startswith":
+                        clauses.append(f'"{col}" LIKE ?')
+                        params.append(f"{val}%")
+                    elif op == "endswith":
+                        clauses.append(f'"{col}" LIKE ?')
+                        params.append(f"%{val}")
+                    elif op == "contains":
+                        clauses.append(f'"{col}" LIKE ?')
+                        params.append(f"%{val}%")
+                    else:
+                        clauses.append(f'"{col}" = ?')
+                        params.append(val)
+            else:
+                clauses.append(f'"{col}" = ?')
+                params.append(v)
+        return ("WHERE " + " AND ".join(clauses), params) if clauses else ("", params)
+
+    def _build_select(
         self,
         table: str,
         where: Optional[Dict[str, Any]] = None,
@@ -319,7 +636,7 @@ class SQLiteDriver(BaseDBDriver):
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         select_fields: Optional[List[str]] = None
-    ):
+    ) -> Tuple[str, List[Any]]:
         t = _safe_ident(table)
 
         sel = "*"
@@ -327,44 +644,9 @@ class SQLiteDriver(BaseDBDriver):
             sel = ", ".join([f'"{_safe_ident(c)}"' for c in select_fields])
 
         sql = [f'SELECT {sel} FROM "{t}"']
-        params: List[Any] = []
-
-        if where:
-            clauses: List[str] = []
-            for k, v in where.items():
-                col = _safe_ident(k)
-                if isinstance(v, dict):
-                    for op, val in v.items():
-                        if op in ("=", "!=", "<", "<=", ">", ">="):
-                            clauses.append(f'"{col}" {op} ?')
-                            params.append(val)
-                        elif op == "in":
-                            if not val:
-                                clauses.append("1=0")
-                            else:
-                                placeholders = ", ".join(["?"] * len(val))
-                                clauses.append(f'"{col}" IN ({placeholders})')
-                                params.extend(list(val))
-                        elif op == "like":
-                            clauses.append(f'"{col}" LIKE ?')
-                            params.append(f"%{val}%")
-                        elif op == "startswith":
-                            clauses.append(f'"{col}" LIKE ?')
-                            params.append(f"{val}%")
-                        elif op == "endswith":
-                            clauses.append(f'"{col}" LIKE ?')
-                            params.append(f"%{val}")
-                        elif op == "contains":
-                            clauses.append(f'"{col}" LIKE ?')
-                            params.append(f"%{val}%")
-                        else:
-                            clauses.append(f'"{col}" = ?')
-                            params.append(val)
-                else:
-                    clauses.append(f'"{col}" = ?')
-                    params.append(v)
-            if clauses:
-                sql.append("WHERE " + " AND ".join(clauses))
+        where_sql, params = self._where_sql(where)
+        if where_sql:
+            sql.append(where_sql)
 
         if order_by:
             ob = order_by.strip().split()
@@ -380,13 +662,22 @@ class SQLiteDriver(BaseDBDriver):
             if offset is not None:
                 sql.append(f"OFFSET {int(offset)}")
 
-        final = " ".join(sql) + ";"
-        cur = self.conn.cursor()
-        try:
+        return " ".join(sql) + ";", params
+
+    def _select(
+        self,
+        table: str,
+        where: Optional[Dict[str, Any]] = None,
+        first: bool = False,
+        order_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        select_fields: Optional[List[str]] = None
+    ):
+        final, params = self._build_select(table, where, first, order_by, limit, offset, select_fields)
+        with self._read_cursor() as cur:
             cur.execute(final, params)
             rows = cur.fetchall()
-        finally:
-            cur.close()
 
         def to_dict(row: sqlite3.Row):
             return {k: row[k] for k in row.keys()}
@@ -396,7 +687,10 @@ class SQLiteDriver(BaseDBDriver):
         return [to_dict(r) for r in rows]
 
     # --- CRUD (kompatibilno ponašanje) ---
+    @_writes
     def create(self, table: str, data: Dict[str, Any]):
+        if self._returning:
+            return self._insert_returning(table, dict(data or {}))
         new_id = self._insert(table, dict(data or {}))
         return self._select(table, where={"id": new_id}, first=True)
 
@@ -421,30 +715,62 @@ class SQLiteDriver(BaseDBDriver):
             select_fields=select_fields
         )
 
+    def find_by_pk(self, table: str, id_value: Any) -> Optional[Dict[str, Any]]:
+        """Direktan lookup po INTEGER PRIMARY KEY (rowid) bez QuerySpec/where obrade."""
+        t = _safe_ident(table)
+        try:
+            with self._read_cursor() as cur:
+                cur.execute(f'SELECT * FROM "{t}" WHERE id = ? LIMIT 1;', (id_value,))
+                row = cur.fetchone()
+        except sqlite3.OperationalError:
+            return None  # tabela još ne postoji
+        return {k: row[k] for k in row.keys()} if row else None
+
+    def iter(self, table: str, query: Optional[Dict[str, Any]] = None, chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Strimuj redove upita kroz kursor (fetchmany) umesto fetchall()."""
+        q = dict(query or {})
+        if "id" in q and "where" not in q:
+            q["where"] = {"id": q.pop("id")}
+        final, params = self._build_select(
+            table,
+            where=q.get("where") or {},
+            order_by=q.get("order_by"),
+            limit=q.get("limit"),
+            offset=q.get("offset"),
+            select_fields=q.get("select"),
+        )
+        with self._read_cursor() as cur:
+            cur.execute(final, params)
+            while True:
+                batch = cur.fetchmany(chunk_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield {k: row[k] for k in row.keys()}
+
     # --- NOVO: brzi COUNT(*) sa opcionim where filterom ---
     def count(self, table: str, where: dict | None = None) -> int:
         t = _safe_ident(table)
-        sql = f'SELECT COUNT(*) FROM "{t}"'
-        params: List[Any] = []
-        if where:
-            clauses: List[str] = []
-            for k, v in where.items():
-                col = _safe_ident(k)
-                clauses.append(f'"{col}" = ?')
-                params.append(v)
-            if clauses:
-                sql += " WHERE " + " AND ".join(clauses)
-        cur = self.conn.cursor()
-        try:
+        where_sql, params = self._where_sql(where)
+        sql = f'SELECT COUNT(*) FROM "{t}" {where_sql}'.rstrip()
+        with self._read_cursor() as cur:
             cur.execute(sql + ";", params)
             row = cur.fetchone()
             return int(row[0]) if row else 0
-        finally:
-            cur.close()
 
+    def exists(self, table: str, where: dict | None = None) -> bool:
+        t = _safe_ident(table)
+        where_sql, params = self._where_sql(where)
+        sql = f'SELECT 1 FROM "{t}" {where_sql}'.rstrip()
+        with self._read_cursor() as cur:
+            cur.execute(sql + " LIMIT 1;", params)
+            return cur.fetchone() is not None
+
+    @_writes
     def update(self, table: str, id_value: Any, data: Dict[str, Any]) -> bool:
         return self._update(table, id_value, dict(data or {}))
 
+    @_writes
     def delete(self, table: str, id_value: Any) -> bool:
         return self._delete(table, id_value)
 
@@ -468,12 +794,29 @@ class SQLiteDriver(BaseDBDriver):
         )
 
     # --- Brze batch operacije ---
-    def bulk_insert(self, table: str, records: List[Dict[str, Any]]) -> List[int]:
-        if not records:
-            return []
-        with self.transaction():
-            return self._insert_many(table, records)
+    @_writes
+    def bulk_insert(
+        self,
+        table: str,
+        records: Iterable[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        commit_every_chunk: bool = False,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> List[int]:
+        """
+        Upis liste ili generatora u blokovima od chunk_size (SQLITE_BULK_CHUNK / bulk_chunk) redova;
+        u memoriji su samo parametri tekućeg bloka (COMMIT po bloku samo uz commit_every_chunk=True).
+        Vidi BaseDBDriver._insert_chunked.
+        """
+        return self._insert_chunked(
+            records,
+            lambda chunk: self._insert_many(table, chunk),
+            chunk_size or self._bulk_chunk,
+            commit_every_chunk,
+            progress,
+        )
 
+    @_writes
     def bulk_update(self, table: str, ids: List[int], patch: Dict[str, Any]) -> int:
         if not ids or not patch:
             return 0
@@ -481,6 +824,7 @@ class SQLiteDriver(BaseDBDriver):
             return self._bulk_update(table, ids, patch)
     
     # --- Brze batch operacije (dopune) ---
+    @_writes
     def bulk_delete(self, table: str, ids: List[int]) -> int:
         if not ids:
             return 0
@@ -500,6 +844,8 @@ class SQLiteDriver(BaseDBDriver):
         t = _safe_ident(table)
         cols_safe = [_safe_ident(c) for c in cols]
         idx = f"uniq_{t}__{'__'.join(cols_safe)}"
+        if idx in self._unique_indexes:
+            return idx
         cur = self.conn.cursor()
         try:
             # proveri da li postoji
@@ -508,13 +854,66 @@ class SQLiteDriver(BaseDBDriver):
             if idx not in existing:
                 cols_sql = ", ".join([f'"{c}"' for c in cols_safe])
                 cur.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{idx}" ON "{t}" ({cols_sql});')
+                self._note_ddl()
+            if self._schema_version is not None:
+                self._unique_indexes.add(idx)
             return idx
         finally:
             cur.close()
 
+    # --- Sekundarni indeksi (isti API kao JSONDriver) ---
+    @_writes
+    def create_index(self, table: str, field: str, kind: str = "hash") -> bool:
+        """
+        CREATE INDEX nad kolonom. Vraća False ako tabela/kolona (još) ne postoji ili indeks već postoji.
+        kind se prihvata radi paritetnog API-ja — B-tree indeks služi i za jednakost i za range/ORDER BY.
+        """
+        t = _safe_ident(table)
+        col = _safe_ident(field)
+        idx = f"idx_{t}__{col}"
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f'PRAGMA table_info("{t}");')
+            if col not in {row["name"] for row in cur.fetchall()}:
+                return False  # tabela ili kolona još ne postoji (ne kreira se ovde)
+            cur.execute(f'PRAGMA index_list("{t}");')
+            if idx in {row["name"] for row in cur.fetchall()}:
+                return False
+            cur.execute(f'CREATE INDEX IF NOT EXISTS "{idx}" ON "{t}" ("{col}");')
+            self._note_ddl()
+            return True
+        finally:
+            cur.close()
+
+    @_writes
+    def drop_index(self, table: str, field: str, kind: str = "hash") -> bool:
+        t = _safe_ident(table)
+        idx = f"idx_{t}__{_safe_ident(field)}"
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f'PRAGMA index_list("{t}");')
+            if idx not in {row["name"] for row in cur.fetchall()}:
+                return False
+            cur.execute(f'DROP INDEX IF EXISTS "{idx}";')
+            self._note_ddl()
+            return True
+        finally:
+            cur.close()
+
+    def list_indexes(self, table: str, kind: str = "hash") -> List[str]:
+        t = _safe_ident(table)
+        prefix = f"idx_{t}__"
+        # sqlite_master umesto PRAGMA index_list: PRAGMA rezultat reader konekcije ostaje zastareo
+        # posle DDL-a writer-a (ne proverava schema cookie), SELECT ponovo učitava šemu
+        with self._read_cursor() as cur:
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?;", (t,))
+            return [row["name"][len(prefix):] for row in cur.fetchall() if row["name"].startswith(prefix)]
+
+    @_writes
     def upsert(self, table: str, data: Dict[str, Any], unique_by: List[str]):
         """
-        Native UPSERT preko ON CONFLICT. Vraća kompletan red posle upserta.
+        Native UPSERT preko ON CONFLICT. Vraća kompletan red posle upserta
+        (RETURNING * kad ga biblioteka podržava, inače ponovni SELECT po unique_by).
         """
         if not unique_by:
             raise ValueError("unique_by je obavezan za upsert() u SQLiteDriver")
@@ -536,54 +935,118 @@ class SQLiteDriver(BaseDBDriver):
         sql = f'''
             INSERT INTO "{t}" ({cols_sql}) VALUES ({params_sql})
             ON CONFLICT ({", ".join([f'"{_safe_ident(c)}"' for c in unique_by])})
-            DO UPDATE SET {set_sql};
+            DO UPDATE SET {set_sql}{" RETURNING *" if self._returning else ""};
         '''
         with self.transaction():
             cur = self.conn.cursor()
             try:
-                cur.execute(sql, vals)
+                self._execute_schema(cur, t, data, lambda c: c.execute(sql, vals), unique_by=unique_by)
+                row = cur.fetchone() if self._returning else None
             finally:
                 cur.close()
+        if row is not None:
+            return {k: row[k] for k in row.keys()}
 
         # vrati upsertovani red na osnovu unique_by filtera
         where = {k: data[k] for k in unique_by}
         return self._select(t, where=where, first=True)
     
+    @_writes
     def bulk_upsert(self, table: str, records: List[Dict[str, Any]], unique_by: List[str]) -> Dict[str, int]:
+        """
+        Set-based UPSERT (jedna transakcija, bez SELECT-a po redu). Brojanje created/updated:
+          - RETURNING: višeredni INSERT ... ON CONFLICT DO UPDATE ... RETURNING id u blokovima;
+            AUTOINCREMENT daje novim redovima id > MAX(id) pre upisa → to su "created"
+            (isti ključ dva puta u ulazu: prvi je created, ostali updated — kao upsert po redu)
+          - eksplicitni "id" u redovima ili stari SQLite: postojeći ključevi se pronađu JOIN-om
+            preko privremene tabele, a upsert ide kroz executemany
+        Uzastopni redovi sa istim skupom ključeva čine jedan set-based blok; red bez neke
+        kolone ne menja tu kolonu postojećeg reda.
+        """
         if not records:
             return {"created": 0, "updated": 0}
+        if not unique_by:
+            raise ValueError("unique_by je obavezan za bulk_upsert() u SQLiteDriver")
         t = _safe_ident(table)
-        self._ensure_table(t, sample=records[0])
+        # redovi sa istim skupom ključeva idu zajedno (uzastopno, redosled ulaza ostaje): kolona
+        # koje red nema ne sme da pregazi postojeću vrednost sa NULL, niti da se izgubi
+        groups = [list(g) for _, g in itertools.groupby(records, key=lambda r: frozenset(r.keys()))]
+        sample: Dict[str, Any] = {}
+        for r in records:
+            for k, v in r.items():
+                if sample.get(k) is None:
+                    sample[k] = v
+        self._ensure_table(t, sample=sample)
         self._ensure_unique_index(t, unique_by)
 
-        cols = list(records[0].keys())
-        cols_sql = ", ".join([f'"{_safe_ident(c)}"' for c in cols])
-        params_sql = ", ".join(["?"] * len(cols))
-        update_cols = [c for c in cols if c not in set(["id", *unique_by])]
-        set_sql = ", ".join([f'"{_safe_ident(c)}"=excluded."{_safe_ident(c)}"' for c in update_cols]) or '"id"="id"'
-
-        sql = f'''
-            INSERT INTO "{t}" ({cols_sql}) VALUES ({params_sql})
-            ON CONFLICT ({", ".join([f'"{_safe_ident(c)}"' for c in unique_by])})
-            DO UPDATE SET {set_sql};
-        '''
-
         created = 0
-        updated = 0
         with self.transaction():
             cur = self.conn.cursor()
             try:
-                for r in records:
-                    vals = [r.get(c) for c in cols]
-                    before = self._select(t, where={k: r[k] for k in unique_by}, first=True)
-                    cur.execute(sql, vals)
-                    after = self._select(t, where={k: r[k] for k in unique_by}, first=True)
-                    if before is None and after is not None:
-                        created += 1
-                    elif before is not None:
-                        updated += 1
+                for group in groups:
+                    created += self._upsert_group(cur, t, group, unique_by)
             finally:
                 cur.close()
-        return {"created": created, "updated": updated}
+        return {"created": created, "updated": len(records) - created}
+
+    def _upsert_group(self, cur: sqlite3.Cursor, t: str, records: List[Dict[str, Any]],
+                      unique_by: List[str]) -> int:
+        """Set-based upsert redova sa istim ključevima (vidi bulk_upsert). Vraća broj novih redova."""
+        cols = list(records[0].keys())
+        cols_sql = ", ".join([f'"{_safe_ident(c)}"' for c in cols])
+        update_cols = [c for c in cols if c not in set(["id", *unique_by])]
+        set_sql = ", ".join([f'"{_safe_ident(c)}"=excluded."{_safe_ident(c)}"' for c in update_cols]) or '"id"="id"'
+        conflict_sql = ", ".join([f'"{_safe_ident(c)}"' for c in unique_by])
+        one = "(" + ", ".join(["?"] * len(cols)) + ")"
+
+        def upsert_sql(n: int, returning: str = "") -> str:
+            return (f'INSERT INTO "{t}" ({cols_sql}) VALUES {", ".join([one] * n)} '
+                    f'ON CONFLICT ({conflict_sql}) DO UPDATE SET {set_sql}{returning};')
+
+        values = [[r.get(c) for c in cols] for r in records]
+        if self._returning and "id" not in cols:
+            base = cur.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{t}";').fetchone()[0]
+            per = max(1, min(_MAX_ROWS_PER_INSERT, _MAX_VARS // len(cols)))
+            full_sql = upsert_sql(per, " RETURNING id")
+            new_ids: Set[int] = set()
+            for i in range(0, len(values), per):
+                block = values[i:i + per]
+                sql = full_sql if len(block) == per else upsert_sql(len(block), " RETURNING id")
+                cur.execute(sql, [v for row in block for v in row])
+                new_ids.update(r[0] for r in cur.fetchall() if r[0] > base)
+            return len(new_ids)
+
+        existing = self._existing_keys(cur, t, unique_by, records)
+        seen = set()
+        created = 0
+        for r in records:
+            key = tuple(r.get(c) for c in unique_by)
+            if None in key:
+                created += 1  # NULL ne pravi konflikt u UNIQUE indeksu
+            elif key not in existing and key not in seen:
+                seen.add(key)
+                created += 1
+        cur.executemany(upsert_sql(1), values)
+        return created
+
+    def _existing_keys(self, cur: sqlite3.Cursor, t: str, unique_by: List[str],
+                       records: List[Dict[str, Any]]) -> Set[tuple]:
+        """Ključevi (unique_by) iz records koji već postoje u tabeli — JOIN preko TEMP tabele."""
+        cols = [_safe_ident(c) for c in unique_by]
+        tmp = f"_upsert_keys_{t}"
+        cols_sql = ", ".join([f'"{c}"' for c in cols])
+        cur.execute(f'CREATE TEMP TABLE IF NOT EXISTS "{tmp}" ({cols_sql});')
+        try:
+            cur.execute(f'DELETE FROM temp."{tmp}";')
+            cur.executemany(
+                f'INSERT INTO temp."{tmp}" ({cols_sql}) VALUES ({", ".join(["?"] * len(cols))});',
+                [[r.get(c) for c in unique_by] for r in records],
+            )
+            sel_sql = ", ".join([f'k."{c}"' for c in cols])
+            on_sql = " AND ".join([f'k."{c}" = m."{c}"' for c in cols])
+            cur.execute(f'SELECT DISTINCT {sel_sql} FROM temp."{tmp}" k JOIN "{t}" m ON {on_sql};')
+            return {tuple(row) for row in cur.fetchall()}
+        finally:
+            cur.execute(f'DROP TABLE IF EXISTS temp."{tmp}";')
 
 
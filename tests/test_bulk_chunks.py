@@ -0,0 +1,106 @@
+# =============================================================================
+# File:        tests/test_bulk_chunks.py
+# Purpose:     bulk_insert/bulk_create iz generatora u blokovima (oba drajvera):
+#              progress, commit po bloku, jedan append po bloku + mini benchmark memorije
+# Run:         pytest -q tests/test_bulk_chunks.py -s
+# =============================================================================
+import time
+import tracemalloc
+
+import pytest
+
+from system.db.json_driver import JSONDriver
+from system.db.manager.db_manager import DBManager
+from system.db.sqlite_driver import SQLiteDriver
+
+T = "tst_chunk_rows"
+
+
+def _rows(n, fail_at=None):
+    for i in range(1, n + 1):
+        if i == fail_at:
+            raise RuntimeError("boom")
+        yield {"name": f"R{i}", "n": i}
+
+
+def _driver(kind, tmp_path):
+    if kind == "json":
+        return JSONDriver(root=str(tmp_path))
+    return SQLiteDriver(path=str(tmp_path / "chunks.db"))
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_generator_input_in_chunks_with_progress(tmp_path, kind):
+    drv = _driver(kind, tmp_path)
+    seen = []
+    ids = drv.bulk_insert(T, _rows(2500), chunk_size=1000, progress=seen.append)
+    assert ids == list(range(1, 2501))
+    assert seen == [1000, 2000, 2500]
+    assert drv.count(T) == 2500
+    assert drv.find_by_pk(T, 1700)["name"] == "R1700"
+    assert drv.bulk_insert(T, iter([])) == []
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_commit_every_chunk_keeps_finished_chunks(tmp_path, kind):
+    drv = _driver(kind, tmp_path)
+    drv.create(T, {"name": "seed", "n": 0})
+    with pytest.raises(RuntimeError):
+        drv.bulk_insert(T, _rows(2500, fail_at=2100), chunk_size=1000)
+    assert drv.count(T) == 1  # podrazumevano: sve ili ništa
+
+    with pytest.raises(RuntimeError):
+        drv.bulk_insert(T, _rows(2500, fail_at=2100), chunk_size=1000, commit_every_chunk=True)
+    assert drv.count(T) == 2001
+
+
+def test_json_journal_appends_follow_commits(tmp_path, monkeypatch):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create(T, {"name": "seed"})
+    emitted = []
+    orig = drv._emit
+    monkeypatch.setattr(drv, "_emit", lambda batch: (emitted.append(sum(map(len, batch.values()))), orig(batch)))
+    on_disk = []
+    progress = lambda n: on_disk.append(JSONDriver(root=str(tmp_path)).count(T) - 1)
+
+    drv.bulk_insert(T, _rows(2500), chunk_size=1000, commit_every_chunk=True, progress=progress)
+    assert emitted == [1000, 1000, 500]  # jedan append po bloku
+    assert on_disk == [1000, 2000, 2500]  # svaki blok je trajan kad se prijavi
+
+    emitted.clear()
+    on_disk.clear()
+    drv.bulk_insert(T, _rows(2500), chunk_size=1000, progress=progress)
+    assert emitted == [2500]  # jedna transakcija → jedan append pri commit-u
+    assert on_disk == [2500, 2500, 2500]  # progress broji upisano, ne potvrđeno
+    assert JSONDriver(root=str(tmp_path)).count(T) == 5001
+
+
+@pytest.mark.parametrize("kind", ["json", "sqlite"])
+def test_dbmanager_bulk_create_accepts_generator(tmp_path, kind):
+    path = str(tmp_path) if kind == "json" else str(tmp_path / "chunks.db")
+    seen = []
+    with DBManager.with_driver(kind, path):
+        ids = DBManager.bulk_create(T, _rows(1200), chunk_size=500, progress=seen.append)
+        assert len(ids) == 1200 and seen == [500, 1000, 1200]
+        row = DBManager.find_by_pk(T, ids[-1])
+        assert row["created_at"] and row["updated_at"] == row["created_at"]
+        assert DBManager.bulk_create(T, []) == []
+
+
+def test_bulk_insert_memory_benchmark(tmp_path):
+    n = 100000
+    out = {}
+    for label, make in (("lista", lambda: list(_rows(n))), ("generator", lambda: _rows(n))):
+        drv = SQLiteDriver(path=str(tmp_path / f"mem_{label}.db"))
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        ids = drv.bulk_insert(T, make(), chunk_size=5000)
+        dt = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert len(ids) == n
+        out[label] = (dt, peak)
+        drv.close()
+    print(f"\n[bulk_insert] {n} redova: " + ", ".join(
+        f"{k} {dt:.2f} s / peak {peak / 2**20:.1f} MiB" for k, (dt, peak) in out.items()))
+    assert out["generator"][1] < out["lista"][1]
@@ -0,0 +1,57 @@
+# =============================================================================
+# File:        tests/test_index_speed.py
+# Purpose:     Benchmark sekundarnog indeksa: where(email=...) pre i posle create_index
+#              (JSON: hash indeks, SQLite: CREATE INDEX)
+# Run:         pytest -q tests/test_index_speed.py -s
+# =============================================================================
+import time
+
+from system.db.manager import DBManager
+
+N_RECORDS = 20000
+N_QUERIES = 50
+NEEDLE_EVERY = 400
+
+
+def _where_time(table: str, email: str):
+    t0 = time.perf_counter()
+    for _ in range(N_QUERIES):
+        rows = DBManager.where(table, email=email)
+    return (time.perf_counter() - t0) / N_QUERIES, rows
+
+
+def _bench_for(driver_key: str, path: str):
+    table = "bench_index_users"
+    needle = "user400@x.com"
+    with DBManager.with_driver(driver=driver_key, db_path=path):
+        DBManager.bulk_create(table, [
+            {"name": f"User {i}", "email": needle if i % NEEDLE_EVERY == 0 else f"user{i}@x.com"}
+            for i in range(1, N_RECORDS + 1)
+        ])
+        probe = [("email", "==", needle)]
+        if driver_key == "json":
+            assert DBManager._driver._index_candidates(table, probe) is None  # bez indeksa -> sken
+        scan, before = _where_time(table, needle)
+
+        t0 = time.perf_counter()
+        assert DBManager.create_index(table, "email")
+        built = time.perf_counter() - t0
+        indexed, after = _where_time(table, needle)
+
+        print(f"\n[{driver_key}] where(email) {N_RECORDS} redova: bez indeksa {scan * 1e3:.3f} ms, "
+              f"sa indeksom {indexed * 1e3:.3f} ms (create_index {built:.4f} s)")
+        assert "email" in DBManager.list_indexes(table)
+        assert len(after) == len(before) == N_RECORDS // NEEDLE_EVERY
+        assert sorted(r["id"] for r in after) == sorted(r["id"] for r in before)
+        if driver_key == "json":
+            # upit ide kroz indeks: kandidati su samo pogoci, ne cela tabela
+            candidates = DBManager._driver._index_candidates(table, probe)
+            assert candidates is not None and len(candidates) == N_RECORDS // NEEDLE_EVERY
+
+
+def test_json_index_speed(tmp_path):
+    _bench_for("json", str(tmp_path / "json"))
+
+
+def test_sqlite_index_speed(tmp_path):
+    _bench_for("sqlite", str(tmp_path / "bench.db"))
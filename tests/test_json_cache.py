@@ -0,0 +1,105 @@
+# =============================================================================
+# File:        tests/test_json_cache.py
+# Purpose:     Memorijski budžet JSONDriver keša (LRU izbacivanje, memory_usage)
+# =============================================================================
+import threading
+
+from system.db.json_driver import JSONDriver
+from system.db.manager.db_manager import DBManager
+
+
+def _fill(drv, table, n=200):
+    with drv.transaction():
+        for i in range(n):
+            drv.create(table, {"name": f"{table} {i}", "group": i % 7})
+
+
+def test_memory_usage_reports_rows_and_indexes(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _fill(drv, "t_a")
+    drv.create_index("t_a", "group")
+    usage = drv.memory_usage()
+    assert set(usage) == {"t_a"}
+    assert usage["t_a"]["rows"] > 200 * 100
+    assert usage["t_a"]["indexes"] > 0
+    assert usage["t_a"]["total"] == usage["t_a"]["rows"] + usage["t_a"]["indexes"]
+
+
+def test_lru_evicts_least_recently_used_clean_tables(tmp_path):
+    _fill(JSONDriver(root=str(tmp_path)), "t_a")
+    probe = JSONDriver(root=str(tmp_path))
+    probe.count("t_a")
+    size = probe.memory_usage()["t_a"]["total"]
+
+    drv = JSONDriver(root=str(tmp_path), cache_max_bytes=int(size * 2.5))
+    for t in ("t_b", "t_c"):
+        _fill(drv, t)
+    drv.count("t_a")  # treća tabela -> izbacuje se t_b (najdavnije korišćena)
+    assert set(drv._cache) == {"t_c", "t_a"}
+    _fill(drv, "t_d")
+    assert set(drv._cache) == {"t_a", "t_d"}
+    assert sum(u["total"] for u in drv.memory_usage().values()) <= size * 2.5 * 1.2
+
+    # izbačena tabela se transparentno ponovo učitava
+    assert drv.count("t_b") == 200
+
+
+def test_table_in_use_is_not_evicted(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), cache_max_bytes=1)
+    _fill(drv, "t_a", n=20)
+    held = threading.Event()
+    done = threading.Event()
+
+    def reader():
+        with drv._reading("t_a"):
+            held.set()
+            done.wait(5)
+
+    th = threading.Thread(target=reader)
+    th.start()
+    held.wait(5)
+    try:
+        drv.count("t_b")
+        assert "t_a" in drv._cache  # čitalac drži lock -> ne izbacuje se
+    finally:
+        done.set()
+        th.join()
+    drv.count("t_c")
+    assert "t_a" not in drv._cache
+
+
+def test_dirty_batched_table_is_flushed_before_eviction(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=60_000, cache_max_bytes=1)
+    try:
+        drv.create("t_a", {"n": 1})
+        assert drv.dirty_tables() == {"t_a": 1}
+        drv.count("t_b")
+        assert "t_a" not in drv._cache and drv.dirty_tables() == {}
+        assert JSONDriver(root=str(tmp_path)).count("t_a") == 1
+    finally:
+        drv.close()
+
+
+def test_failed_flush_skips_victim_instead_of_failing_read(tmp_path, monkeypatch):
+    from system.db.locks import LockTimeout
+
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=60_000, cache_max_bytes=1)
+    try:
+        drv.create("t_a", {"n": 1})
+
+        def broken_flush():
+            raise LockTimeout("t_other")
+
+        monkeypatch.setattr(drv, "flush", broken_flush)
+        assert drv.count("t_b") == 0  # čitanje druge tabele ne pada
+        assert "t_a" in drv._cache and drv.dirty_tables() == {"t_a": 1}
+        monkeypatch.undo()
+    finally:
+        drv.close()
+    assert JSONDriver(root=str(tmp_path)).count("t_a") == 1
+
+
+def test_dbmanager_memory_usage(tmp_path):
+    with DBManager.with_driver(driver="json", db_path=str(tmp_path)):
+        DBManager.create("t_mem", {"name": "x"})
+        assert "t_mem" in DBManager.memory_usage()
@@ -0,0 +1,40 @@
+# =============================================================================
+# File:        tests/test_json_codec_speed.py
+# Purpose:     Benchmark JSONDriver formata: upis/učitavanje iste tabele u json,
+#              jsonl i columnar formatu (vreme + veličina fajla)
+# Run:         pytest -q tests/test_json_codec_speed.py -s
+# =============================================================================
+import time
+
+from system.db.json_driver import JSONDriver
+
+N_RECORDS = 10000
+TABLE = "bench_codec"
+
+
+def _records(n: int):
+    return [{"id": i, "name": f"User {i}", "email": f"user{i}@x.com", "age": i % 90,
+             "score": i / 7, "active": bool(i % 2)} for i in range(1, n + 1)]
+
+
+def test_json_codec_speed(tmp_path):
+    records = _records(N_RECORDS)
+    sizes = {}
+    print(f"\n=== JSON kodeci ({len(records)} redova) ===")
+    for fmt in ("json", "jsonl", "columnar"):
+        root = str(tmp_path / fmt)
+        drv = JSONDriver(root=root, journal=False, format=fmt)
+        drv._cache[TABLE] = records
+
+        t0 = time.perf_counter()
+        drv._save_table(TABLE)
+        t1 = time.perf_counter()
+        sizes[fmt] = drv._base_bytes[TABLE]
+
+        fresh = JSONDriver(root=root, journal=False, format=fmt)
+        t2 = time.perf_counter()
+        rows = fresh._load_table(TABLE)
+        t3 = time.perf_counter()
+        print(f"{fmt:>8}: save {t1 - t0:.4f} s, load {t3 - t2:.4f} s, {sizes[fmt] / 1024:.0f} KB")
+        assert rows == records
+    assert sizes["columnar"] < sizes["json"]
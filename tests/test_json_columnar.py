@@ -0,0 +1,92 @@
+# =============================================================================
+# File:        tests/test_json_columnar.py
+# Purpose:     Kolonski (.col) kodek JSONDriver-a i prelaz iz/u .json
+# =============================================================================
+import os
+
+import pytest
+
+from system.db import columnar
+from system.db.json_driver import JSONDriver
+
+TABLE = "tst_columnar"
+
+ROWS = [
+    {"id": 1, "name": "Ana", "age": 30, "score": 1.5, "active": True, "tags": ["a"]},
+    {"id": 2, "name": "Boris", "age": None, "score": 2.25, "active": False, "meta": {"x": 1}},
+    {"id": 3, "name": "Ceca", "age": 2 ** 70, "score": None, "active": True, "tags": []},
+    {"id": 4, "name": None, "age": 41, "mixed": "1"},
+    {"id": 5, "mixed": 1, "name": "Đorđe ž"},
+]
+
+
+def test_codec_roundtrip():
+    raw = b"".join(columnar.iter_encode(ROWS))
+    assert raw.startswith(columnar.MAGIC)
+    assert columnar.decode(raw) == ROWS
+    assert columnar.decode(b"".join(columnar.iter_encode([]))) == []
+
+
+def test_encode_streams_block_per_column(monkeypatch):
+    encoded = []
+    real = columnar._encode_column
+    monkeypatch.setattr(columnar, "_encode_column", lambda values: encoded.append(1) or real(values))
+    parts = columnar.iter_encode(ROWS)
+    assert next(parts) == columnar.MAGIC
+    next(parts)  # prvi blok je spreman pre nego što se ostale kolone kodiraju
+    assert len(encoded) == 1
+    rest = list(parts)
+    assert len(rest) == len(encoded)  # preostali blokovi + zaglavlje na kraju
+
+
+def test_columnar_is_smaller_than_json():
+    rows = [{"id": i, "name": f"User {i}", "age": i % 90, "score": i / 3, "active": bool(i % 2)} for i in range(1, 2001)]
+    raw = b"".join(columnar.iter_encode(rows))
+    import json
+    assert len(raw) < len(json.dumps(rows)) / 2
+    assert columnar.decode(raw) == rows
+
+
+def test_per_table_format_and_transparent_conversion(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), journal=False)
+    for r in ROWS:
+        drv.create(TABLE, dict(r))
+    assert os.path.exists(tmp_path / f"{TABLE}.json")
+
+    drv.set_format(TABLE, "columnar")
+    assert os.path.exists(tmp_path / f"{TABLE}{columnar.EXT}")
+    assert not os.path.exists(tmp_path / f"{TABLE}.json")
+
+    # format tabele važi i za novu instancu, bez obzira na JSON_FORMAT
+    fresh = JSONDriver(root=str(tmp_path), journal=False, format="json")
+    assert fresh.read(TABLE, {}) == ROWS
+    fresh.update(TABLE, 4, {"name": "Dejan"})
+    assert os.path.exists(tmp_path / f"{TABLE}{columnar.EXT}")
+
+    fresh.set_format(TABLE, None)  # nazad na .env / parametar (json)
+    assert os.path.exists(tmp_path / f"{TABLE}.json")
+    assert not os.path.exists(tmp_path / f"{TABLE}{columnar.EXT}")
+    assert JSONDriver(root=str(tmp_path)).find_by_pk(TABLE, 4)["name"] == "Dejan"
+
+
+def test_global_columnar_format(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), format="columnar")
+    drv.create(TABLE, {"n": 1})
+    drv._compact(TABLE)
+    assert os.path.exists(tmp_path / f"{TABLE}{columnar.EXT}")
+    assert JSONDriver(root=str(tmp_path)).read(TABLE, {}) == [{"n": 1, "id": 1}]
+
+
+def test_set_format_refused_inside_transaction(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create(TABLE, {"n": 1})
+    drv._compact(TABLE)
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.create(TABLE, {"n": 2})
+            drv.set_format(TABLE, "columnar")
+    # rollback: ništa nepotvrđeno nije stiglo na disk, format je ostao json
+    assert not os.path.exists(tmp_path / f"{TABLE}{columnar.EXT}")
+    assert drv.read(TABLE, {}) == [{"n": 1, "id": 1}]
+    assert JSONDriver(root=str(tmp_path)).read(TABLE, {}) == [{"n": 1, "id": 1}]
+    assert "format" not in drv._load_meta(TABLE)
@@ -0,0 +1,168 @@
+# =============================================================================
+# File:        tests/test_json_contention.py
+# Purpose:     Lock po tabeli u JSONDriver-u: čitanja jedne tabele ne čekaju
+#              transakciju nad drugom + mini benchmark naspram globalnog lock-a
+# Run:         pytest -q tests/test_json_contention.py -s
+# =============================================================================
+import threading
+import time
+
+import pytest
+
+from system.db.json_driver import JSONDriver
+from system.db.locks import LockTimeout, RWLock
+
+USERS = "tst_lock_users"
+ORDERS = "tst_lock_orders"
+DURATION = 0.3  # sekunde po merenju
+
+
+def _seed(drv, n=500):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(USERS, {"name": f"User {i}", "group": i % 10})
+        drv.create(ORDERS, {"user_id": 1, "total": 10})
+
+
+def _throughput(drv, readers: int):
+    """(read QPS nad USERS, write QPS nad ORDERS) dok jedna nit stalno piše ORDERS."""
+    stop = time.perf_counter() + DURATION
+    counts = [0] * readers
+    writes = [0]
+
+    def writer():
+        n = 0
+        while time.perf_counter() < stop:
+            drv.update(ORDERS, 1, {"total": n})
+            n += 1
+        writes[0] = n
+
+    def reader(k):
+        n = 0
+        while time.perf_counter() < stop:
+            drv.find_by_pk(USERS, (n % 500) + 1)
+            drv.read(USERS, {"where": {"group": 3}, "limit": 5})
+            n += 1
+        counts[k] = n
+
+    ts = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(k,)) for k in range(readers)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return sum(counts) / DURATION, writes[0] / DURATION
+
+
+def _other_table_writable(drv) -> bool:
+    """Da li upis u ORDERS prolazi dok druga nit drži write lock nad USERS."""
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with drv.transaction():
+            drv.update(USERS, 1, {"name": "Held"})
+            held.set()
+            release.wait(5)
+
+    h = threading.Thread(target=holder)
+    h.start()
+    assert held.wait(5)
+    prev, drv._lock_timeout = drv._lock_timeout, 0.2
+    try:
+        drv.update(ORDERS, 1, {"total": -1})
+        return True
+    except LockTimeout:
+        return False
+    finally:
+        drv._lock_timeout = prev
+        release.set()
+        h.join()
+
+
+def test_reads_progress_while_other_table_is_written(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+
+    in_tx = threading.Event()
+    done = threading.Event()
+
+    def writer():
+        # duga transakcija drži write lock nad ORDERS dok čitamo USERS
+        with drv.transaction():
+            drv.update(ORDERS, 1, {"total": 11})
+            in_tx.set()
+            done.wait(10)
+
+    w = threading.Thread(target=writer)
+    w.start()
+    assert in_tx.wait(5)
+    try:
+        assert drv.find_by_pk(USERS, 7)["name"] == "User 7"
+        assert len(drv.read(USERS, {"where": {"group": 3}})) == 50
+    finally:
+        done.set()
+        w.join()
+    assert drv.find_by_pk(ORDERS, 1)["total"] == 11
+
+
+def test_contention_benchmark_vs_global_lock(tmp_path):
+    results, writable = {}, {}
+    for mode in ("po tabeli", "globalni"):
+        drv = JSONDriver(root=str(tmp_path / mode.replace(" ", "_")))
+        _seed(drv)
+        if mode == "globalni":
+            shared = RWLock()  # staro ponašanje: jedan lock za sve tabele
+            drv._lock_for = lambda table: shared
+        results[mode] = {n: _throughput(drv, n) for n in (1, 4)}
+        writable[mode] = _other_table_writable(drv)
+
+    print("\n[JSON contention] čitanja USERS dok druga nit piše ORDERS (read QPS / write QPS):")
+    for mode, by_threads in results.items():
+        print(f"  lock {mode}: " + ", ".join(
+            f"{n} čitača={int(r)}/{int(w)}" for n, (r, w) in by_threads.items()))
+    # brojevi se samo ispisuju; deterministički: lock po tabeli pušta upis u drugu tabelu
+    assert writable == {"po tabeli": True, "globalni": False}
+
+
+def test_write_lock_blocks_same_table_only(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), lock_timeout=0.2)
+    _seed(drv, n=3)
+
+    held = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with drv.transaction():
+            drv.update(USERS, 1, {"name": "X"})
+            held.set()
+            release.wait(5)
+
+    w = threading.Thread(target=writer)
+    w.start()
+    assert held.wait(5)
+    try:
+        # druga tabela je slobodna
+        assert drv.update(ORDERS, 1, {"total": 1}) is True
+        # ista tabela čeka do isteka
+        with pytest.raises(LockTimeout):
+            drv.read(USERS, {})
+    finally:
+        release.set()
+        w.join()
+    assert drv.find_by_pk(USERS, 1)["name"] == "X"
+
+
+def test_rollback_restores_only_touched_tables(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, n=3)
+
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.update(USERS, 1, {"name": "X"})
+            drv.create(ORDERS, {"user_id": 2, "total": 5})
+            raise RuntimeError("boom")
+
+    assert drv.find_by_pk(USERS, 1)["name"] == "User 1"
+    assert drv.count(ORDERS) == 1
+    # lock-ovi su oslobođeni
+    assert drv.update(USERS, 2, {"name": "Y"}) is True
@@ -0,0 +1,109 @@
+# =============================================================================
+# File:        tests/test_json_count.py
+# Purpose:     count/exists iz indeksa u JSONDriver-u (+ mini benchmark naspram skena)
+# Run:         pytest -q tests/test_json_count.py -s
+# =============================================================================
+import time
+
+from system.db.json_driver import JSONDriver
+from system.db.manager.db_manager import DBManager
+
+T = "tst_count_users"
+N = 50000
+
+
+def _seed(drv, n):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(T, {"email": f"u{i % 500}@x.com", "age": i % 90, "name": f"User {i}"})
+
+
+def _touched(monkeypatch, drv):
+    """Brojač poziva predikata — index-only putanja ne sme da dira redove."""
+    calls = {"n": 0}
+    orig = drv._row_predicate
+
+    def counted(table, where_norm):
+        pred = orig(table, where_norm)
+
+        def wrapped(row):
+            calls["n"] += 1
+            return pred(row)
+        return wrapped
+
+    monkeypatch.setattr(drv, "_row_predicate", counted)
+    return calls
+
+
+def test_count_and_exists_from_indexes(tmp_path, monkeypatch):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, 1000)
+    drv.create_index(T, "email")
+    drv.create_index(T, "age", kind="sorted")
+    calls = _touched(monkeypatch, drv)
+
+    assert drv.count(T, {"email": "u7@x.com"}) == 2
+    assert drv.count(T, {"email": {"in": ["u7@x.com", "u8@x.com", "u7@x.com", "nobody"]}}) == 4
+    assert drv.count(T, [("id", "in", [1, 2, 2, 5000])]) == 2
+    assert drv.count(T, {"age": {">=": 10, "<": 20}}) == sum(1 for i in range(1, 1001) if 10 <= i % 90 < 20)
+    assert drv.exists(T, {"email": "u7@x.com"}) is True
+    assert drv.exists(T, {"email": "nobody"}) is False
+    assert drv.exists(T, {"age": {">": 89}}) is False
+    assert calls["n"] == 0
+
+    # kombinovan upit: kandidati iz indeksa + predikat, exists staje na prvom pogotku
+    assert drv.count(T, {"email": "u7@x.com", "age": 7}) == 1
+    calls["n"] = 0
+    assert drv.exists(T, {"name": {"like": "user"}}) is True
+    assert calls["n"] == 1
+
+
+def test_count_and_exists_with_none_in_list(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    for name in ("a", "b", None, "b"):
+        drv.create(T, {"name": name, "age": 1})
+    where = {"name": {"in": [None, "b"]}}
+    scanned = drv.count(T, where)
+    assert scanned == 3
+
+    drv.create_index(T, "name")
+    assert drv.count(T, where) == scanned
+    assert drv.count(T, {"name": {"in": [None, "b"]}, "age": 1}) == scanned  # kandidati iz indeksa + predikat
+    assert drv.exists(T, {"name": {"in": [None]}}) is True
+    assert drv.exists(T, {"name": {"in": [None, "zzz"]}, "age": 1}) is True
+
+
+def test_dbmanager_exists_uses_driver(tmp_path, monkeypatch):
+    for key, path in (("json", str(tmp_path)), ("sqlite", str(tmp_path / "exists.db"))):
+        with DBManager.with_driver(key, path):
+            DBManager.create(T, {"email": "a@x.com"})
+            monkeypatch.setattr(DBManager._driver, "read", None)  # exists ne sme da čita red
+            assert DBManager.exists(T, email="a@x.com") is True
+            assert DBManager.exists(T, email="b@x.com") is False
+            # operatorski filteri idu kroz isti WHERE kao read()
+            assert DBManager.exists(T, email={"like": "a@"}) is True
+            assert DBManager.exists(T, email={"in": ["x", "a@x.com"]}) is True
+            assert DBManager.exists(T, email={"like": "b@"}) is False
+            monkeypatch.undo()
+
+
+def test_count_exists_benchmark(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, N)
+    scan = {"email": "u7@x.com"}
+    t0 = time.perf_counter()
+    n_scan = drv.count(T, scan)
+    e_scan = drv.exists(T, {"email": "nobody"})
+    t1 = time.perf_counter()
+
+    drv.create_index(T, "email")
+    drv.create_index(T, "age", kind="sorted")
+    t2 = time.perf_counter()
+    for _ in range(100):
+        assert drv.count(T, scan) == n_scan
+        assert drv.exists(T, {"email": "nobody"}) is e_scan
+        drv.count(T, {"age": {">=": 30, "<=": 40}})
+    t3 = time.perf_counter()
+    print(f"\n[JSON count/exists] {N} redova: sken {1000 * (t1 - t0):.2f} ms, "
+          f"indeks {1000 * (t3 - t2) / 100:.3f} ms po krugu (count + exists + range count)")
+    assert (t3 - t2) / 100 < (t1 - t0)
@@ -0,0 +1,219 @@
+# =============================================================================
+# File:        tests/test_json_indexes.py
+# Purpose:     Sekundarni indeksi JSONDriver-a (hash)
+# =============================================================================
+import pytest
+
+from system.db.json_driver import JSONDriver
+from system.db.manager.db_manager import DBManager
+from system.db.sorted_index import SortedIndex
+
+TABLE = "tst_idx_users"
+
+
+def _seed(drv):
+    for i in range(1, 11):
+        drv.create(TABLE, {"name": f"User {i}", "email": f"u{i % 3}@x.com", "age": 20 + i})
+
+
+def test_hash_index_maintained_through_writes(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    assert drv.create_index(TABLE, "email") is True
+    assert drv.create_index(TABLE, "email") is False
+
+    assert len(drv.read(TABLE, {"where": {"email": "u1@x.com"}})) == 4
+    assert drv.count(TABLE, {"email": "u0@x.com"}) == 3
+
+    drv.update(TABLE, {"where": {"id": 1}}, {"email": "u0@x.com"})
+    drv.delete(TABLE, {"where": {"id": 3}})
+    assert {r["id"] for r in drv.read(TABLE, {"where": {"email": "u0@x.com"}})} == {1, 6, 9}
+    assert {r["id"] for r in drv.read(TABLE, {"where": {"email": {"in": ["u1@x.com", "nobody"]}}})} == {4, 7, 10}
+
+    try:
+        with drv.transaction():
+            drv.create(TABLE, {"name": "Tx", "email": "tx@x.com"})
+            raise RuntimeError("fail")
+    except RuntimeError:
+        pass
+    assert drv.read(TABLE, {"where": {"email": "tx@x.com"}}) == []
+    assert drv._indexes[TABLE]["email"].get("tx@x.com") is None
+
+
+def test_hash_index_in_with_none_matches_scan(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create(TABLE, {"name": "a"})
+    drv.create(TABLE, {"name": "b"})
+    drv.create(TABLE, {"name": None})
+    drv.create(TABLE, {"other": 1})  # bez polja -> isto kao None
+    query = {"where": {"name": {"in": [None, "b"]}}}
+    scan = sorted(r["id"] for r in drv.read(TABLE, query))
+    assert scan == [2, 3, 4]
+
+    drv.create_index(TABLE, "name")
+    assert sorted(r["id"] for r in drv.read(TABLE, query)) == scan
+    assert sorted(r["id"] for r in drv.read(TABLE, {"where": {"name": {"in": ["a", "b"]}}})) == [1, 2]
+
+
+def test_index_declaration_is_persistent(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.create_index(TABLE, "email")
+
+    fresh = JSONDriver(root=str(tmp_path))
+    assert fresh.list_indexes(TABLE) == ["email"]
+    assert fresh.read(TABLE, {"where": {"email": "u2@x.com"}, "first": True})["id"] == 2
+    assert "u2@x.com" in fresh._indexes[TABLE]["email"]
+
+    assert fresh.drop_index(TABLE, "email") is True
+    assert JSONDriver(root=str(tmp_path)).list_indexes(TABLE) == []
+
+
+def test_dbmanager_create_index(tmp_path):
+    with DBManager.with_driver("json", str(tmp_path)):
+        DBManager.create(TABLE, {"email": "a@x.com"})
+        assert DBManager.create_index(TABLE, "email") is True
+        assert DBManager.list_indexes(TABLE) == ["email"]
+        assert DBManager.exists(TABLE, email="a@x.com")
+        assert not DBManager.exists(TABLE, email="b@x.com")
+
+
+def test_sorted_index_range_and_order(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.create(TABLE, {"name": "No age"})
+    assert drv.create_index(TABLE, "age", kind="sorted") is True
+    si = drv._sorted[TABLE]["age"]
+
+    rows = drv.read(TABLE, {"where": {"age": {">=": 23, "<": 27}}})
+    assert sorted(r["age"] for r in rows) == [23, 24, 25, 26]
+    assert len(si.range(23, True, 27, False)) == 4
+
+    latest = drv.read(TABLE, {"order_by": "age desc", "limit": 3})
+    assert [r["age"] for r in latest] == [30, 29, 28]
+    page = drv.read(TABLE, {"order": [("age", "asc")], "limit": 2, "offset": 1})
+    assert [r["age"] for r in page] == [21, 22]  # NULL je prvi u ASC
+    filtered = drv.read(TABLE, {"where": {"email": {"like": "u1"}}, "order_by": "age desc", "limit": 2})
+    assert [r["age"] for r in filtered] == [30, 27]
+
+    drv.update(TABLE, {"where": {"id": 10}}, {"age": 1})
+    drv.delete(TABLE, {"where": {"id": 9}})
+    assert [r["age"] for r in drv.read(TABLE, {"order_by": "age desc", "limit": 2})] == [28, 27]
+    assert si.keys == sorted(si.keys)
+
+    fresh = JSONDriver(root=str(tmp_path))
+    assert fresh.list_indexes(TABLE, kind="sorted") == ["age"]
+    assert [r["age"] for r in fresh.read(TABLE, {"order_by": "age", "limit": 2, "offset": 1})] == [1, 21]
+
+
+def test_update_touches_only_changed_indexed_fields(tmp_path, monkeypatch):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.create_index(TABLE, "email")
+    drv.create_index(TABLE, "age", kind="sorted")
+    si = drv._sorted[TABLE]["age"]
+    calls = []
+    for name in ("add", "remove"):
+        orig = getattr(SortedIndex, name)
+        monkeypatch.setattr(SortedIndex, name,
+                            lambda self, row, _o=orig, _n=name: (calls.append(_n), _o(self, row)))
+
+    drv.update(TABLE, {"where": {"id": {"<=": 5}}}, {"name": "Renamed"})
+    drv.update(TABLE, 6, {"age": 26, "email": "u0@x.com"})  # iste vrednosti -> bez promene
+    assert calls == []
+
+    drv.update(TABLE, 7, {"age": 100})
+    drv.update(TABLE, 8, {"age": None})  # prelazak u NULL i nazad
+    assert calls == ["remove", "add", "remove", "add"]
+    assert list(si.nulls) == [8]
+    drv.update(TABLE, 8, {"age": 28})
+    assert not si.nulls and si.keys == sorted(si.keys)
+    assert [r["id"] for r in drv.read(TABLE, {"order_by": "age desc", "limit": 2})] == [7, 10]
+    assert all(si.ids[i] < si.ids[i + 1] for i in range(len(si.keys) - 1) if si.keys[i] == si.keys[i + 1])
+
+    try:
+        with drv.transaction():
+            drv.update(TABLE, 7, {"age": 5, "email": "moved@x.com"})
+            raise RuntimeError("fail")
+    except RuntimeError:
+        pass
+    assert [r["id"] for r in drv.read(TABLE, {"where": {"age": {">": 99}}})] == [7]
+    assert drv.read(TABLE, {"where": {"email": "moved@x.com"}}) == []
+
+
+def test_pk_map_find_update_delete_by_id(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    assert drv.find_by_pk(TABLE, 5)["name"] == "User 5"
+    assert drv.update(TABLE, 5, {"name": "Five"}) is True
+    assert drv.update(TABLE, 99, {"name": "Nope"}) is False
+    assert drv.delete(TABLE, 2) is True
+    assert drv.delete(TABLE, 2) is False
+
+    assert drv.find_by_pk(TABLE, 2) is None
+    assert drv.find_by_pk(TABLE, 5)["name"] == "Five"
+    assert all(drv._cache[TABLE][pos]["id"] == rid for rid, pos in drv._pk[TABLE].items())
+
+    with DBManager.with_driver("json", str(tmp_path)):
+        assert DBManager.find_by_pk(TABLE, 10)["id"] == 10
+        assert DBManager.find_by_pk(TABLE, 2) is None
+
+
+def test_update_that_changes_id_moves_pk_entry(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.create_index(TABLE, "email")
+    drv.create_index(TABLE, "age", kind="sorted")
+
+    assert drv.update(TABLE, {"where": {"id": 1}}, {"id": 100}) == 1
+    assert drv.find_by_pk(TABLE, 1) is None
+    assert drv.find_by_pk(TABLE, 100)["name"] == "User 1"
+    assert [r["id"] for r in drv.read(TABLE, {"where": {"age": 21}})] == [100]
+    assert drv.create(TABLE, {"name": "Next"}) == 101
+
+    try:
+        with drv.transaction():
+            drv.update(TABLE, 100, {"id": 200, "name": "Moved"})
+            assert drv.find_by_pk(TABLE, 200)["name"] == "Moved"
+            raise RuntimeError("fail")
+    except RuntimeError:
+        pass
+    assert drv.find_by_pk(TABLE, 200) is None
+    assert drv.find_by_pk(TABLE, 100)["name"] == "User 1"
+    assert all(drv._cache[TABLE][pos]["id"] == rid for rid, pos in drv._pk[TABLE].items())
+
+    with pytest.raises(ValueError):
+        drv.update(TABLE, 100, {"id": 2})  # zauzet id
+    with pytest.raises(ValueError):
+        drv.update(TABLE, {"where": {"id": {"in": [2, 3]}}}, {"id": 500})  # više redova
+    assert drv.find_by_pk(TABLE, 2)["name"] == "User 2"
+    assert drv.update(TABLE, 100, {"id": 100, "name": "Same"}) is True  # isti id nije promena
+
+
+def test_model_indexes_created_once_columns_exist(tmp_path, monkeypatch):
+    from system.db.model import Model
+
+    for key, path in (("json", str(tmp_path)), ("sqlite", str(tmp_path / "model_idx.db"))):
+        class User(Model):
+            table = "tst_idx_model_users"
+            __indexes__ = ["email"]
+
+        with DBManager.with_driver(key, path):
+            calls = []
+            orig = DBManager._driver.create_index
+            monkeypatch.setattr(DBManager._driver, "create_index",
+                                lambda *a, **kw: (calls.append(a), orig(*a, **kw))[1])
+            assert User.count() == 0  # čitanje ne prijavljuje indekse (bez DDL-a)
+            assert not User.exists(email="a@x.com") and calls == []
+
+            User.create(name="A")  # SQLite: kolona email još ne postoji -> ishod se pamti
+            assert User.__dict__.get("_indexes_driver") is DBManager._driver
+            n = len(calls)
+            User.create(name="B")
+            User.update(1, name="A2")
+            assert len(calls) == n  # upis bez email polja ne proverava ponovo
+
+            User.create(name="C", email="c@x.com")
+            assert DBManager.list_indexes(User.table) == ["email"]
+            assert User.__dict__.get("_indexes_missing") == set()
+            monkeypatch.undo()
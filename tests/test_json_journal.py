@@ -0,0 +1,231 @@
+# =============================================================================
+# File:        tests/test_json_journal.py
+# Purpose:     Write-ahead žurnal JSONDriver-a (append, replay, kompakcija)
+# =============================================================================
+import os
+
+from system.db.json_driver import JSONDriver
+
+TABLE = "tst_journal"
+
+
+def _driver(root, **kw):
+    return JSONDriver(root=str(root), journal=True, **kw)
+
+
+def test_writes_go_to_journal_and_replay(tmp_path):
+    drv = _driver(tmp_path)
+    a = drv.create(TABLE, {"name": "Ana"})
+    b = drv.create(TABLE, {"name": "Boris"})
+    drv.update(TABLE, {"where": {"id": a}}, {"name": "Ana B"})
+    drv.delete(TABLE, {"where": {"id": b}})
+
+    assert os.path.exists(tmp_path / f"{TABLE}.journal")
+    assert not os.path.exists(tmp_path / f"{TABLE}.json")
+
+    fresh = _driver(tmp_path)
+    rows = fresh.read(TABLE, {})
+    assert [(r["id"], r["name"]) for r in rows] == [(a, "Ana B")]
+    assert fresh.get_last_id(TABLE) == a
+
+
+def test_update_that_changes_id_replays_without_old_row(tmp_path):
+    drv = _driver(tmp_path)
+    drv.create(TABLE, {"name": "a"})
+    drv.create(TABLE, {"name": "b"})
+    drv.update(TABLE, {"where": {"id": 1}}, {"id": 100})
+
+    fresh = _driver(tmp_path)
+    assert [(r["id"], r["name"]) for r in fresh.read(TABLE, {})] == [(2, "b"), (100, "a")]
+    assert fresh.find_by_pk(TABLE, 1) is None
+    assert fresh.get_last_id(TABLE) == 100
+
+
+def test_compaction_rewrites_base_and_drops_journal(tmp_path):
+    drv = _driver(tmp_path, journal_max_bytes=200)
+    for i in range(10):
+        drv.create(TABLE, {"name": f"User {i}"})
+
+    assert os.path.exists(tmp_path / f"{TABLE}.json")
+    fresh = _driver(tmp_path)
+    assert len(fresh.read(TABLE, {})) == 10
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    drv = _driver(tmp_path)
+    drv.create(TABLE, {"name": "Ana"})
+    with open(tmp_path / f"{TABLE}.journal", "a", encoding="utf-8") as f:
+        f.write('{"op":"put","row":{"name":"Bo')
+
+    fresh = _driver(tmp_path)
+    assert [r["name"] for r in fresh.read(TABLE, {})] == ["Ana"]
+    # posle pada tabela je kompaktovana, novi upisi idu u čist žurnal
+    fresh.create(TABLE, {"name": "Ceca"})
+    assert [r["name"] for r in _driver(tmp_path).read(TABLE, {})] == ["Ana", "Ceca"]
+
+
+def test_rolled_back_transaction_is_not_journaled(tmp_path):
+    drv = _driver(tmp_path)
+    drv.create(TABLE, {"name": "Ana"})
+    try:
+        with drv.transaction():
+            drv.create(TABLE, {"name": "Boris"})
+            raise RuntimeError("fail")
+    except RuntimeError:
+        pass
+
+    with drv.transaction():
+        drv.create(TABLE, {"name": "Ceca"})
+
+    assert [r["name"] for r in _driver(tmp_path).read(TABLE, {})] == ["Ana", "Ceca"]
+
+
+def test_commit_writes_only_dirty_tables(tmp_path, monkeypatch):
+    import system.db.json_driver as jd
+
+    drv = JSONDriver(root=str(tmp_path), journal=False)
+    drv.create("a", {"v": 1})
+    drv.create("b", {"v": 1})
+    drv.create("c", {"v": 1})
+
+    batches = []
+    real = jd._atomic_write_many
+    monkeypatch.setattr(jd, "_atomic_write_many", lambda items, *a: (batches.append(sorted(items)), real(items, *a)))
+
+    with drv.transaction():
+        drv.read("a", {})                         # samo čitanje
+        drv.update("b", {"where": {"v": 99}}, {"v": 2})  # zaključana, ali bez izmena
+        drv.update("c", 1, {"v": 2})
+        drv.create("a", {"v": 3})
+        assert drv.dirty_tables() == {"c": 1, "a": 1}
+
+    # jedan grupni upis, samo a i c
+    assert batches == [[str(tmp_path / "a.json"), str(tmp_path / "c.json")]]
+    assert drv.dirty_tables() == {}
+    assert JSONDriver(root=str(tmp_path), journal=False).count("a") == 2
+
+
+def test_grouped_journal_commit(tmp_path, monkeypatch):
+    import system.db.json_driver as jd
+
+    drv = JSONDriver(root=str(tmp_path))
+    calls = []
+    real = jd._append_many
+    monkeypatch.setattr(jd, "_append_many", lambda batch, *a: (calls.append(len(batch)), real(batch, *a))[1])
+
+    with drv.transaction():
+        for t in ("x", "y", "z"):
+            drv.create(t, {"v": 1})
+    assert calls == [3]
+    fresh = JSONDriver(root=str(tmp_path))
+    assert [fresh.count(t) for t in ("x", "y", "z")] == [1, 1, 1]
+
+
+def test_durability_none_skips_fsync(tmp_path, monkeypatch):
+    calls = []
+    real = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (calls.append(fd), real(fd))[1])
+
+    drv = JSONDriver(root=str(tmp_path), durability="none")
+    drv.create(TABLE, {"name": "Ana"})
+    assert calls == []
+    assert JSONDriver(root=str(tmp_path)).count(TABLE) == 1
+
+
+def test_durability_batched_flushes_in_background(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=20, batch_max_ops=10_000)
+    try:
+        for i in range(5):
+            drv.create(TABLE, {"n": i})
+        # do isteka prozora podaci su samo u memoriji
+        assert drv.dirty_tables() == {TABLE: 5}
+        import time
+        deadline = time.time() + 5
+        while drv.dirty_tables() and time.time() < deadline:
+            time.sleep(0.01)
+        assert drv.dirty_tables() == {}
+        assert JSONDriver(root=str(tmp_path)).count(TABLE) == 5
+    finally:
+        drv.close()
+
+
+def test_rollback_keeps_earlier_batched_changes_dirty(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=60_000)
+    try:
+        drv.create(TABLE, {"n": 1})
+        drv.create(TABLE, {"n": 2})
+        try:
+            with drv.transaction():
+                drv.create(TABLE, {"n": 3})
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        # dva autocommit upisa su i dalje samo u baferu -> tabela ostaje dirty (ne sme u eviction)
+        assert drv.dirty_tables() == {TABLE: 2}
+        drv.flush()
+        assert drv.dirty_tables() == {}
+        assert JSONDriver(root=str(tmp_path)).count(TABLE) == 2
+    finally:
+        drv.close()
+
+
+def test_flush_inside_transaction_does_not_persist_uncommitted_rows(tmp_path):
+    for journal in (True, False):
+        root = tmp_path / str(journal)
+        drv = JSONDriver(root=str(root), journal=journal, durability="batched",
+                         batch_max_delay_ms=60_000, journal_max_bytes=1)
+        try:
+            drv.create(TABLE, {"name": "committed"})
+            try:
+                with drv.transaction():
+                    drv.create(TABLE, {"name": "UNCOMMITTED"})
+                    drv.flush()  # kompakcija bi upisala red iz memorije
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+            assert [r["name"] for r in drv.read(TABLE, {})] == ["committed"]
+            drv.flush()
+            assert [r["name"] for r in JSONDriver(root=str(root)).read(TABLE, {})] == ["committed"]
+        finally:
+            drv.close()
+
+
+def test_batched_driver_is_collected_and_flushed(tmp_path):
+    import gc
+    import weakref
+
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=60_000)
+    drv.create(TABLE, {"n": 1})
+    thread, ref = drv._flusher, weakref.ref(drv)
+    del drv
+    gc.collect()
+    assert ref() is None  # nit ne drži drajver
+    thread.join(5)
+    assert not thread.is_alive()
+    assert JSONDriver(root=str(tmp_path)).count(TABLE) == 1  # __del__ -> close -> flush
+
+
+def test_with_driver_closes_temporary_driver(tmp_path, monkeypatch):
+    from system.db.manager.db_manager import DBManager
+
+    monkeypatch.setenv("JSON_DURABILITY", "batched")
+    monkeypatch.setenv("JSON_BATCH_MAX_DELAY_MS", "60000")
+    prev = DBManager._driver
+    with DBManager.with_driver("json", str(tmp_path)):
+        temp = DBManager._driver
+        DBManager.create(TABLE, {"n": 1})
+        thread = temp._flusher
+    assert DBManager._driver is prev
+    assert temp._flusher is None and not thread.is_alive()
+    assert JSONDriver(root=str(tmp_path)).count(TABLE) == 1
+
+
+def test_durability_batched_flush_on_close(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), durability="batched", batch_max_delay_ms=60_000)
+    with drv.transaction():
+        drv.create(TABLE, {"n": 1})
+        drv.create("other", {"n": 2})
+    assert not os.path.exists(tmp_path / f"{TABLE}.journal")
+    drv.close()
+    fresh = JSONDriver(root=str(tmp_path))
+    assert fresh.count(TABLE) == 1 and fresh.count("other") == 1
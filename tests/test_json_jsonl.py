@@ -0,0 +1,104 @@
+# =============================================================================
+# File:        tests/test_json_jsonl.py
+# Purpose:     JSON Lines raspored (lenjo čitanje po ofsetu, prelaz json <-> jsonl)
+# =============================================================================
+import os
+
+from system.db import jsonl_store
+from system.db.json_driver import JSONDriver
+
+TABLE = "tst_jsonl"
+
+
+def _seed(root, n=100, **kw):
+    drv = JSONDriver(root=str(root), format="jsonl", **kw)
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(TABLE, {"name": f"User {i}", "group": i % 5})
+    drv._compact(TABLE)
+    return drv
+
+
+def test_pk_and_limited_reads_decode_only_needed_rows(tmp_path, monkeypatch):
+    _seed(tmp_path)
+    assert os.path.exists(tmp_path / f"{TABLE}.jsonl")
+    assert os.path.exists(tmp_path / f"{TABLE}.jsonl.idx")
+
+    decoded = []
+    real = jsonl_store.LazyTable._line
+    monkeypatch.setattr(jsonl_store.LazyTable, "_line", lambda self, i: (decoded.append(i), real(self, i))[1])
+
+    drv = JSONDriver(root=str(tmp_path), format="jsonl")
+    assert drv.find_by_pk(TABLE, 57)["name"] == "User 57"
+    assert decoded == [56]
+
+    decoded.clear()
+    rows = drv.read(TABLE, {"where": {"group": 3}, "limit": 2})
+    assert [r["id"] for r in rows] == [3, 8]
+    assert decoded == list(range(8))
+    assert drv.read(TABLE, {"first": True})["id"] == 1
+    assert TABLE not in drv._cache
+
+    # sken bez limita -> pun dekod u keš
+    assert drv.count(TABLE) == 100
+    assert TABLE in drv._cache and TABLE not in drv._partial
+
+
+def test_lazy_reads_see_journal(tmp_path):
+    drv = _seed(tmp_path, n=10)
+    drv.update(TABLE, 2, {"name": "B"})
+    drv.delete(TABLE, 1)
+    drv.create(TABLE, {"name": "New", "group": 0})
+
+    fresh = JSONDriver(root=str(tmp_path), format="jsonl")
+    assert fresh.find_by_pk(TABLE, 1) is None
+    assert fresh.find_by_pk(TABLE, 2)["name"] == "B"
+    assert fresh.find_by_pk(TABLE, 11)["name"] == "New"
+    assert [r["id"] for r in fresh.read(TABLE, {"limit": 20})] == list(range(2, 12))
+
+
+def test_stale_index_is_rebuilt_and_format_switches(tmp_path):
+    _seed(tmp_path, n=5)
+    with open(tmp_path / f"{TABLE}.jsonl.idx", "w", encoding="utf-8") as f:
+        f.write('{"size": 1, "ids": [], "offsets": []}')
+    drv = JSONDriver(root=str(tmp_path), format="jsonl")
+    assert drv.find_by_pk(TABLE, 4)["name"] == "User 4"
+
+    back = JSONDriver(root=str(tmp_path), format="json")
+    back.update(TABLE, 1, {"name": "A"})
+    back._compact(TABLE)
+    assert os.path.exists(tmp_path / f"{TABLE}.json")
+    assert not os.path.exists(tmp_path / f"{TABLE}.jsonl")
+    assert JSONDriver(root=str(tmp_path)).find_by_pk(TABLE, 1)["name"] == "A"
+
+
+def test_mmap_released_on_load_evict_and_close(tmp_path):
+    _seed(tmp_path, n=10)
+
+    drv = JSONDriver(root=str(tmp_path), format="jsonl")
+    assert drv.find_by_pk(TABLE, 3)["id"] == 3
+    lazy = drv._partial[TABLE]["jsonl"]
+    assert drv.count(TABLE) == 10  # pun dekod zamenjuje lenju tabelu
+    assert lazy._mm is None
+
+    drv = JSONDriver(root=str(tmp_path), format="jsonl")
+    drv.find_by_pk(TABLE, 3)
+    lazy = drv._partial[TABLE]["jsonl"]
+    drv._evict(TABLE)
+    assert lazy._mm is None
+
+    drv = JSONDriver(root=str(tmp_path), format="jsonl")
+    drv.find_by_pk(TABLE, 3)
+    lazy = drv._partial[TABLE]["jsonl"]
+    drv.close()
+    assert lazy._mm is None and not drv._partial
+
+
+def test_close_waits_for_running_iteration(tmp_path):
+    _seed(tmp_path, n=10)
+    lazy = jsonl_store.LazyTable(str(tmp_path / f"{TABLE}.jsonl"), str(tmp_path / f"{TABLE}.jsonl.idx"))
+    rows = lazy.iter_rows()
+    assert next(rows)[0] == 1
+    lazy.close()  # npr. druga nit je učitala celu tabelu dok ova još čita
+    assert [rid for rid, _ in rows] == list(range(2, 11))
+    assert lazy._mm is None
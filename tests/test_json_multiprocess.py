@@ -0,0 +1,97 @@
+# =============================================================================
+# File:        tests/test_json_multiprocess.py
+# Purpose:     JSONDriver iz više procesa: fcntl lock po tabeli, provera svežine
+#              preko generacije (bez ponovnog učitavanja kada nema promena)
+# Run:         pytest -q tests/test_json_multiprocess.py
+# =============================================================================
+import multiprocessing as mp
+
+import pytest
+
+from system.db.json_driver import JSONDriver
+from system.db.locks import fcntl
+
+T = "tst_mp_items"
+
+
+def _count_loads(monkeypatch, drv):
+    calls = {"n": 0}
+    orig = drv._load_table
+
+    def counted(table):
+        calls["n"] += 1
+        return orig(table)
+
+    monkeypatch.setattr(drv, "_load_table", counted)
+    return calls
+
+
+def _writer(root, n, start):
+    start.wait(10)
+    drv = JSONDriver(root=root, multiprocess=True)
+    for i in range(n):
+        drv.create(T, {"name": f"p{i}"})
+
+
+@pytest.mark.skipif(fcntl is None, reason="fcntl nije dostupan")
+def test_processes_do_not_lose_writes(tmp_path):
+    ctx = mp.get_context("fork")
+    start = ctx.Event()
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), 40, start)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    start.set()
+    for p in procs:
+        p.join(60)
+        assert p.exitcode == 0
+
+    rows = JSONDriver(root=str(tmp_path)).read(T, {})
+    assert len(rows) == 120
+    assert sorted(r["id"] for r in rows) == list(range(1, 121))
+
+
+def test_unchanged_table_is_not_reloaded(tmp_path, monkeypatch):
+    drv = JSONDriver(root=str(tmp_path), multiprocess=True)
+    drv.create(T, {"name": "a"})
+    loads = _count_loads(monkeypatch, drv)
+    for _ in range(5):
+        assert drv.find_by_pk(T, 1)["name"] == "a"
+        assert drv.count(T) == 1
+    assert loads["n"] == 0
+
+
+def test_other_writer_is_applied_from_journal_tail(tmp_path, monkeypatch):
+    # dve instance = dva "procesa" sa odvojenim kešom; vidi se samo generacija na disku
+    a = JSONDriver(root=str(tmp_path), multiprocess=True)
+    b = JSONDriver(root=str(tmp_path), multiprocess=True)
+    a.create_index(T, "group")
+    for i in range(5):
+        a.create(T, {"name": f"n{i}", "group": i % 2})
+    assert b.count(T) == 5
+    loads = _count_loads(monkeypatch, b)
+
+    a.create(T, {"name": "new", "group": 1})
+    a.update(T, 1, {"group": 1})
+    a.delete(T, 2)
+    assert sorted(r["id"] for r in b.read(T, {"where": {"group": 1}})) == [1, 4, 6]
+    assert b.find_by_pk(T, 2) is None
+    assert loads["n"] == 0  # samo rep žurnala
+    assert b.create(T, {"name": "from b", "group": 0}) == 7
+
+    a.set_format(T, "jsonl")  # a prvo vidi red iz b, pa prepisuje bazu -> b učitava ponovo
+    assert b.count(T) == 6
+    assert loads["n"] == 1
+    assert a.find_by_pk(T, 7)["name"] == "from b"
+
+
+def test_transaction_holds_exclusive_file_lock(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), multiprocess=True)
+    drv.create(T, {"name": "a"})
+    fl = drv._file_lock(T)
+    with drv.transaction():
+        drv.update(T, 1, {"name": "b"})
+        assert fl.exclusive_held()
+    assert not fl.exclusive_held()
+    gen = fl.generation()
+    drv.update(T, 1, {"name": "c"})
+    assert fl.generation() == gen + 1
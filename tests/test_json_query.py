@@ -0,0 +1,104 @@
+# =============================================================================
+# File:        tests/test_json_query.py
+# Purpose:     JSONDriver read pipeline (strim, filter, order, limit)
+# =============================================================================
+from system.db.json_driver import JSONDriver
+from system.db.manager.db_manager import DBManager
+
+TABLE = "tst_query_users"
+
+
+def _seed(drv, n=20):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(TABLE, {"name": f"User {i}", "group": "a" if i % 2 else "b", "score": i % 7})
+
+
+def test_iter_streams_and_stops_early(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+
+    seen = []
+
+    class Probe(dict):
+        def get(self, key, default=None):
+            seen.append(self["id"])
+            return super().get(key, default)
+
+    drv._cache[TABLE] = [Probe(r) for r in drv._cache[TABLE]]
+    first = drv.read(TABLE, {"where": {"group": "b"}, "first": True})
+    assert first["id"] == 2
+    assert max(seen) == 2  # filter je stao na prvom pogotku
+
+    it = drv.iter(TABLE, {"where": {"group": "a"}, "limit": 3, "select": ["id"]})
+    assert next(it) == {"id": 1}
+    assert list(it) == [{"id": 3}, {"id": 5}]
+
+
+def test_read_filters_in_one_pass(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    rows = drv.read(TABLE, {"where": {"group": "a", "score": {">=": 3, "!=": 5}, "name": {"like": "user"}}})
+    assert [r["id"] for r in rows] == [3, 11, 13, 17]
+    assert drv.read(TABLE, {"where": [("id", "in", [4, 4, 6])], "offset": 1}) == [drv.find_by_pk(TABLE, 6)]
+
+
+def test_dbmanager_iter(tmp_path):
+    with DBManager.with_driver("json", str(tmp_path)):
+        for i in range(5):
+            DBManager.create(TABLE, {"n": i})
+        assert [r["n"] for r in DBManager.iter(TABLE, {"where": {"n": {">": 1}}})] == [2, 3, 4]
+    with DBManager.with_driver("sqlite", str(tmp_path / "iter.db")):
+        for i in range(5):
+            DBManager.create(TABLE, {"n": i})
+        assert [r["n"] for r in DBManager.iter(TABLE, {"where": {"n": {">": 1}}})] == [2, 3, 4]
+
+
+def test_compiled_predicate_cache_and_semantics(tmp_path):
+    from system.db.predicates import _compile_shape, compile_where
+
+    pred = compile_where([("tags", "in", [["x"], "y"]), ("name", "like", "AN"), ("age", ">", 18)])
+    assert pred({"tags": ["x"], "name": "Ana", "age": 30})
+    assert not pred({"tags": "y", "name": "Ana", "age": None})
+    assert not pred({"tags": "z", "name": "Ana", "age": 30})
+
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.read(TABLE, {"where": {"group": "a", "score": {">": 1}}})
+    before = _compile_shape.cache_info()
+    rows = drv.read(TABLE, {"where": {"group": "b", "score": {">": 4}}})
+    after = _compile_shape.cache_info()
+    assert after.misses == before.misses and after.hits == before.hits + 1
+    assert [r["id"] for r in rows] == [6, 12, 20]
+
+
+def test_multi_key_order_and_top_k(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv)
+    drv.update(TABLE, 4, {"score": None})
+    drv.update(TABLE, 9, {"score": "x"})  # mešani tipovi ne smeju da obore sortiranje
+
+    def expected(desc_score):
+        def part(v):
+            return (0, 0) if v is None else (1, v) if isinstance(v, int) else (2, v)
+        rows = drv.read(TABLE, {})
+        by_group = sorted(rows, key=lambda r: r["group"])
+        out = []
+        for g in ("a", "b"):
+            grp = [r for r in by_group if r["group"] == g]
+            out += sorted(grp, key=lambda r: part(r["score"]), reverse=desc_score)
+        return [r["id"] for r in out]
+
+    for desc in (False, True):
+        order = [("group", "asc"), ("score", "desc" if desc else "asc")]
+        full = [r["id"] for r in drv.read(TABLE, {"order": order})]
+        assert full == expected(desc)
+        # top-k (heap) daje isti prefiks kao puno sortiranje, i sa offset-om
+        assert [r["id"] for r in drv.read(TABLE, {"order": order, "limit": 5})] == full[:5]
+        assert [r["id"] for r in drv.read(TABLE, {"order": order, "limit": 4, "offset": 3})] == full[3:7]
+
+    # isti smer svih polja; NULL je prvi u ASC, poslednji u DESC
+    asc = drv.read(TABLE, {"order": [("score", "asc"), ("id", "asc")], "limit": 2})
+    assert [r["id"] for r in asc] == [4, 7]
+    desc = drv.read(TABLE, {"order": [("score", "desc"), ("id", "desc")]})
+    assert desc[0]["id"] == 9 and desc[-1]["id"] == 4
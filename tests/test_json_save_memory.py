@@ -0,0 +1,50 @@
+# =============================================================================
+# File:        tests/test_json_save_memory.py
+# Purpose:     Memorijski benchmark upisa JSON tabele: strimovan upis u delovima
+#              (_save_table) ima vršnu memoriju koja ne raste sa brojem redova
+# Run:         JSON_BENCH_SAVE_ROWS=250000 pytest -q tests/test_json_save_memory.py -s
+# =============================================================================
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from system.db.json_driver import JSONDriver
+
+TABLE = "tst_save_memory"
+N_ROWS = int(os.environ.get("JSON_BENCH_SAVE_ROWS", "5000"))  # veći test: 250000 (meri se i 4x toliko)
+
+
+def _peak(fn):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, time.perf_counter() - t0
+
+
+def _save(root, n):
+    drv = JSONDriver(root=str(root), journal=False)
+    rows = [{"id": i, "name": f"User {i}", "email": f"user{i}@x.com", "age": i % 90} for i in range(1, n + 1)]
+    drv._cache[TABLE] = rows
+    peak, took = _peak(lambda: drv._save_table(TABLE))
+    with open(root / f"{TABLE}.json", encoding="utf-8") as f:
+        assert json.load(f) == rows
+    return peak, took
+
+
+def test_streaming_save_peak_memory(tmp_path):
+    small_peak, small_t = _save(tmp_path / "small", N_ROWS)
+    big_peak, big_t = _save(tmp_path / "big", 4 * N_ROWS)
+
+    mb = 1024 * 1024
+    print(f"\n[JSON save] {N_ROWS} redova: peak={small_peak / mb:.2f} MB, {small_t:.2f}s | "
+          f"{4 * N_ROWS} redova: peak={big_peak / mb:.2f} MB, {big_t:.2f}s")
+
+    # vršna memorija zavisi od veličine dela (JSON_CHUNK_ROWS), ne od broja redova
+    assert big_peak < 1.5 * small_peak
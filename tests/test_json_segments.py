@@ -0,0 +1,70 @@
+# =============================================================================
+# File:        tests/test_json_segments.py
+# Purpose:     Segmentirani raspored JSON tabele (id opsezi + manifest)
+# =============================================================================
+import json
+import os
+
+from system.db.json_driver import JSONDriver
+
+TABLE = "tst_segments"
+
+
+def _manifest(root):
+    with open(os.path.join(root, f"{TABLE}.manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_segments_rewrite_only_touched_range(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), journal=False, segment_size=10)
+    with drv.transaction():
+        for i in range(1, 26):
+            drv.create(TABLE, {"n": i})
+
+    m1 = _manifest(tmp_path)
+    assert sorted(m1["segments"]) == ["0", "1", "2"]
+    assert [m1["segments"][k]["rows"] for k in ("0", "1", "2")] == [9, 10, 6]
+    assert not os.path.exists(tmp_path / f"{TABLE}.json")
+
+    drv.update(TABLE, 12, {"n": 120})
+    m2 = _manifest(tmp_path)
+    assert m2["segments"]["0"] == m1["segments"]["0"]
+    assert m2["segments"]["2"] == m1["segments"]["2"]
+    assert m2["segments"]["1"]["file"] != m1["segments"]["1"]["file"]
+    # stari fajl segmenta je obrisan posle zamene manifesta
+    assert sorted(os.listdir(tmp_path / f"{TABLE}.segments")) == sorted(e["file"] for e in m2["segments"].values())
+
+    fresh = JSONDriver(root=str(tmp_path), segment_size=10)
+    assert fresh.count(TABLE) == 25
+    assert fresh.find_by_pk(TABLE, 12)["n"] == 120
+
+
+def test_find_by_pk_loads_single_segment(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), segment_size=10)
+    with drv.transaction():
+        for i in range(1, 31):
+            drv.create(TABLE, {"n": i})
+    drv._compact(TABLE)
+    drv.update(TABLE, 25, {"n": 250})  # ostaje u žurnalu
+
+    fresh = JSONDriver(root=str(tmp_path))
+    assert fresh.find_by_pk(TABLE, 15)["n"] == 15
+    assert fresh.find_by_pk(TABLE, 25)["n"] == 250
+    assert TABLE not in fresh._cache
+    assert list(fresh._partial[TABLE]["segs"]) == ["1"]
+
+    # prvi upis učitava ostatak tabele
+    fresh.delete(TABLE, 3)
+    assert fresh.count(TABLE) == 29
+    assert TABLE not in fresh._partial
+
+
+def test_single_file_table_is_converted(tmp_path):
+    JSONDriver(root=str(tmp_path), journal=False).create(TABLE, {"n": 1})
+    assert os.path.exists(tmp_path / f"{TABLE}.json")
+
+    drv = JSONDriver(root=str(tmp_path), journal=False, segment_size=100)
+    drv.create(TABLE, {"n": 2})
+    assert not os.path.exists(tmp_path / f"{TABLE}.json")
+    assert _manifest(tmp_path)["segments"]["0"]["rows"] == 2
+    assert JSONDriver(root=str(tmp_path)).count(TABLE) == 2
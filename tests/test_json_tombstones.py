@@ -0,0 +1,108 @@
+# =============================================================================
+# File:        tests/test_json_tombstones.py
+# Purpose:     Tombstone brisanje u JSONDriver-u: O(1) delete, sažimanje pri upisu
+#              baze / na pragu, rollback, bulk_delete + mini benchmark (red čekanja)
+# Run:         pytest -q tests/test_json_tombstones.py -s
+# =============================================================================
+import time
+
+import pytest
+
+from system.db.json_driver import JSONDriver
+
+T = "tst_tomb_jobs"
+
+
+def _seed(drv, n):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(T, {"state": "new" if i % 2 else "done", "n": i})
+
+
+def test_delete_leaves_tombstone_and_reads_skip_it(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create_index(T, "state")
+    _seed(drv, 10)
+    pos_of_9 = drv._pk[T][9]
+
+    assert drv.delete(T, 3) is True
+    assert drv.delete(T, {"where": {"n": {"in": [5, 6]}}}) == 2
+    assert drv._tombs[T] == 3
+    assert drv._pk[T][9] == pos_of_9  # ostale pozicije se ne pomeraju
+
+    assert [r["id"] for r in drv.read(T, {})] == [1, 2, 4, 7, 8, 9, 10]
+    assert drv.count(T) == 7
+    assert drv.count(T, {"state": "new"}) == 3
+    assert drv.read(T, {"order": [("n", "desc")], "limit": 2})[1]["id"] == 9
+    assert drv.find_by_pk(T, 5) is None
+    assert drv.exists(T, {"n": 3}) is False
+
+    drv.create(T, {"state": "new", "n": 11})
+    fresh = JSONDriver(root=str(tmp_path))
+    assert [r["id"] for r in fresh.read(T, {})] == [1, 2, 4, 7, 8, 9, 10, 11]
+
+    with drv._writing(T):
+        drv._compact(T)  # upis baze pod write lock-om sažima listu
+    assert T not in drv._tombs
+    assert None not in drv._cache[T]
+    assert drv.find_by_pk(T, 9)["n"] == 9
+
+
+def test_rollback_restores_rows_in_place(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, 6)
+    before = drv.read(T, {})
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.delete(T, 2)
+            drv.delete(T, 6)  # poslednji red se skida sa kraja
+            drv.create(T, {"n": 7})
+            drv.delete(T, {"where": {"state": "new"}})
+            raise RuntimeError("boom")
+    assert drv.read(T, {}) == before
+    assert drv._tombs.get(T, 0) == 0
+    assert all(drv.find_by_pk(T, r["id"]) is r for r in drv.read(T, {}))
+
+
+def test_reload_resets_tombstones(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, 3)
+    drv.delete(T, 2)
+    assert drv._tombs[T] == 1
+    drv._load_table(T)  # npr. DBManager.raw
+    assert T not in drv._tombs
+    assert drv.count(T) == 2
+    assert drv.exists(T) is True
+    drv.delete(T, 1)
+    drv.delete(T, 3)
+    drv._load_table(T)
+    assert drv.count(T) == 0 and drv.exists(T) is False
+
+
+def test_threshold_compaction_and_bulk_delete(tmp_path):
+    drv = JSONDriver(root=str(tmp_path), tombstone_min=4, tombstone_ratio=0.5)
+    _seed(drv, 10)
+    for i in (1, 2, 3):
+        drv.delete(T, i)
+    assert drv._tombs[T] == 3
+    drv.delete(T, 4)  # 4 tombstone-a, ali < 0.5 * 10
+    assert drv._tombs[T] == 4
+    assert drv.bulk_delete(T, [5, 5, 7, 99]) == 2  # 6 >= max(4, 0.5 * 10) -> sažeto
+    assert T not in drv._tombs
+    assert [r["id"] for r in drv._cache[T]] == [6, 8, 9, 10]
+    assert drv._pk[T] == {6: 0, 8: 1, 9: 2, 10: 3}
+    assert JSONDriver(root=str(tmp_path)).count(T) == 4
+
+
+def test_queue_workload_benchmark(tmp_path):
+    n, pops = 20000, 5000
+    drv = JSONDriver(root=str(tmp_path), durability="none")
+    _seed(drv, n)
+    t0 = time.perf_counter()
+    for _ in range(pops):
+        job = drv.read(T, {"first": True})
+        drv.delete(T, job["id"])
+    dt = time.perf_counter() - t0
+    print(f"\n[JSON tombstone] {pops} pop-ova (first + delete) iz reda od {n}: {dt:.3f} s")
+    assert drv.count(T) == n - pops
+    assert drv.read(T, {"first": True})["id"] == pops + 1
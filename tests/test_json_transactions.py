@@ -0,0 +1,43 @@
+# =============================================================================
+# File:        tests/test_json_transactions.py
+# Purpose:     Undo-log transakcije JSONDriver-a: rollback vraća samo dirnute redove
+#              (pk mapa, hash i sorted indeksi), bez snapshot-a tabela
+# Run:         pytest -q tests/test_json_transactions.py
+# =============================================================================
+import pytest
+
+from system.db.json_driver import JSONDriver
+
+USERS = "tst_tx_users"
+
+
+def _seed(drv, n):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(USERS, {"name": f"User {i}", "group": i % 10})
+
+
+def test_rollback_undo_log_touches_only_changed_rows(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create_index(USERS, "group")
+    drv.create_index(USERS, "name", kind="sorted")
+    _seed(drv, n=50)
+    before = [dict(r) for r in drv.read(USERS, {})]
+
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.update(USERS, {"where": {"group": 3}}, {"group": 99, "name": "Z"})
+            drv.delete(USERS, {"where": [("id", "in", [5, 7, 20])]})
+            drv.create(USERS, {"name": "New", "group": 3})
+            drv.delete(USERS, 1)
+            tx = drv._tx()
+            # undo log raste sa poslom, ne sa veličinom tabele
+            assert len(tx.undo) == 5 + 1 + 1 + 1
+            raise RuntimeError("boom")
+
+    assert drv.read(USERS, {}) == before
+    assert drv.get_last_id(USERS) == 50
+    assert sorted(r["id"] for r in drv.read(USERS, {"where": {"group": 3}})) == [3, 13, 23, 33, 43]
+    assert drv.read(USERS, {"where": {"group": 99}}) == []
+    assert drv.find_by_pk(USERS, 7)["name"] == "User 7"
+    assert drv.read(USERS, {"order": [("name", "asc")], "limit": 1})[0]["name"] == "User 1"
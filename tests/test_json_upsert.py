@@ -0,0 +1,93 @@
+# =============================================================================
+# File:        tests/test_json_upsert.py
+# Purpose:     upsert/bulk_upsert u JSONDriver-u: lookup preko indeksa (O(n + m)),
+#              jedna transakcija i jedan upis na disk po seriji
+# Run:         pytest -q tests/test_json_upsert.py -s
+# =============================================================================
+import time
+
+import pytest
+
+from system.db.json_driver import JSONDriver
+
+T = "tst_upsert_users"
+
+
+def _seed(drv, n):
+    with drv.transaction():
+        for i in range(1, n + 1):
+            drv.create(T, {"email": f"u{i}@x.com", "org": i % 4, "name": f"User {i}"})
+
+
+def test_upsert_updates_or_creates(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, 5)
+
+    row = drv.upsert(T, {"id": 99, "email": "u2@x.com", "name": "Two"}, ["email"])
+    assert row["id"] == 2 and row["name"] == "Two"  # id se ne menja pri update-u
+    row = drv.upsert(T, {"email": "new@x.com", "name": "New"}, ["email"])
+    assert row["id"] == 6
+
+    fresh = JSONDriver(root=str(tmp_path))
+    assert fresh.find_by_pk(T, 2)["name"] == "Two"
+    assert fresh.count(T) == 6
+    with pytest.raises(ValueError):
+        drv.upsert(T, {"name": "x"}, ["email"])
+
+
+def test_bulk_upsert_uses_index_and_one_write(tmp_path, monkeypatch):
+    drv = JSONDriver(root=str(tmp_path))
+    drv.create_index(T, "email")
+    _seed(drv, 10)
+    writes = []
+    orig = drv._flush_group
+    monkeypatch.setattr(drv, "_flush_group", lambda batch: (writes.append(batch), orig(batch)))
+
+    res = drv.bulk_upsert(T, [
+        {"email": "u3@x.com", "name": "Three"},
+        {"email": "a@x.com", "name": "A"},
+        {"email": "a@x.com", "name": "A2"},  # duplikat u seriji -> update novog reda
+        {"email": "u10@x.com", "name": "Ten"},
+    ], ["email"])
+
+    assert res == {"created": 1, "updated": 3}
+    assert len(writes) == 1
+    assert drv.read(T, {"where": {"email": "a@x.com"}}) == [{"email": "a@x.com", "name": "A2", "id": 11}]
+    assert drv.find_by_pk(T, 10)["name"] == "Ten"
+
+
+def test_bulk_upsert_composite_key_and_rollback(tmp_path):
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, 8)
+    res = drv.bulk_upsert(T, [
+        {"org": 1, "name": "User 5", "email": "five@x.com"},
+        {"org": 2, "name": "User 5", "email": "other@x.com"},
+    ], ["org", "name"])
+    assert res == {"created": 1, "updated": 1}
+    assert drv.find_by_pk(T, 5)["email"] == "five@x.com"
+
+    before = drv.read(T, {})
+    with pytest.raises(ValueError):
+        drv.bulk_upsert(T, [{"org": 3, "name": "User 3", "email": "x"}, {"org": 1}], ["org", "name"])
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.bulk_upsert(T, [{"org": 3, "name": "User 3", "email": "x"}, {"org": 9, "name": "Z"}],
+                            ["org", "name"])
+            raise RuntimeError("boom")
+    assert drv.read(T, {}) == before
+
+
+def test_bulk_upsert_speed(tmp_path):
+    n, m = 20000, 10000
+    drv = JSONDriver(root=str(tmp_path))
+    _seed(drv, n)
+    batch = [{"email": f"u{i}@x.com", "name": f"Synced {i}"} for i in range(n - m // 2 + 1, n + m // 2 + 1)]
+
+    t0 = time.perf_counter()
+    res = drv.bulk_upsert(T, batch, ["email"])
+    dt = time.perf_counter() - t0
+    print(f"\n[JSON bulk_upsert] {m} zapisa u tabelu od {n}: {dt:.3f} s")
+
+    assert res == {"created": m // 2, "updated": m // 2}
+    assert drv.count(T) == n + m // 2
+    assert dt < 10  # O(n·m) bi ovde bilo 2·10^8 poređenja
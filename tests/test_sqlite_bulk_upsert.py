@@ -0,0 +1,76 @@
+# =============================================================================
+# File:        tests/test_sqlite_bulk_upsert.py
+# Purpose:     Set-based bulk_upsert u SQLiteDriver-u: created/updated bez SELECT-a po redu
+#              (RETURNING i TEMP-tabela putanja) + mini benchmark
+# Run:         pytest -q tests/test_sqlite_bulk_upsert.py -s
+# =============================================================================
+import time
+
+import pytest
+
+from system.db.sqlite_driver import SQLiteDriver
+
+T = "tst_bup_users"
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_upsert_counts_and_rows(tmp_path, returning):
+    drv = SQLiteDriver(path=str(tmp_path / "bup.db"), returning=returning)
+    drv.bulk_insert(T, [{"email": f"u{i}@x.com", "name": f"old {i}"} for i in range(600)])
+
+    batch = [{"email": f"u{i}@x.com", "name": f"new {i}"} for i in range(400, 1000)]  # 200 upd, 400 novih
+    batch.append({"email": "u999@x.com", "name": "dup"})  # isti ključ ponovo u ulazu → updated
+    assert drv.bulk_upsert(T, batch, ["email"]) == {"created": 400, "updated": 201}
+
+    assert drv.count(T) == 1000
+    assert drv.read(T, {"where": {"email": "u10@x.com"}, "first": True})["name"] == "old 10"
+    assert drv.read(T, {"where": {"email": "u450@x.com"}, "first": True})["name"] == "new 450"
+    assert drv.read(T, {"where": {"email": "u999@x.com"}, "first": True})["name"] == "dup"
+    assert drv.bulk_upsert(T, [], ["email"]) == {"created": 0, "updated": 0}
+    drv.close()
+
+
+def test_bulk_upsert_with_explicit_ids_uses_key_lookup(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "bup.db"))
+    drv.bulk_insert(T, [{"email": "a@x.com", "name": "A"}, {"email": "b@x.com", "name": "B"}])
+    res = drv.bulk_upsert(T, [
+        {"id": 1, "email": "a@x.com", "name": "A2"},
+        {"id": 50, "email": "c@x.com", "name": "C"},  # novi red sa zadatim id-jem
+    ], ["email"])
+    assert res == {"created": 1, "updated": 1}
+    assert drv.find_by_pk(T, 50)["name"] == "C"
+    assert drv.find_by_pk(T, 1)["name"] == "A2"
+    drv.close()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_upsert_rows_with_different_keys(tmp_path, returning):
+    drv = SQLiteDriver(path=str(tmp_path / "bup.db"), returning=returning)
+    drv.bulk_insert(T, [{"email": "a@x.com", "name": "A", "age": 30}])
+    res = drv.bulk_upsert(T, [
+        {"email": "a@x.com", "age": 31},  # bez name: postojeće ime ostaje
+        {"email": "b@x.com", "name": "B", "city": "NS"},  # ključ koji prvi red nema
+        {"id": 70, "email": "c@x.com"},
+    ], ["email"])
+    assert res == {"created": 2, "updated": 1}
+    a = drv.read(T, {"where": {"email": "a@x.com"}, "first": True})
+    assert (a["name"], a["age"]) == ("A", 31)
+    assert drv.read(T, {"where": {"email": "b@x.com"}, "first": True})["city"] == "NS"
+    assert drv.find_by_pk(T, 70)["email"] == "c@x.com"
+    drv.close()
+
+
+def test_bulk_upsert_benchmark(tmp_path):
+    n = 50000
+    drv = SQLiteDriver(path=str(tmp_path / "bup.db"))
+    drv.bulk_insert(T, [{"email": f"u{i}@x.com", "age": i} for i in range(n)])
+    stmts = []
+    drv.conn.set_trace_callback(stmts.append)
+    t0 = time.perf_counter()
+    res = drv.bulk_upsert(T, [{"email": f"u{i}@x.com", "age": -i} for i in range(n // 2, n + n // 2)], ["email"])
+    dt = time.perf_counter() - t0
+    drv.conn.set_trace_callback(None)
+    print(f"\n[SQLite bulk_upsert] {n} redova (pola novih) u {dt:.3f} s, {len(stmts)} statement-a")
+    assert res == {"created": n // 2, "updated": n // 2}
+    assert len(stmts) < n // 100
+    drv.close()
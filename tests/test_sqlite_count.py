@@ -0,0 +1,33 @@
+# =============================================================================
+# File:        tests/test_sqlite_count.py
+# Purpose:     count/exists u SQLiteDriver-u: operatorski filteri idu kroz isti WHERE kao read()
+# Run:         pytest -q tests/test_sqlite_count.py
+# =============================================================================
+from system.db.manager.db_manager import DBManager
+from system.db.sqlite_driver import SQLiteDriver
+
+T = "tst_sqlite_count_users"
+
+
+def test_count_honours_operator_filters(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "count.db"))
+    drv.bulk_insert(T, [{"name": f"User {i}", "age": i} for i in range(1, 11)])
+
+    assert drv.count(T) == 10
+    assert drv.count(T, {"age": 3}) == 1
+    assert drv.count(T, {"age": {">": 3}}) == 7
+    assert drv.count(T, {"age": {">=": 3, "<": 6}}) == 3
+    assert drv.count(T, {"age": {"in": [1, 2, 99]}}) == 2
+    assert drv.count(T, {"age": {"in": []}}) == 0
+    assert drv.count(T, {"name": {"startswith": "User 1"}}) == 2
+    assert drv.count(T, {"name": {"like": "user"}, "age": {"!=": 5}}) == 9
+    assert drv.count(T, {"age": {">": 3}}) == len(drv.read(T, {"where": {"age": {">": 3}}}))
+    drv.close()
+
+
+def test_dbmanager_count_with_operator_filter(tmp_path):
+    with DBManager.with_driver("sqlite", str(tmp_path / "count_mgr.db")):
+        for i in range(1, 6):
+            DBManager.create(T, {"age": i})
+        assert DBManager.count(T, age={">": 3}) == 2
+        assert DBManager.count(T, age={"<=": 3}) == 3
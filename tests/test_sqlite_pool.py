@@ -0,0 +1,215 @@
+# =============================================================================
+# File:        tests/test_sqlite_pool.py
+# Purpose:     SQLiteDriver konekcije: writer + ograničen pool čitalaca (WAL), izolacija
+#              transakcija između niti + mini benchmark (read QPS po broju niti)
+# Run:         pytest -q tests/test_sqlite_pool.py -s
+# =============================================================================
+import threading
+import time
+
+from system.db.sqlite_driver import SQLiteDriver
+
+T = "tst_pool_users"
+DURATION = 0.3  # sekunde po merenju
+
+
+def _seed(drv, n):
+    drv.bulk_insert(T, [{"name": f"User {i}", "grp": i % 10} for i in range(1, n + 1)])
+
+
+def _read_qps(drv, threads: int) -> float:
+    """Upiti koji većinu vremena provode u SQLite-u (sken bez indeksa, GIL je pušten)."""
+    stop = time.perf_counter() + DURATION
+    counts = [0] * threads
+
+    def worker(k):
+        n = 0
+        while time.perf_counter() < stop:
+            drv.count(T, {"grp": n % 10})
+            n += 1
+        counts[k] = n
+
+    ts = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return sum(counts) / DURATION
+
+
+def test_readers_do_not_see_uncommitted_writes(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"))
+    _seed(drv, 3)
+    in_tx = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with drv.transaction():
+            drv.create(T, {"name": "pending"})
+            assert drv.count(T) == 4  # ista nit vidi svoju izmenu
+            in_tx.set()
+            release.wait(5)
+
+    w = threading.Thread(target=writer)
+    w.start()
+    assert in_tx.wait(5)
+    try:
+        # druga nit čita paralelno sa otvorenom transakcijom i vidi samo potvrđeno stanje
+        assert drv.count(T) == 3
+        assert drv.read(T, {"where": {"name": "pending"}}) == []
+    finally:
+        release.set()
+        w.join()
+    assert drv.count(T) == 4
+    drv.close()
+
+
+def test_writes_from_other_threads_wait_for_transaction(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"))
+    _seed(drv, 1)
+    in_tx = threading.Event()
+    done = []
+
+    def other():
+        in_tx.wait(5)
+        drv.create(T, {"name": "other"})  # ne sme da upadne u tuđu transakciju
+        done.append(True)
+
+    o = threading.Thread(target=other)
+    o.start()
+    try:
+        with drv.transaction():
+            drv.create(T, {"name": "rolled back"})
+            in_tx.set()
+            time.sleep(0.1)
+            assert not done
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    o.join(5)
+    assert [r["name"] for r in drv.read(T, {})] == ["User 1", "other"]
+    drv.close()
+
+
+def test_reader_pool_is_bounded(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"), read_pool_size=2)
+    _seed(drv, 50)
+    for _ in range(5):  # niti se gase i rađaju (thread pool) -> konekcije se ne gomilaju
+        ts = [threading.Thread(target=drv.find_by_pk, args=(T, 1)) for _ in range(8)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+    assert len(drv._readers) <= 2
+
+    # ugnježdeno čitanje iste niti ne čeka samo na sebe ni kad je pool od jedne konekcije
+    one = SQLiteDriver(path=str(tmp_path / "pool.db"), read_pool_size=1)
+    assert sum(one.find_by_pk(T, r["id"])["grp"] == r["grp"] for r in one.iter(T, {})) == 50
+    assert len(one._readers) == 1
+    one.close()
+    drv.close()
+
+
+def test_non_wal_reads_go_through_writer(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_JOURNAL_MODE", "delete")
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"))
+    _seed(drv, 3)
+    rows = drv.iter(T, {}, chunk_size=1)
+    assert next(rows)["name"] == "User 1"  # otvoreno čitanje (suspendovan generator)
+    drv.create(T, {"name": "while reading"})  # ne sme da čeka na SHARED lock čitaoca
+    rows.close()
+    assert drv._readers == []
+    assert drv.count(T) == 4
+    drv.close()
+
+
+def test_exhausted_reader_pool_raises_instead_of_hanging(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "100")
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"), read_pool_size=1)
+    _seed(drv, 3)
+    held = drv.iter(T, {})
+    next(held)  # jedina reader konekcija ostaje zauzeta u ovoj niti
+    errors = []
+
+    def other():
+        try:
+            drv.find_by_pk(T, 1)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    t = threading.Thread(target=other)
+    t.start()
+    t.join(5)
+    assert not t.is_alive()
+    assert errors and "pool" in str(errors[0])
+    held.close()
+    assert drv.find_by_pk(T, 1)["name"] == "User 1"
+    drv.close()
+
+
+def test_reader_sees_indexes_created_by_writer(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"))
+    assert drv.list_indexes(T) == []  # reader pripremi upit dok tabela još ne postoji
+    _seed(drv, 3)
+    assert drv.create_index(T, "grp") is True
+    assert drv.list_indexes(T) == ["grp"]
+    assert drv.drop_index(T, "grp") is True
+    assert drv.list_indexes(T) == []
+    drv.close()
+
+
+def test_concurrent_reads_use_separate_connections(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"), read_pool_size=4)
+    _seed(drv, 20)
+    in_tx = threading.Event()
+    release = threading.Event()
+
+    def writer():
+        with drv.transaction():
+            drv.create(T, {"name": "pending"})
+            in_tx.set()
+            release.wait(5)
+
+    w = threading.Thread(target=writer)
+    w.start()
+    assert in_tx.wait(5)
+    together = threading.Barrier(4, timeout=5)
+    conns, counts = [], []
+
+    def reader():
+        rows = drv.iter(T, {})
+        next(rows)  # otvoreno čitanje drži konekciju
+        conns.append(drv._local.conn)
+        together.wait()  # sve četiri niti čitaju u isto vreme
+        counts.append(drv.count(T))
+        rows.close()
+
+    try:
+        ts = [threading.Thread(target=reader) for _ in range(4)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join(5)
+    finally:
+        release.set()
+        w.join()
+    # svaka nit ima svoju reader konekciju i čita dok writer drži transakciju
+    assert len({id(c) for c in conns}) == 4
+    assert all(c is not drv.conn for c in conns)
+    assert counts == [20] * 4
+    drv.close()
+
+
+def test_read_qps_benchmark(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "pool.db"))
+    _seed(drv, 20000)
+    shared = SQLiteDriver(path=str(tmp_path / "pool.db"), read_connections=False)
+    try:
+        pooled = {n: _read_qps(drv, n) for n in (1, 4)}
+        single = _read_qps(shared, 4)
+    finally:
+        shared.close()
+        drv.close()
+    print("\n[SQLite pool] read QPS (sken 20k redova): "
+          f"pool 1 nit={int(pooled[1])}, pool 4 niti={int(pooled[4])}, "
+          f"jedna deljena konekcija 4 niti={int(single)}")
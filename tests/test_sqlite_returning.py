@@ -0,0 +1,127 @@
+# =============================================================================
+# File:        tests/test_sqlite_returning.py
+# Purpose:     INSERT ... RETURNING u SQLiteDriver-u: create/upsert bez ponovnog SELECT-a,
+#              bulk_insert vraća tačne id-jeve (bez pretpostavke o uzastopnosti) + fallback
+# Run:         pytest -q tests/test_sqlite_returning.py -s
+# =============================================================================
+import time
+
+import pytest
+
+from system.db.sqlite_driver import SQLiteDriver, _HAS_RETURNING
+
+T = "tst_ret_users"
+
+needs_returning = pytest.mark.skipif(not _HAS_RETURNING, reason="SQLite < 3.35 (bez RETURNING)")
+
+
+def _trace(drv):
+    stmts = []
+    drv.conn.set_trace_callback(lambda sql: stmts.append(" ".join(sql.split())))
+    return stmts
+
+
+@needs_returning
+def test_create_and_upsert_return_row_in_one_statement(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "ret.db"))
+    drv.create(T, {"email": "a@x.com", "name": "A"})
+    drv.upsert(T, {"email": "a@x.com", "name": "A"}, ["email"])
+    stmts = _trace(drv)
+
+    row = drv.create(T, {"email": "b@x.com", "name": "B"})
+    assert row["name"] == "B" and "created_at" in row
+    assert drv.find_by_pk(T, row["id"]) == row
+    assert len(stmts) == 1 and stmts[0].endswith("RETURNING *;")
+
+    stmts.clear()
+    row = drv.upsert(T, {"email": "a@x.com", "name": "A2"}, ["email"])
+    assert row["id"] == 1 and row["name"] == "A2"
+    assert [s.split()[0] for s in stmts] == ["BEGIN;", "INSERT", "COMMIT;"]
+    assert drv.get_last_id(T) == drv.read(T, {"where": {"email": "b@x.com"}, "first": True})["id"]
+    drv.close()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_bulk_insert_returns_exact_ids(tmp_path, returning):
+    drv = SQLiteDriver(path=str(tmp_path / "ret.db"), returning=returning)
+    ids = drv.bulk_insert(T, [{"name": f"U{i}"} for i in range(1200)])  # više blokova
+    assert ids == list(range(1, 1201))
+    assert [drv.find_by_pk(T, i)["name"] for i in (ids[0], ids[700], ids[-1])] == ["U0", "U700", "U1199"]
+
+    # eksplicitni id-jevi sa rupama: stari kod bi vratio range(last - n + 1, last + 1)
+    assert drv.bulk_insert(T, [{"id": 5000, "name": "a"}, {"id": 3000, "name": "b"}]) == [5000, 3000]
+    assert drv.bulk_insert(T, [{"name": "c"}, {"name": "d"}]) == [5001, 5002]
+    assert drv.get_last_id(T) == 5002
+    assert drv.create(T, {"name": "e"})["id"] == 5003
+    drv.close()
+
+
+class _CursorSpy:
+    def __init__(self, cur, calls):
+        self._cur, self._calls = cur, calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._cur, name)
+        if name in ("execute", "executemany"):
+            def counted(*a, **kw):
+                self._calls.append(name)
+                return attr(*a, **kw)
+            return counted
+        return attr
+
+
+class _ConnSpy:
+    def __init__(self, conn):
+        self._conn, self.calls = conn, []
+
+    def cursor(self):
+        return _CursorSpy(self._conn.cursor(), self.calls)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_explicit_ids_use_executemany(tmp_path, returning):
+    drv = SQLiteDriver(path=str(tmp_path / "ret.db"), returning=returning)
+    drv.create(T, {"name": "seed"})
+    spy = drv.conn = _ConnSpy(drv.conn)
+    ids = drv.bulk_insert(T, [{"id": 100 + i, "name": f"x{i}"} for i in range(300)])
+    assert ids == list(range(100, 400))
+    assert spy.calls == ["execute", "executemany", "execute"]  # BEGIN, jedan executemany, COMMIT
+
+    # mešano: redosled upisa prati ulaz, generisani id-jevi dolaze posle zadatih ispred njih
+    ids = drv.bulk_insert(T, [{"id": None, "name": "a"}, {"id": 1000, "name": "b"}, {"id": None, "name": "c"}])
+    assert ids == [400, 1000, 1001]
+    assert [drv.find_by_pk(T, i)["name"] for i in ids] == ["a", "b", "c"]
+    drv.conn = spy._conn
+    drv.close()
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_keys_first_seen_in_later_rows_are_kept(tmp_path, returning):
+    drv = SQLiteDriver(path=str(tmp_path / "ret.db"), returning=returning)
+    ids = drv.bulk_insert(T, [{"name": "a"}, {"id": 100, "name": "b", "age": 7}, {"email": "c@x.com"}])
+    assert ids == [1, 100, 101]
+    assert drv.find_by_pk(T, 100)["age"] == 7
+    assert drv.find_by_pk(T, 101)["email"] == "c@x.com"
+    assert drv.find_by_pk(T, 1)["age"] is None
+    drv.close()
+
+
+@needs_returning
+def test_returning_benchmark(tmp_path):
+    n = 3000
+    out = {}
+    for returning in (False, True):
+        drv = SQLiteDriver(path=str(tmp_path / f"ret_{returning}.db"), returning=returning)
+        drv.create(T, {"name": "seed", "age": 0})
+        t0 = time.perf_counter()
+        for i in range(n):
+            drv.create(T, {"name": f"U{i}", "age": i})
+        t1 = time.perf_counter()
+        drv.bulk_insert(T, [{"name": f"B{i}", "age": i} for i in range(20 * n)])
+        out[returning] = (t1 - t0, time.perf_counter() - t1)
+        drv.close()
+    print(f"\n[SQLite RETURNING] {n} create: {out[False][0]:.3f} s -> {out[True][0]:.3f} s; "
+          f"bulk_insert {20 * n}: {out[False][1]:.3f} s -> {out[True][1]:.3f} s")
@@ -0,0 +1,90 @@
+# =============================================================================
+# File:        tests/test_sqlite_schema_cache.py
+# Purpose:     Keš šeme u SQLiteDriver-u: insert bez DDL/PRAGMA round-trip-ova, ALTER samo
+#              za nove kolone, invalidacija po schema_version i posle rollback-a
+# Run:         pytest -q tests/test_sqlite_schema_cache.py -s
+# =============================================================================
+import sqlite3
+import time
+
+import pytest
+
+from system.db.sqlite_driver import SQLiteDriver
+
+T = "tst_schema_users"
+
+
+def _trace(drv):
+    stmts = []
+    drv.conn.set_trace_callback(lambda sql: stmts.append(" ".join(sql.split())))
+    return stmts
+
+
+def test_insert_is_single_statement_once_schema_is_known(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "schema.db"))
+    drv.create(T, {"name": "A", "age": 1})
+    stmts = _trace(drv)
+
+    drv.create(T, {"name": "B", "age": 2})
+    drv.create(T, {"name": "C"})  # podskup poznatih kolona
+    assert len(stmts) == 2 and all(s.startswith("INSERT INTO") for s in stmts)
+
+    stmts.clear()
+    drv.create(T, {"name": "D", "email": "d@x.com"})  # nova kolona → tek sada DDL
+    assert sum(s.startswith("ALTER TABLE") for s in stmts) == 1
+    stmts.clear()
+    drv.create(T, {"email": "e@x.com"})
+    assert len(stmts) == 1
+    assert drv.find_by_pk(T, 4)["email"] == "d@x.com"
+    drv.close()
+
+
+def test_external_schema_changes_invalidate_cache(tmp_path):
+    path = str(tmp_path / "schema.db")
+    drv = SQLiteDriver(path=path)
+    drv.create(T, {"name": "A"})
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute(f'ALTER TABLE "{T}" ADD COLUMN "email" TEXT;')
+    drv.create(T, {"name": "B", "email": "b@x.com"})  # nema duplog ADD COLUMN
+    assert drv.find_by_pk(T, 2)["email"] == "b@x.com"
+
+    other.execute(f'DROP TABLE "{T}";')
+    other.close()
+    assert drv.create(T, {"name": "C"})["id"] == 1  # tabela ponovo kreirana
+    assert drv.count(T) == 1
+    drv.close()
+
+
+def test_rollback_forgets_columns_added_in_transaction(tmp_path):
+    drv = SQLiteDriver(path=str(tmp_path / "schema.db"))
+    drv.create(T, {"name": "A"})
+    with pytest.raises(RuntimeError):
+        with drv.transaction():
+            drv.create(T, {"name": "B", "score": 1.5})
+            raise RuntimeError("boom")
+    drv.create(T, {"name": "C", "score": 2.5})
+    assert drv.read(T, {"where": {"name": "C"}, "first": True})["score"] == 2.5
+    drv.close()
+
+
+def test_schema_cache_benchmark(tmp_path):
+    n = 5000
+    drv = SQLiteDriver(path=str(tmp_path / "schema.db"))
+    row = {"name": "User", "age": 30, "email": "u@x.com"}
+    drv.create(T, row)
+    t0 = time.perf_counter()
+    with drv.transaction():
+        for _ in range(n):
+            drv._insert(T, row)
+    cached = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with drv.transaction():
+        for _ in range(n):
+            drv._forget_schema()  # stara putanja: CREATE TABLE IF NOT EXISTS + PRAGMA table_info
+            drv._insert(T, row)
+    uncached = time.perf_counter() - t0
+    print(f"\n[SQLite schema cache] {n} insert-a: sa kešom {cached:.3f} s, bez keša {uncached:.3f} s")
+    assert drv.count(T) == 2 * n + 1
+    drv.close()